@@ -0,0 +1,139 @@
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded FIFO wait queue, for one class of endpoints.
+
+    Lives on the event loop (no locks): a request either takes a free slot, waits
+    in the queue for at most `max_wait_seconds`, or is rejected straight away when
+    the queue is full. Slots are handed directly to the next waiter on release.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait_seconds
+        self.active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Smoothed service time, used to suggest a Retry-After
+        self.avg_service_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done():  # the slot arrived just as the wait expired
+                self.admitted += 1
+                return True
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            self.timed_out += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot we may already hold
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self, service_seconds: float = None):
+        if service_seconds is not None:
+            self.avg_service_seconds += 0.1 * (service_seconds - self.avg_service_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)  # slot moves to the waiter; active count unchanged
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a queued request would likely be served"""
+        backlog = (self.queue_depth + self.active) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(backlog * self.avg_service_seconds))
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_service_ms": round(self.avg_service_seconds * 1e3, 2),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that runs each request through the limiter of its endpoint class.
+
+    `classify(path, query_string)` returns a limiter name or None (not limited).
+    Rejected requests get 503 with a Retry-After header before touching the threadpool.
+    `on_admitted()` is called once a request is let through, e.g. to time the queue wait.
+    """
+
+    def __init__(self, app, classify, limiters: dict, on_admitted=None):
+        self.app = app
+        self.classify = classify
+        self.limiters = limiters
+        self.on_admitted = on_admitted
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiters.get(self.classify(scope["path"], scope.get("query_string", b"").decode("latin-1")))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(limiter, send)
+            return
+        if self.on_admitted is not None:
+            self.on_admitted()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(limiter, send):
+        body = json.dumps({"detail": f"Server busy ({limiter.name} capacity reached), retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(limiter.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
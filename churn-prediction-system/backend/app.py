@@ -1,18 +1,32 @@
 import sys
 import os
-import joblib
-import pandas as pd
+import time
 import numpy as np
 import threading
 from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Header
 from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, func
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Index, func, select, and_, or_
 from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
-from fastapi.responses import Response
-from report_generator import generate_report
+from fastapi.responses import Response, StreamingResponse, JSONResponse, PlainTextResponse
+from reports import ReportRenderer
+from batcher import MicroBatcher
+from prediction_cache import PredictionCache, canonical_key
+from log_writer import PredictionLogWriter
+from stats import DatasetStats, LiveRiskStats, risk_level, risk_levels
+from metrics import metrics, MetricsMiddleware
+from admission import AdmissionLimiter, AdmissionMiddleware
+from urllib.parse import parse_qs
+from explanations import ExplainOptions, DEFAULT_EXPLAIN, EXPLAIN_NONE, EXPLAIN_TOPK, explain_values, rank_explanations, top_k_indices
+from explanation_store import ExplanationStore
+import customer_risk
+import json
+import io
+import csv
+import base64
+import hmac
 
 from dotenv import load_dotenv
 
@@ -26,59 +40,152 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_NAME = os.getenv("DB_NAME", "AIML")
 MODEL_PATH_SETTING = os.getenv("MODEL_PATH", "models/churn_model.pkl")
 DATA_PATH_SETTING = os.getenv("DATA_PATH", "data/WA_Fn-UseC_-Telco-Customer-Churn.csv")
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "5000"))
+# Coalesce concurrent /predict calls into micro-batches (trades a few ms of latency for throughput)
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "3"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+# Compiled pandas-free encoder for request rows (falls back to the sklearn pipeline when off)
+FAST_ENCODER_ENABLED = os.getenv("FAST_ENCODER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Classifier backend: "xgboost", "flat" (compiled NumPy tree engine) or "auto" (engine for small batches)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "xgboost").lower()
+INFERENCE_FLAT_MAX_ROWS = int(os.getenv("INFERENCE_FLAT_MAX_ROWS", "32"))
+# In-process LRU cache of prediction + explanation results
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "10000"))
+PREDICTION_CACHE_MAX_MB = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+# Background bulk writer for prediction_logs
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL_MS = float(os.getenv("LOG_FLUSH_INTERVAL_MS", "1000"))
+# Hot reload: poll the model file for changes and swap in new versions without a restart
+MODEL_WATCH_ENABLED = os.getenv("MODEL_WATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MODEL_WATCH_INTERVAL_SECONDS = float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", "5"))
+# /admin/* endpoints are disabled (403) unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# /admin/model/reload only loads files under this directory
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+# How often live /stats counters are re-synced from prediction_logs (0 disables)
+STATS_ROLLUP_INTERVAL_SECONDS = float(os.getenv("STATS_ROLLUP_INTERVAL_SECONDS", "300"))
 
-SQLALCHEMY_DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+# Materialized customer_scores: re-scored when older than the interval or from another model (0 = off)
+CUSTOMER_SCORING_INTERVAL_SECONDS = float(os.getenv("CUSTOMER_SCORING_INTERVAL_SECONDS", "3600"))
+CUSTOMER_SCORING_TOP_K = int(os.getenv("CUSTOMER_SCORING_TOP_K", "3"))
+CUSTOMER_SCORING_EXPLAIN_METHOD = os.getenv("CUSTOMER_SCORING_EXPLAIN_METHOD", "exact").lower()
+# Per-stage latency histograms on /metrics, and per-request stage timings in Server-Timing headers
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+metrics.configure(METRICS_ENABLED, SERVER_TIMING_ENABLED)
+# Admission control: concurrent requests and wait-queue length per endpoint class, beyond which
+# requests are shed with 503 + Retry-After instead of piling up in the threadpool
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_SCORING_CONCURRENCY = int(os.getenv("ADMISSION_SCORING_CONCURRENCY", "16"))
+ADMISSION_SCORING_QUEUE = int(os.getenv("ADMISSION_SCORING_QUEUE", "64"))
+ADMISSION_EXPLAIN_CONCURRENCY = int(os.getenv("ADMISSION_EXPLAIN_CONCURRENCY", "8"))
+ADMISSION_EXPLAIN_QUEUE = int(os.getenv("ADMISSION_EXPLAIN_QUEUE", "32"))
+ADMISSION_REPORT_CONCURRENCY = int(os.getenv("ADMISSION_REPORT_CONCURRENCY", "2"))
+ADMISSION_REPORT_QUEUE = int(os.getenv("ADMISSION_REPORT_QUEUE", "8"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "5"))
+
+# PDF reports render in worker processes (0 = the default threadpool), cached by payload hash
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REPORT_CACHE_MAX_MB = float(os.getenv("REPORT_CACHE_MAX_MB", "64"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "600"))
+REPORT_BULK_MAX_INFLIGHT = int(os.getenv("REPORT_BULK_MAX_INFLIGHT", "0")) or None
 
-import shap
-import warnings
+# Every prediction's inputs, probability and SHAP vector, so reports render by prediction ID
+EXPLANATION_STORE_ENABLED = os.getenv("EXPLANATION_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+EXPLANATION_STORE_DIR = os.getenv("EXPLANATION_STORE_DIR", "data/explanations")
+
+SQLALCHEMY_DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 
 # --- 1. Setup ML Imports ---
+# pandas / sklearn / shap / xgboost are imported lazily by the model registry when the
+# model loads in the background, so the server can start listening straight away.
 # Add ml_pipeline to sys.path
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml_pipeline'))
 
-# Import the custom class
-try:
-    from preprocess import DataCleaner
-except ImportError as e:
-    print(f"Error importing DataCleaner: {e}")
+from model_registry import ModelRegistry
 
 from passlib.context import CryptContext
-from jose import JWTError, jwt
-from datetime import timedelta
 
 # --- 2. Database Setup ---
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 JWT_SECRET = os.getenv("JWT_SECRET", "churnshield_fallback_secret")
 ALGORITHM = "HS256"
 
+engine = None
 SessionLocal = None
-try:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+Base = declarative_base()
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String(50), unique=True, index=True)
+    password = Column(String(255))
+    full_name = Column(String(100))
+
+class PredictionLog(Base):
+    __tablename__ = "prediction_logs"
+    # Back the /logs filters and (prediction_date, id) keyset ordering
+    __table_args__ = (
+        Index("ix_prediction_logs_date_id", "prediction_date", "id"),
+        Index("ix_prediction_logs_customer_date_id", "customer_id", "prediction_date", "id"),
+        Index("ix_prediction_logs_risk_date_id", "risk_level", "prediction_date", "id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    customer_id = Column(String(50))
+    prediction_prob = Column(Float)
+    prediction_class = Column(Integer)
+    risk_level = Column(String(20))
+    monthly_charges = Column(Float, nullable=True)
+    prediction_date = Column(DateTime, default=datetime.utcnow)
+
+# Single background writer for prediction_logs (None when the database is down)
+prediction_log_writer = None
+
+# Dashboard statistics: cached dataset aggregates + incrementally maintained live counters
+dataset_stats = DatasetStats(os.path.join(os.path.dirname(os.path.abspath(__file__)), DATA_PATH_SETTING))
+live_stats = LiveRiskStats()
+stats_rollup_stop = threading.Event()
+customer_scoring_stop = threading.Event()
+customer_scoring_state = {"last_run": None, "last_result": None, "last_error": None}
+
+def init_database():
+    """Connect to MySQL, create tables and start the log writer (runs off the startup path)"""
+    global engine, SessionLocal, prediction_log_writer
+    startup_state["database"] = "connecting"
+    try:
+        db_engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+        # Create tables
+        Base.metadata.create_all(bind=db_engine)
+        customer_risk.metadata.create_all(bind=db_engine)
+    except Exception as e:
+        print(f"WARNING: Database connection failed (Logging disabled). Error: {e}")
+        startup_state["database"] = "unavailable"
+        return
+
+    engine = db_engine
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base = declarative_base()
-    
-    class User(Base):
-        __tablename__ = "users"
-        id = Column(Integer, primary_key=True, index=True)
-        username = Column(String(50), unique=True, index=True)
-        password = Column(String(255))
-        full_name = Column(String(100))
-
-    class PredictionLog(Base):
-        __tablename__ = "prediction_logs"
-        id = Column(Integer, primary_key=True, index=True)
-        customer_id = Column(String(50))
-        prediction_prob = Column(Float)
-        prediction_class = Column(Integer)
-        risk_level = Column(String(20))
-        prediction_date = Column(DateTime, default=datetime.utcnow)
-
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # Rows rejected by the database (e.g. the customers foreign key) are isolated; connection errors are not retried
+    from sqlalchemy.exc import DataError, IntegrityError
+    prediction_log_writer = PredictionLogWriter(
+        flush_prediction_logs, LOG_QUEUE_MAX, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL_MS,
+        split_errors=(IntegrityError, DataError)
+    )
+    prediction_log_writer.start()
+    startup_state["database"] = "connected"
     print("Database connected successfully.")
-except Exception as e:
-    print(f"WARNING: Database connection failed (Logging disabled). Error: {e}")
-    SessionLocal = None
+
+    # Seed live stats from history, then keep them in sync periodically
+    rollup_prediction_stats()
+    if STATS_ROLLUP_INTERVAL_SECONDS > 0:
+        threading.Thread(target=run_stats_rollups, name="stats-rollup", daemon=True).start()
+    if CUSTOMER_SCORING_INTERVAL_SECONDS > 0:
+        threading.Thread(target=run_customer_scoring, name="customer-scoring", daemon=True).start()
 
 # Dependency
 def get_db():
@@ -94,6 +201,31 @@ def get_db():
 # --- 3. FastAPI App ---
 app = FastAPI(title="ChurnShield Pro API")
 
+# Endpoint classes with their own concurrency limit and wait queue
+admission_limiters = {
+    "scoring": AdmissionLimiter("scoring", ADMISSION_SCORING_CONCURRENCY, ADMISSION_SCORING_QUEUE,
+                                ADMISSION_MAX_WAIT_SECONDS),
+    "explain": AdmissionLimiter("explain", ADMISSION_EXPLAIN_CONCURRENCY, ADMISSION_EXPLAIN_QUEUE,
+                                ADMISSION_MAX_WAIT_SECONDS),
+    "report": AdmissionLimiter("report", ADMISSION_REPORT_CONCURRENCY, ADMISSION_REPORT_QUEUE,
+                               ADMISSION_MAX_WAIT_SECONDS),
+} if ADMISSION_ENABLED else {}
+
+def admission_class(path: str, query_string: str) -> Optional[str]:
+    """Limiter for a request: PDF reports, scoring with explanations, or plain scoring"""
+    if path == "/report" or (path.startswith("/report/") and path != "/report/stats"):
+        return "report"
+    if path in ("/predict", "/predict/batch", "/predict/csv"):
+        default = EXPLAIN_NONE if path == "/predict/csv" else EXPLAIN_TOPK
+        explain = parse_qs(query_string).get("explain", [default])[0].lower()
+        return "scoring" if explain in (EXPLAIN_NONE, "false") else "explain"
+    return None
+
+# Innermost of the three so CORS headers are added to 503s and metrics see shed requests
+# Time queued here is its own stage, so handlers' "parse" stage starts after admission
+app.add_middleware(AdmissionMiddleware, classify=admission_class, limiters=admission_limiters,
+                   on_admitted=metrics.observe_admission)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -101,7 +233,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Model-Version", "Retry-After", "X-Report-Count"],
 )
+app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 # Authentication Schema
 class LoginRequest(BaseModel):
@@ -110,14 +244,18 @@ class LoginRequest(BaseModel):
 
 @app.post("/login")
 def login(request: LoginRequest, db=Depends(get_db)):
+    metrics.observe_since_request_start("parse")
     if not db:
         # Fallback for demo if DB is down
         if request.username == "admin" and request.password == "admin123":
             return {"access_token": "demo_token", "username": "admin", "full_name": "Admin User"}
         raise HTTPException(status_code=503, detail="Database connection failed")
 
-    user = db.query(User).filter(User.username == request.username).first()
-    if not user or not pwd_context.verify(request.password, user.password):
+    with metrics.stage("db"):
+        user = db.query(User).filter(User.username == request.username).first()
+    with metrics.stage("password_verify"):
+        verified = user is not None and pwd_context.verify(request.password, user.password)
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     return {
@@ -143,38 +281,91 @@ def init_demo_user(db=Depends(get_db)):
 
 # Load Model & Explainer
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-model = None
-explainer = None
-feature_names = None
+# Serving model, explainer and encoder live in the registry; read registry.current once per request
+registry = ModelRegistry(os.path.join(BASE_DIR, MODEL_PATH_SETTING), use_fast_encoder=FAST_ENCODER_ENABLED,
+                         inference_backend=INFERENCE_BACKEND, flat_max_rows=INFERENCE_FLAT_MAX_ROWS)
+predict_batcher = None
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+    max_bytes=int(PREDICTION_CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS
+) if PREDICTION_CACHE_ENABLED else None
 
-@app.on_event("startup")
-def startup_event():
-    global model, explainer, feature_names
-    current_model_path = os.path.join(BASE_DIR, MODEL_PATH_SETTING)
+def drop_cached_predictions(new_bundle, old_bundle):
+    """Results are keyed by model version, so after a swap the old ones can never be hit; free them now"""
+    if prediction_cache is not None and old_bundle is not None:
+        prediction_cache.clear()
+
+registry.on_swap(drop_cached_predictions)
+
+explanation_store = ExplanationStore(
+    os.path.join(BASE_DIR, EXPLANATION_STORE_DIR)
+) if EXPLANATION_STORE_ENABLED else None
+
+report_renderer = ReportRenderer(
+    workers=REPORT_WORKERS,
+    cache=PredictionCache(
+        max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+        max_bytes=int(REPORT_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=REPORT_CACHE_TTL_SECONDS
+    ) if REPORT_CACHE_ENABLED else None,
+    max_inflight=REPORT_BULK_MAX_INFLIGHT
+)
+
+# Readiness of the background initialisation; served by /readyz
+startup_state = {"model": "pending", "database": "pending", "model_error": None}
+model_ready = threading.Event()
+
+def load_model():
+    """Load, warm and publish the model (runs off the startup path)"""
+    startup_state["model"] = "loading"
+    started = time.perf_counter()
     try:
-        if os.path.exists(current_model_path):
-            model = joblib.load(current_model_path)
-            print(f"Model loaded from {current_model_path}")
-            
-            # Initialize SHAP explainer
-            # Pipeline structure: [DataCleaner + ColumnTransformer] -> [XGBClassifier]
-            # model.named_steps['preprocessor'] is the Pipeline from preprocess.py
-            outer_preprocessor = model.named_steps['preprocessor']
-            classifier = model.named_steps['classifier']
-            
-            # The preprocessor is a Pipeline: [DataCleaner, ColumnTransformer]
-            # ColumnTransformer is the last step.
-            ct = outer_preprocessor.steps[-1][1]
-            feature_names = ct.get_feature_names_out()
-            
-            # XGBoost explainer
-            explainer = shap.TreeExplainer(classifier)
-            print(f"SHAP Explainer initialized with {len(feature_names)} features.")
+        if os.path.exists(registry.path):
+            bundle = registry.reload()
+            print(f"SHAP Explainer initialized with {len(bundle.feature_names)} features"
+                  f" (fast encoder {'on' if bundle.encoder is not None else 'off'},"
+                  f" inference {bundle.inference_backend},"
+                  f" ready in {time.perf_counter() - started:.2f}s).")
+            startup_state["model"] = "ready"
+            model_ready.set()
         else:
-            print(f"Warning: Model not found at {current_model_path}")
+            print(f"Warning: Model not found at {registry.path}")
+            startup_state["model"] = "missing"
     except Exception as e:
         import traceback
         print(f"Startup Error:\n{traceback.format_exc()}")
+        startup_state["model"] = "failed"
+        startup_state["model_error"] = str(e)
+
+    if MODEL_WATCH_ENABLED:
+        registry.start_watcher(MODEL_WATCH_INTERVAL_SECONDS)
+        print(f"Watching {registry.path} for new model versions every {MODEL_WATCH_INTERVAL_SECONDS}s.")
+
+@app.on_event("startup")
+def startup_event():
+    global predict_batcher
+    # Database and model initialise in the background; /readyz reports when scoring can start
+    threading.Thread(target=init_database, name="db-init", daemon=True).start()
+    threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+    report_renderer.start()
+
+    if MICROBATCH_ENABLED and predict_batcher is None:
+        predict_batcher = MicroBatcher(score_batched_items, MICROBATCH_WINDOW_MS, MICROBATCH_MAX_SIZE)
+        predict_batcher.start()
+        print(f"Micro-batching enabled (window={MICROBATCH_WINDOW_MS}ms, max_batch={MICROBATCH_MAX_SIZE}).")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    registry.stop_watcher()
+    stats_rollup_stop.set()
+    customer_scoring_stop.set()
+    report_renderer.stop()
+    if predict_batcher is not None:
+        predict_batcher.stop()
+    if prediction_log_writer is not None:
+        # Drain queued rows before the process exits
+        prediction_log_writer.stop()
 
 # --- 4. Data Models ---
 class CustomerData(BaseModel):
@@ -206,161 +397,674 @@ class CustomerData(BaseModel):
 def read_root():
     return {"message": "Churn Prediction API with MySQL Logging is running."}
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving HTTP"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: model and explainer are loaded and warmed"""
+    bundle = registry.current
+    body = {
+        "ready": bundle is not None,
+        "model": startup_state["model"],
+        "model_version": bundle.version if bundle else None,
+        "database": startup_state["database"],
+    }
+    if startup_state["model_error"]:
+        body["model_error"] = startup_state["model_error"]
+    if bundle is None:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+MOCK_LOGS = [
+    {"id": 3, "customer_id": "CUST-1029", "prediction_prob": 0.45, "prediction_class": 0, "risk_level": "Medium", "prediction_date": "2024-03-20T12:05:00"},
+    {"id": 2, "customer_id": "CUST-4432", "prediction_prob": 0.88, "prediction_class": 1, "risk_level": "High", "prediction_date": "2024-03-20T11:15:00"},
+    {"id": 1, "customer_id": "CUST-9921", "prediction_prob": 0.12, "prediction_class": 0, "risk_level": "Low", "prediction_date": "2024-03-20T10:30:00"}
+]
+MAX_LOGS_PAGE_SIZE = 500
+
+def encode_logs_cursor(prediction_date: datetime, log_id: int) -> str:
+    raw = f"{prediction_date.isoformat()}|{log_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_logs_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def query_logs(db, limit: int, cursor: Optional[str] = None, customer_id: Optional[str] = None,
+               risk_level: Optional[str] = None, date_from: Optional[datetime] = None,
+               date_to: Optional[datetime] = None):
+    """Newest-first keyset page of prediction logs as plain dicts, plus the cursor for the next page"""
+    columns = [
+        PredictionLog.id, PredictionLog.customer_id, PredictionLog.prediction_prob,
+        PredictionLog.prediction_class, PredictionLog.risk_level, PredictionLog.prediction_date
+    ]
+    stmt = select(*columns)
+    if customer_id:
+        stmt = stmt.where(PredictionLog.customer_id == customer_id)
+    if risk_level:
+        stmt = stmt.where(PredictionLog.risk_level == risk_level)
+    if date_from:
+        stmt = stmt.where(PredictionLog.prediction_date >= date_from)
+    if date_to:
+        stmt = stmt.where(PredictionLog.prediction_date < date_to)
+    if cursor:
+        cursor_date, cursor_id = decode_logs_cursor(cursor)
+        # Expanded row comparison so MySQL can use a range scan on the composite indexes
+        stmt = stmt.where(or_(
+            PredictionLog.prediction_date < cursor_date,
+            and_(PredictionLog.prediction_date == cursor_date, PredictionLog.id < cursor_id)
+        ))
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(PredictionLog.prediction_date.desc(), PredictionLog.id.desc()).limit(limit + 1)
+
+    items = [dict(row) for row in db.execute(stmt).mappings()]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_logs_cursor(items[-1]["prediction_date"], items[-1]["id"])
+    return items, next_cursor
+
 @app.get("/logs")
-def get_logs(db=Depends(get_db)):
+def get_logs(limit: int = 10, db=Depends(get_db)):
     """Fetch recent prediction logs from database"""
+    limit = max(1, min(limit, MAX_LOGS_PAGE_SIZE))
     if not db:
         # Return mock logs if DB is unavailable for demo purposes
-        return [
-            {"id": 1, "customer_id": "CUST-9921", "prediction_prob": 0.12, "risk_level": "Low", "prediction_date": "2024-03-20T10:30:00"},
-            {"id": 2, "customer_id": "CUST-4432", "prediction_prob": 0.88, "risk_level": "High", "prediction_date": "2024-03-20T11:15:00"},
-            {"id": 3, "customer_id": "CUST-1029", "prediction_prob": 0.45, "risk_level": "Medium", "prediction_date": "2024-03-20T12:05:00"}
-        ]
+        return MOCK_LOGS[:limit]
     try:
-        logs = db.query(PredictionLog).order_by(PredictionLog.id.desc()).limit(10).all()
-        return logs
+        items, _ = query_logs(db, limit)
+        return items
     except Exception as e:
         print(f"Error fetching logs: {e}")
         return []
 
+@app.get("/logs/search")
+def search_logs(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db=Depends(get_db)
+):
+    """Filtered, cursor-paginated prediction log browsing (newest first)"""
+    limit = max(1, min(limit, MAX_LOGS_PAGE_SIZE))
+    if not db:
+        items = [
+            log for log in MOCK_LOGS
+            if (not customer_id or log["customer_id"] == customer_id)
+            and (not risk_level or log["risk_level"] == risk_level)
+        ]
+        return {"items": items[:limit], "next_cursor": None}
+    try:
+        items, next_cursor = query_logs(db, limit, cursor, customer_id, risk_level, date_from, date_to)
+        return {"items": items, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error searching logs: {e}")
+        raise HTTPException(status_code=500, detail="Failed to query prediction logs")
+
+FEATURE_DESCRIPTIONS = {
+    "gender": "Customer gender",
+    "SeniorCitizen": "Whether the customer is a senior citizen",
+    "Partner": "Whether the customer has a partner",
+    "Dependents": "Whether the customer has dependents",
+    "tenure": "Number of months the customer has stayed with the company",
+    "PhoneService": "Whether the customer has a phone service",
+    "MultipleLines": "Whether the customer has multiple lines",
+    "InternetService": "Customer's internet service provider",
+    "OnlineSecurity": "Whether the customer has online security",
+    "OnlineBackup": "Whether the customer has online backup",
+    "DeviceProtection": "Whether the customer has device protection",
+    "TechSupport": "Whether the customer has tech support",
+    "StreamingTV": "Whether the customer has streaming TV",
+    "StreamingMovies": "Whether the customer has streaming movies",
+    "Contract": "The contract term of the customer",
+    "PaperlessBilling": "Whether the customer has paperless billing",
+    "PaymentMethod": "The customer's payment method",
+    "MonthlyCharges": "The amount charged to the customer monthly",
+    "TotalCharges": "The total amount charged to the customer",
+}
+
+def describe_features(features: list) -> list:
+    return [{**f, "desc": FEATURE_DESCRIPTIONS.get(f["name"], "")} for f in features]
+
 @app.get("/features")
-def get_features():
-    """Returns details about the features used in the model"""
+def get_features(cohort: Optional[str] = None):
+    """Training-time feature importance of the serving model (mean |SHAP| and gain share)"""
+    bundle = registry.current
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model is still loading")
+    importance = bundle.importance
+    if importance is None:
+        raise HTTPException(status_code=404, detail="No feature importance was saved with this model; "
+                                                    "run ml_pipeline/importance.py")
+
+    features = importance["features"]
+    if cohort is not None:
+        if cohort not in importance["cohorts"]:
+            raise HTTPException(status_code=404, detail=f"Unknown {importance['cohort_column']} cohort '{cohort}'")
+        features = importance["cohorts"][cohort]["features"]
+    features = describe_features(features)
     return {
-        "categorical": [
-            {"name": "gender", "desc": "Customer gender", "importance": "Trivial"},
-            {"name": "SeniorCitizen", "desc": "Whether the customer is a senior citizen", "importance": "High"},
-            {"name": "Partner", "desc": "Whether the customer has a partner", "importance": "Medium"},
-            {"name": "Dependents", "desc": "Whether the customer has dependents", "importance": "Medium"},
-            {"name": "InternetService", "desc": "Customer's internet service provider", "importance": "Extreme"},
-            {"name": "Contract", "desc": "The contract term of the customer", "importance": "Extreme"},
-            {"name": "PaymentMethod", "desc": "The customer's payment method", "importance": "High"}
-        ],
-        "numerical": [
-            {"name": "tenure", "desc": "Number of months the customer has stayed with the company", "importance": "Extreme"},
-            {"name": "MonthlyCharges", "desc": "The amount charged to the customer monthly", "importance": "High"},
-            {"name": "TotalCharges", "desc": "The total amount charged to the customer", "importance": "Medium"}
-        ]
+        "model_version": importance["model_version"],
+        "computed_at": importance["computed_at"],
+        "cohort_column": importance["cohort_column"],
+        "cohort": cohort,
+        "cohorts": {name: c["n_rows"] for name, c in importance["cohorts"].items()},
+        "categorical": [f for f in features if f["type"] == "categorical"],
+        "numerical": [f for f in features if f["type"] == "numerical"],
     }
 
-def log_prediction_background(data: dict, prob: float, risk: str):
-    """Save prediction to database in background"""
+def flush_prediction_logs(rows: list):
+    """Write a batch of prediction_logs rows with one multi-row INSERT"""
+    with metrics.stage("db_flush"), engine.begin() as conn:
+        conn.execute(PredictionLog.__table__.insert().values(rows))
+
+def log_predictions(entries: list):
+    """Queue (data, prob, risk) predictions for the background log writer"""
+    if not entries:
+        return
+    live_stats.record(entries)
+    if prediction_log_writer is None:
+        return
+    now = datetime.utcnow()
+    prediction_log_writer.enqueue([
+        {
+            "customer_id": data.get("customer_id", "Unknown"),
+            "prediction_prob": prob,
+            "prediction_class": 1 if prob > 0.5 else 0,
+            "risk_level": risk,
+            "monthly_charges": data.get("MonthlyCharges"),
+            "prediction_date": now
+        }
+        for data, prob, risk in entries
+    ])
+
+def rollup_prediction_stats():
+    """Reset the live counters from each customer's latest row in prediction_logs (source of truth across workers)"""
     if SessionLocal is None:
         return
-        
-    db = SessionLocal()
     try:
-        log_entry = PredictionLog(
-            customer_id=data.get("customer_id", "Unknown"),
-            prediction_prob=prob,
-            prediction_class=1 if prob > 0.5 else 0,
-            risk_level=risk
-        )
-        db.add(log_entry)
-        db.commit()
+        latest = select(func.max(PredictionLog.id).label("id")).group_by(PredictionLog.customer_id).subquery()
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(
+                    PredictionLog.customer_id,
+                    PredictionLog.risk_level,
+                    PredictionLog.prediction_prob * PredictionLog.monthly_charges
+                ).join(latest, PredictionLog.id == latest.c.id).where(PredictionLog.risk_level.isnot(None))
+            ).all()
+        live_stats.replace(rows, as_of=datetime.utcnow())
     except Exception as e:
-        print(f"Failed to log prediction: {e}")
-    finally:
-        db.close()
+        print(f"Stats rollup failed: {e}")
+
+def run_stats_rollups():
+    while not stats_rollup_stop.wait(STATS_ROLLUP_INTERVAL_SECONDS):
+        rollup_prediction_stats()
+
+def score_customer_table(force: bool = False):
+    """Re-materialize customer_scores with the serving model unless they are current; None if skipped"""
+    bundle = registry.current
+    if engine is None or bundle is None:
+        return None
+    if not force and customer_risk.scores_are_current(engine, bundle.version, CUSTOMER_SCORING_INTERVAL_SECONDS):
+        return None
+    # Only one worker process scores at a time; the others find the scores current afterwards
+    result = customer_risk.run_exclusive(engine, "churn_customer_scoring", lambda: customer_risk.score_table(
+        engine, bundle, CSV_CHUNK_SIZE, CUSTOMER_SCORING_TOP_K, CUSTOMER_SCORING_EXPLAIN_METHOD))
+    if result is not None:
+        customer_scoring_state.update(last_run=datetime.utcnow().isoformat(), last_result=result, last_error=None)
+        print(f"Scored {result['scored']} customers with model {result['model_version']} in {result['seconds']}s")
+    return result
+
+def run_customer_scoring():
+    # Checked at least every minute so a new model version is picked up soon after a swap
+    model_ready.wait()
+    while not customer_scoring_stop.is_set():
+        try:
+            score_customer_table()
+        except Exception as e:
+            customer_scoring_state["last_error"] = str(e)
+            print(f"Customer scoring failed: {e}")
+        customer_scoring_stop.wait(min(CUSTOMER_SCORING_INTERVAL_SECONDS, 60))
 
 @app.get("/stats")
 def get_stats():
     """Provides aggregate statistics for the dashboard"""
-    if not model:
-        raise HTTPException(status_code=503, detail="Model not loaded")
-    
     try:
-        current_data_path = os.path.join(BASE_DIR, DATA_PATH_SETTING)
-        # For a real app, you would query your SQL database. 
-        # For this demo, we'll calculate stats from the original dataset to show 'Enterprise' trends.
-        # Check if the dataset exists
-        if os.path.exists(current_data_path):
-            df = pd.read_csv(current_data_path)
-            churn_count = df[df['Churn'] == 'Yes'].shape[0]
-            total_count = df.shape[0]
-            churn_rate = (churn_count / total_count) * 100
-            
-            # Risk Level Mock Distribution (usually from prediction_logs table)
-            risk_dist = [
-                {"label": "Low Risk", "value": 65, "color": "#10b981"},
-                {"label": "Medium Risk", "value": 22, "color": "#fbbf24"},
-                {"label": "High Risk", "value": 13, "color": "#f43f5e"}
-            ]
-            
-            return {
-                "total_customers": total_count,
-                "churn_rate": round(churn_rate, 1),
-                "risk_distribution": risk_dist,
-                "monthly_revenue_at_risk": 12450.00,
-                "active_interventions": 342
-            }
-        else:
+        dataset = dataset_stats.get()
+        if dataset is None:
             return {"message": "Dataset not found for stats calculation"}
+        # Dataset aggregates are cached per file version; live figures come from logged predictions
+        return {**dataset, **live_stats.snapshot(), "last_rollup": live_stats.last_rollup}
     except Exception as e:
         print(f"Stats Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to calculate statistics")
 
+def score_matrix(bundle, X_transformed, explain: ExplainOptions = DEFAULT_EXPLAIN):
+    """Run XGBoost and (optionally) explanations once over an already preprocessed matrix.
+
+    Returns the churn probabilities, per row the explanations ordered by absolute
+    impact, and the full contribution matrix per input field (empty lists and None
+    when explain.mode is "none").
+    """
+    # 1. Predict Probability
+    with metrics.stage("predict"):
+        probs = bundle.predict_proba(X_transformed)[:, 1]
+
+    # 2. Explanations (one call for the whole matrix, only if asked for)
+    values = explain_values(bundle, X_transformed, explain)
+    if values is None:
+        return probs, [[] for _ in range(len(probs))], None
+    return probs, rank_explanations(bundle, values, explain), values
+
+def score_rows(bundle, rows: list, explain: ExplainOptions = DEFAULT_EXPLAIN) -> list:
+    """Score a list of row dicts with one model version, one (prob, explanations, shap) per row"""
+    metrics.observe_size("churn_model_batch_rows", len(rows), "Rows per model call")
+    with metrics.stage("preprocess"):
+        X_transformed = bundle.transform_rows(rows)
+    probs, explanations, values = score_matrix(bundle, X_transformed, explain)
+    # float16 copies: what the explanation store keeps, and small enough to cache per row
+    shap = [None] * len(rows) if values is None else [row.copy() for row in values.astype(np.float16)]
+    return list(zip(probs, explanations, shap))
+
+def score_batched_items(items: list) -> list:
+    """Micro-batcher entry point: items are (bundle, explain, row), grouped per model version and options"""
+    results = [None] * len(items)
+    groups = {}
+    for i, (bundle, explain, row) in enumerate(items):
+        groups.setdefault((id(bundle), explain), (bundle, explain, []))[2].append(i)
+    for bundle, explain, indices in groups.values():
+        scored = score_rows(bundle, [items[i][2] for i in indices], explain)
+        for i, res in zip(indices, scored):
+            results[i] = res
+    return results
+
+def score_customers(bundle, rows: list, use_cache: bool = True, explain: ExplainOptions = DEFAULT_EXPLAIN) -> list:
+    """Score row dicts, serving repeats from the prediction cache.
+
+    Only cache misses reach the model; a lone miss goes through the
+    micro-batcher when it is enabled. Returns one (prob, explanations, shap) per row,
+    shap being the contributions per input field (None without explanations).
+    """
+    cache = prediction_cache if use_cache else None
+    results = [None] * len(rows)
+    keys = [None] * len(rows)
+    if cache is not None:
+        with metrics.stage("cache"):
+            cache_version = f"{bundle.version}|{explain.cache_tag()}"
+            for i, row in enumerate(rows):
+                keys[i] = canonical_key(row, cache_version)
+                results[i] = cache.get(keys[i])
+
+    misses = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        miss_rows = [rows[i] for i in misses]
+        if predict_batcher is not None and len(miss_rows) == 1:
+            # Scored together with other requests arriving in the same window
+            with metrics.stage("microbatch"):
+                scored = [predict_batcher.submit((bundle, explain, miss_rows[0])).result()]
+        else:
+            scored = score_rows(bundle, miss_rows, explain)
+        for i, (prob, explanations, shap) in zip(misses, scored):
+            results[i] = (float(prob), explanations, shap)
+            if cache is not None:
+                cache.put(keys[i], results[i])
+    return results
+
+def store_predictions(bundle, rows: list, scored: list) -> list:
+    """Persist scored rows with their SHAP vectors; returns prediction IDs (None when not stored)"""
+    if explanation_store is None:
+        return [None] * len(rows)
+    missing = np.full(len(bundle.source_names), np.nan, dtype=np.float16)
+    try:
+        with metrics.stage("store"):
+            return explanation_store.append(bundle.version, rows, [prob for prob, _, _ in scored],
+                                            np.stack([missing if shap is None else shap for _, _, shap in scored]),
+                                            bundle.source_names)
+    except Exception as e:
+        # Losing report history must not fail the prediction
+        print(f"Explanation Store Error: {e}")
+        return [None] * len(rows)
+
+def parse_explain_options(explain: str, explain_method: str, top_k: int) -> ExplainOptions:
+    try:
+        return ExplainOptions(explain, explain_method, top_k).validate()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def build_result(customer_id, prob: float, explanations: list, model_version: str) -> dict:
+    """Shape a single scored row the way /predict returns it"""
+    return {
+        "customer_id": customer_id,
+        "churn_probability": round(float(prob), 4),
+        "risk_level": risk_level(prob),
+        "explanations": explanations,
+        "model_version": model_version
+    }
+
 @app.post("/predict")
-def predict_churn(data: CustomerData, background_tasks: BackgroundTasks):
-    if not model or explainer is None:
+def predict_churn(data: CustomerData, use_cache: bool = True, explain: str = "topk",
+                  explain_method: str = "exact", top_k: int = 5):
+    metrics.observe_since_request_start("parse")
+    options = parse_explain_options(explain, explain_method, top_k)
+    # Pin the model version for the whole request
+    bundle = registry.current
+    if bundle is None:
         raise HTTPException(status_code=503, detail="Model or Explainer not loaded. Please check server logs.")
     
     try:
         # Convert input to DataFrame
         input_data = data.dict()
-        df = pd.DataFrame([input_data])
-        
-        # 1. Preprocess
-        preprocessor = model.named_steps['preprocessor']
-        X_transformed = preprocessor.transform(df)
-        
-        # 2. Predict Probability
-        classifier = model.named_steps['classifier']
-        prob = classifier.predict_proba(X_transformed)[0][1]
-        
-        # 3. Calculate SHAP Values
-        shap_values = explainer.shap_values(X_transformed)[0]
-        
-        # Create a mapping of feature names to SHAP values
-        explanations = []
-        for name, val in zip(feature_names, shap_values):
-            explanations.append({
-                "feature": name,
-                "impact": float(val)
-            })
-            
-        # Sort by absolute impact and take top 5
-        explanations = sorted(explanations, key=lambda x: abs(x["impact"]), reverse=True)[:5]
-        
-        # Determining Risk Level
-        risk_level = "Low"
-        if prob > 0.7:
-            risk_level = "High"
-        elif prob > 0.4:
-            risk_level = "Medium"
+
+        scored = score_customers(bundle, [input_data], use_cache, options)
+        prob, explanations, _ = scored[0]
+        result = build_result(data.customer_id, prob, explanations, bundle.version)
+        result["prediction_id"] = store_predictions(bundle, [input_data], scored)[0]
             
-        # Log in background
-        background_tasks.add_task(log_prediction_background, input_data, float(prob), risk_level)
+        # Queued for the background log writer
+        with metrics.stage("log"):
+            log_predictions([(input_data, float(prob), result["risk_level"])])
             
-        # Return structured response
-        return {
-            "customer_id": data.customer_id,
-            "churn_probability": round(float(prob), 4),
-            "risk_level": risk_level,
-            "explanations": explanations
-        }
+        return result
     except Exception as e:
         print(f"Prediction Error: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+class BatchPredictRequest(BaseModel):
+    customers: List[CustomerData]
+
+@app.post("/predict/batch")
+def predict_churn_batch(req: BatchPredictRequest, use_cache: bool = True, explain: str = "topk",
+                        explain_method: str = "exact", top_k: int = 5):
+    """Score many customers in one vectorized pass"""
+    metrics.observe_since_request_start("parse")
+    options = parse_explain_options(explain, explain_method, top_k)
+    bundle = registry.current
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model or Explainer not loaded. Please check server logs.")
+    if not req.customers:
+        return {"count": 0, "results": []}
+    if len(req.customers) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} customers)")
+
+    try:
+        rows = [c.dict() for c in req.customers]
+        scored = score_customers(bundle, rows, use_cache, options)
+        probs = [prob for prob, _, _ in scored]
+        results = [
+            {**build_result(row["customer_id"], prob, exp, bundle.version), "prediction_id": prediction_id}
+            for row, (prob, exp, _), prediction_id in zip(rows, scored, store_predictions(bundle, rows, scored))
+        ]
+
+        # Queued for one bulk log write
+        with metrics.stage("log"):
+            log_predictions([(row, float(prob), res["risk_level"]) for row, prob, res in zip(rows, probs, results)])
+
+        return {"count": len(results), "model_version": bundle.version, "results": results}
+    except Exception as e:
+        print(f"Batch Prediction Error: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+CSV_REQUIRED_COLUMNS = [
+    'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure', 'PhoneService',
+    'MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup',
+    'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
+    'Contract', 'PaperlessBilling', 'PaymentMethod', 'MonthlyCharges', 'TotalCharges'
+]
+
+def score_csv_chunks(bundle, reader, first_chunk, explain: ExplainOptions, output_format: str):
+    """Yield NDJSON lines or CSV text for each scored chunk of an uploaded file"""
+    with_explanations = explain.mode != EXPLAIN_NONE
+    if output_format == "csv":
+        header = ["customer_id", "churn_probability", "risk_level"]
+        if with_explanations:
+            header.append("top_drivers")
+        yield ",".join(header) + "\n"
+
+    chunk = first_chunk
+    while chunk is not None:
+        with metrics.stage("preprocess"):
+            X_transformed = bundle.transform_frame(chunk)
+        probs, explanations, _ = score_matrix(bundle, X_transformed, explain=explain)
+        if 'customerID' in chunk.columns:
+            ids = chunk['customerID'].astype(str).tolist()
+        else:
+            ids = ["Unknown"] * len(chunk)
+        risks = risk_levels(probs)
+
+        buffer = io.StringIO()
+        if output_format == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            for cid, prob, risk, exp in zip(ids, probs, risks, explanations):
+                row = [cid, round(float(prob), 4), risk]
+                if with_explanations:
+                    row.append(";".join(f"{e['feature']}={e['impact']:.4f}" for e in exp))
+                writer.writerow(row)
+        else:
+            for cid, prob, risk, exp in zip(ids, probs, risks, explanations):
+                record = {"customer_id": cid, "churn_probability": round(float(prob), 4), "risk_level": str(risk)}
+                if with_explanations:
+                    record["explanations"] = exp
+                buffer.write(json.dumps(record) + "\n")
+        yield buffer.getvalue()
+
+        chunk = next(reader, None)
+
+@app.post("/predict/csv")
+def predict_churn_csv(file: UploadFile = File(...), explain: str = "none", explain_method: str = "exact",
+                      top_k: int = 5, format: str = "ndjson"):
+    """Score a Telco-format CSV upload chunk by chunk and stream the results back"""
+    # explain=true/false kept for older clients
+    explain = {"true": EXPLAIN_TOPK, "false": EXPLAIN_NONE}.get(explain.lower(), explain)
+    options = parse_explain_options(explain, explain_method, top_k)
+    bundle = registry.current
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model or Explainer not loaded. Please check server logs.")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    import pandas as pd
+    from dataset import upload_dtypes
+    try:
+        # Pinned dtypes: a blank cell must not change how its column is read for the rest of the chunk
+        reader = pd.read_csv(file.file, chunksize=CSV_CHUNK_SIZE, dtype=upload_dtypes())
+        first_chunk = next(reader, None)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse CSV: {str(e)}")
+    if first_chunk is None:
+        raise HTTPException(status_code=400, detail="CSV file is empty")
+    missing = [c for c in CSV_REQUIRED_COLUMNS if c not in first_chunk.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(missing)}")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        score_csv_chunks(bundle, reader, first_chunk, options, format),
+        media_type=media_type,
+        headers={"X-Model-Version": bundle.version}
+    )
+
+@app.get("/model")
+def get_model_info():
+    """Version and load time of the model currently serving requests"""
+    bundle = registry.current
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    return {**bundle.info(), "swaps": registry.swaps, "watching": MODEL_WATCH_ENABLED}
+
+class ModelReloadRequest(BaseModel):
+    # Defaults to the configured MODEL_PATH
+    path: Optional[str] = None
+
+def require_admin(x_admin_token: Optional[str]):
+    """403 unless ADMIN_TOKEN is configured and the request carries it"""
+    if not ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+MAX_CUSTOMERS_PAGE_SIZE = 500
+
+@app.get("/customers/top-risk")
+def get_top_risk_customers(limit: int = 20, segment: Optional[str] = None, value: Optional[str] = None,
+                           db=Depends(get_db)):
+    """Highest-risk customers from customer_scores, overall, in one segment value, or per segment value"""
+    if not db:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    limit = max(1, min(limit, MAX_CUSTOMERS_PAGE_SIZE))
+    if segment is not None and segment not in customer_risk.SEGMENTS:
+        raise HTTPException(status_code=400, detail=f"segment must be one of {', '.join(customer_risk.SEGMENTS)}")
+    if value is not None and segment is None:
+        raise HTTPException(status_code=400, detail="value needs a segment")
+    with metrics.stage("db"):
+        if segment is not None and value is None:
+            # Top N within every value of the segment: one index range scan each
+            groups = {v: customer_risk.top_risk(db, limit, segment, v) for v in customer_risk.segment_values(db, segment)}
+            return {"segment": segment, "groups": groups}
+        return {"segment": segment, "value": value, "items": customer_risk.top_risk(db, limit, segment, value)}
+
+@app.get("/customers/{customer_id}/risk")
+def get_customer_risk(customer_id: str, db=Depends(get_db)):
+    """Latest materialized score of a customer (no model call)"""
+    if not db:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    with metrics.stage("db"):
+        risk = customer_risk.get_customer_risk(db, customer_id)
+    if risk is None:
+        raise HTTPException(status_code=404, detail=f"No score for customer {customer_id}")
+    return risk
+
+@app.post("/admin/customers/ingest")
+def ingest_customers(file: UploadFile = File(...), x_admin_token: Optional[str] = Header(None)):
+    """Load a Telco-format CSV into the customers table (upsert by customer ID)"""
+    require_admin(x_admin_token)
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    try:
+        rows = customer_risk.ingest_csv(engine, file.file, CSV_CHUNK_SIZE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ingested": rows}
+
+@app.post("/admin/customers/score")
+def rescore_customers(x_admin_token: Optional[str] = Header(None)):
+    """Re-materialize customer_scores now instead of waiting for the schedule"""
+    require_admin(x_admin_token)
+    if engine is None or registry.current is None:
+        raise HTTPException(status_code=503, detail="Database or model not ready")
+    result = score_customer_table(force=True)
+    if result is None:
+        raise HTTPException(status_code=409, detail="Customer scoring is already running in another process")
+    return result
+
+@app.get("/customers/scoring")
+def get_customer_scoring_status():
+    """Schedule and outcome of the last customer scoring run in this process"""
+    return {"interval_seconds": CUSTOMER_SCORING_INTERVAL_SECONDS, **customer_scoring_state}
+
+@app.post("/admin/model/reload")
+def reload_model(req: ModelReloadRequest = None, x_admin_token: Optional[str] = Header(None)):
+    """Load, warm and atomically swap in a model artifact"""
+    require_admin(x_admin_token)
+    path = req.path if req and req.path else None
+    if path is not None:
+        # Models are unpickled: never load anything from outside the models directory
+        models_dir = os.path.realpath(os.path.join(BASE_DIR, MODELS_DIR))
+        path = os.path.realpath(os.path.join(BASE_DIR, path))
+        if os.path.commonpath([path, models_dir]) != models_dir:
+            raise HTTPException(status_code=400, detail=f"Model path must be inside {MODELS_DIR}/")
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail=f"Model artifact not found: {req.path}")
+    try:
+        previous = registry.current
+        bundle = registry.reload(path)
+        return {
+            "model_version": bundle.version,
+            "previous_version": previous.version if previous else None,
+            "swapped": previous is not bundle
+        }
+    except Exception as e:
+        print(f"Model Reload Error: {e}")
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+
+@app.get("/log-writer/stats")
+def get_log_writer_stats():
+    """Queue depth and write/drop counters for the prediction log writer"""
+    if prediction_log_writer is None:
+        return {"running": False}
+    return prediction_log_writer.stats()
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters for the prediction cache"""
+    if prediction_cache is None:
+        return {"enabled": False}
+    bundle = registry.current
+    return {"enabled": True, "model_version": bundle.version if bundle else None, **prediction_cache.stats()}
+
+def _component_stat(component, key):
+    return (lambda: component().stats()[key] if component() is not None else None)
+
+metrics.register_gauge("churn_log_queue_depth", "Prediction log rows waiting to be written",
+                       _component_stat(lambda: prediction_log_writer, "queue_depth"))
+metrics.register_gauge("churn_log_rows_dropped_total", "Prediction log rows dropped because the queue was full",
+                       _component_stat(lambda: prediction_log_writer, "dropped"), kind="counter")
+metrics.register_gauge("churn_cache_hits_total", "Prediction cache hits",
+                       _component_stat(lambda: prediction_cache, "hits"), kind="counter")
+metrics.register_gauge("churn_cache_misses_total", "Prediction cache misses",
+                       _component_stat(lambda: prediction_cache, "misses"), kind="counter")
+metrics.register_gauge("churn_cache_entries", "Entries in the prediction cache",
+                       _component_stat(lambda: prediction_cache, "entries"))
+metrics.register_gauge("churn_report_cache_hits_total", "PDF reports served from the report cache",
+                       _component_stat(lambda: report_renderer.cache, "hits"), kind="counter")
+metrics.register_gauge("churn_reports_rendered_total", "PDF reports rendered by the report workers",
+                       lambda: report_renderer.rendered, kind="counter")
+metrics.register_gauge("churn_microbatch_queue_depth", "Rows waiting for the micro-batcher",
+                       _component_stat(lambda: predict_batcher, "queue_depth"))
+def _admission_stat(key):
+    return lambda: {(("class", name),): limiter.stats()[key] for name, limiter in admission_limiters.items()} or None
+
+metrics.register_gauge("churn_admission_queue_depth", "Requests waiting for an admission slot",
+                       _admission_stat("queue_depth"))
+metrics.register_gauge("churn_admission_active", "Requests holding an admission slot", _admission_stat("active"))
+metrics.register_gauge("churn_admission_rejected_total", "Requests shed because the wait queue was full",
+                       _admission_stat("rejected"), kind="counter")
+metrics.register_gauge("churn_admission_timed_out_total", "Requests shed after waiting too long for a slot",
+                       _admission_stat("timed_out"), kind="counter")
+metrics.register_gauge("churn_model_swaps_total", "Model versions swapped in since start",
+                       lambda: registry.swaps, kind="counter")
+
+@app.get("/admission/stats")
+def get_admission_stats():
+    """Slots, queue depth and shed counts per endpoint class"""
+    if not admission_limiters:
+        return {"enabled": False}
+    return {"enabled": True, **{name: limiter.stats() for name, limiter in admission_limiters.items()}}
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of latency histograms, counters and queue depths"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 class ReportRequest(BaseModel):
     # Flexible dict to accept all data
     data: dict
 
 @app.post("/report")
-def create_report(req: ReportRequest):
+async def create_report(req: ReportRequest):
+    """Render a customer's PDF report in the report workers; repeated payloads come from the cache"""
+    metrics.observe_since_request_start("parse")
     try:
-        pdf_content = generate_report(req.data)
+        pdf_content = await report_renderer.render(req.data)
         filename = f"ChurnReport_{req.data.get('customer_id', 'Unknown')}.pdf"
         return Response(
             content=pdf_content,
@@ -370,3 +1074,104 @@ def create_report(req: ReportRequest):
     except Exception as e:
         print(f"Report Generation Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+class BulkReportRequest(BaseModel):
+    customers: List[CustomerData]
+
+@app.post("/report/bulk")
+def create_bulk_report(req: BulkReportRequest, format: str = "pdf", min_probability: float = 0.4,
+                       limit: Optional[int] = None, explain_method: str = "exact", top_k: int = 5):
+    """Reports for the at-risk customers of a portfolio, riskiest first, streamed as one PDF or a ZIP"""
+    metrics.observe_since_request_start("parse")
+    options = parse_explain_options(EXPLAIN_TOPK, explain_method, top_k)
+    bundle = registry.current
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model or Explainer not loaded. Please check server logs.")
+    if format not in ("pdf", "zip"):
+        raise HTTPException(status_code=400, detail="format must be 'pdf' or 'zip'")
+    if len(req.customers) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} customers)")
+
+    rows = [c.dict() for c in req.customers]
+    # Score everyone without explanations; only the customers that get a report are explained
+    probs = [prob for prob, _, _ in score_customers(bundle, rows, True, ExplainOptions(EXPLAIN_NONE))]
+    at_risk = sorted((i for i, p in enumerate(probs) if p >= min_probability), key=lambda i: -probs[i])
+    if limit is not None:
+        at_risk = at_risk[:max(limit, 0)]
+    if not at_risk:
+        raise HTTPException(status_code=404, detail=f"No customers with churn probability >= {min_probability}")
+
+    at_risk_rows = [rows[i] for i in at_risk]
+    scored = score_customers(bundle, at_risk_rows, True, options)
+    reports = [{**build_result(row["customer_id"], prob, exp, bundle.version), **row}
+               for row, (prob, exp, _) in zip(at_risk_rows, scored)]
+    return stream_reports(reports, format, {"X-Model-Version": bundle.version})
+
+def stream_reports(reports: list, output_format: str, headers: dict = None):
+    """Stream report payloads as one multi-page PDF or a ZIP of PDFs, in the given order"""
+    headers = {**(headers or {}), "X-Report-Count": str(len(reports))}
+    if output_format == "zip":
+        filenames = [f"{rank:04d}_ChurnReport_{report['customer_id']}.pdf" for rank, report in enumerate(reports, 1)]
+        headers["Content-Disposition"] = "attachment; filename=ChurnReports.zip"
+        return StreamingResponse(report_renderer.stream_zip(reports, filenames), media_type="application/zip",
+                                 headers=headers)
+    headers["Content-Disposition"] = "attachment; filename=ChurnReports.pdf"
+    return StreamingResponse(report_renderer.stream_pdf(reports), media_type="application/pdf", headers=headers)
+
+@app.get("/report/stats")
+def get_report_stats():
+    """Report workers, renders and PDF cache counters"""
+    return {**report_renderer.stats(),
+            "explanation_store": explanation_store.stats() if explanation_store is not None else None}
+
+def stored_report_data(prediction_ids: list, top_k: int = 5) -> list:
+    """Report payloads rebuilt from the explanation store, nothing re-scored or re-explained"""
+    if explanation_store is None:
+        raise HTTPException(status_code=503, detail="Explanation store is disabled")
+    if top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1")
+    try:
+        entries = explanation_store.load(prediction_ids)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Prediction {e.args[0]} not found")
+
+    reports = []
+    for entry in entries:
+        shap = entry["shap"]
+        explained = np.flatnonzero(~np.isnan(shap))
+        idx = explained[top_k_indices(shap[explained][None, :], top_k)[0]]
+        explanations = [{"feature": explanation_store.fields[i], "impact": float(shap[i])} for i in idx]
+        reports.append({
+            **build_result(entry["customer_id"], entry["churn_probability"], explanations, entry["model_version"]),
+            "prediction_id": entry["prediction_id"],
+            "predicted_at": entry["predicted_at"],
+            **entry["features"],
+        })
+    return reports
+
+@app.get("/report/{prediction_id}")
+async def get_stored_report(prediction_id: int, top_k: int = 5):
+    """Render the report of an earlier prediction from its stored inputs and SHAP values"""
+    metrics.observe_since_request_start("parse")
+    data = stored_report_data([prediction_id], top_k)[0]
+    pdf_content = await report_renderer.render(data)
+    return Response(
+        content=pdf_content,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename=ChurnReport_{data['customer_id']}.pdf"}
+    )
+
+class StoredReportRequest(BaseModel):
+    prediction_ids: List[int]
+
+@app.post("/report/predictions")
+def create_stored_bulk_report(req: StoredReportRequest, format: str = "pdf", top_k: int = 5):
+    """Regenerate reports of earlier predictions in bulk, streamed as one PDF or a ZIP"""
+    metrics.observe_since_request_start("parse")
+    if format not in ("pdf", "zip"):
+        raise HTTPException(status_code=400, detail="format must be 'pdf' or 'zip'")
+    if len(req.prediction_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} predictions)")
+    if not req.prediction_ids:
+        raise HTTPException(status_code=400, detail="prediction_ids is empty")
+    return stream_reports(stored_report_data(req.prediction_ids, top_k), format)
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from model_registry import load_bundle
+from explanations import ExplainOptions, contributions, explain_matrix, group_by_source, top_k_indices
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+MODES = [
+    ExplainOptions('none'),
+    ExplainOptions('topk', 'exact'),
+    ExplainOptions('topk', 'approx'),
+    ExplainOptions('full', 'exact'),
+    ExplainOptions('full', 'approx'),
+]
+
+
+def time_mode(bundle, X, options, repeats):
+    """Seconds per call of predict + explain over the whole matrix"""
+    best = float('inf')
+    for _ in range(repeats):
+        t = time.perf_counter()
+        bundle.classifier.predict_proba(X)
+        explain_matrix(bundle, X, options)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def spearman(a, b):
+    """Row-wise Spearman rank correlation of two (n_rows, n_features) arrays"""
+    ra = np.argsort(np.argsort(a, axis=1), axis=1).astype(np.float64)
+    rb = np.argsort(np.argsort(b, axis=1), axis=1).astype(np.float64)
+    ra -= ra.mean(axis=1, keepdims=True)
+    rb -= rb.mean(axis=1, keepdims=True)
+    return (ra * rb).sum(axis=1) / np.sqrt((ra ** 2).sum(axis=1) * (rb ** 2).sum(axis=1))
+
+
+def ranking_agreement(bundle, X, k):
+    """How closely the approximate attributions rank input fields compared with exact TreeSHAP"""
+    exact = group_by_source(bundle, contributions(bundle, X, 'exact'))
+    approx = group_by_source(bundle, contributions(bundle, X, 'approx'))
+    top_exact = top_k_indices(exact, k)
+    top_approx = top_k_indices(approx, k)
+    overlap = np.array([len(set(e) & set(a)) / k for e, a in zip(top_exact, top_approx)])
+    return {
+        'top_k_overlap': float(overlap.mean()),
+        'top_1_match': float((top_exact[:, 0] == top_approx[:, 0]).mean()),
+        'spearman_abs': float(np.nanmean(spearman(np.abs(exact), np.abs(approx)))),
+    }
+
+
+def main(model_path=MODEL_PATH, rows=1000, repeats=5, top_k=5):
+    bundle = load_bundle(model_path)
+    df = pd.read_csv(DATA_PATH).drop('Churn', axis=1).head(rows)
+    records = df.to_dict('records')
+    X = bundle.transform_rows(records)
+    X_single = bundle.transform_rows(records[:1])
+
+    print(f"Model {bundle.version}, {X.shape[0]} rows x {X.shape[1]} features, best of {repeats}")
+    print(f"{'mode':<16} {'single row':>12} {'batch':>12} {'rows/sec':>12}")
+    for options in MODES:
+        options = options._replace(top_k=top_k)
+        single = time_mode(bundle, X_single, options, repeats * 20)
+        batch = time_mode(bundle, X, options, repeats)
+        label = options.mode if options.mode == 'none' else f"{options.mode}/{options.method}"
+        print(f"{label:<16} {single * 1e3:10.3f}ms {batch * 1e3:10.1f}ms {X.shape[0] / batch:12,.0f}")
+
+    agreement = ranking_agreement(bundle, X, top_k)
+    print(f"\nApprox vs exact ranking agreement over {X.shape[0]} rows:")
+    print(f"  top-{top_k} overlap   {agreement['top_k_overlap']:.3f}")
+    print(f"  top-1 match     {agreement['top_1_match']:.3f}")
+    print(f"  Spearman |phi|  {agreement['spearman_abs']:.3f}")
+    return agreement
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency and ranking agreement of explanation modes")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--top-k', type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.model, args.rows, args.repeats, args.top_k)
@@ -0,0 +1,82 @@
+import gc
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure(fn, iterations, warmup=3, rows_per_call=1):
+    """Call fn() `iterations` times after `warmup` calls; latency percentiles and throughput"""
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    latencies = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        fn()
+        latencies[i] = time.perf_counter() - t
+    elapsed = time.perf_counter() - started
+    return {
+        'iterations': iterations,
+        'rows_per_call': rows_per_call,
+        'elapsed_s': round(elapsed, 4),
+        'calls_per_s': round(iterations / elapsed, 2),
+        'rows_per_s': round(iterations * rows_per_call / elapsed, 2),
+        'mean_ms': round(latencies.mean() * 1e3, 4),
+        'p50_ms': round(np.percentile(latencies, 50) * 1e3, 4),
+        'p95_ms': round(np.percentile(latencies, 95) * 1e3, 4),
+        'p99_ms': round(np.percentile(latencies, 99) * 1e3, 4),
+        'max_ms': round(latencies.max() * 1e3, 4),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def environment():
+    """Enough context to tell whether two result files are comparable"""
+    import sklearn
+    import xgboost
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'git_commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'xgboost': xgboost.__version__,
+        'scikit-learn': sklearn.__version__,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    """Regressions of more than `threshold` in p50 latency or throughput against a baseline run"""
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            continue
+        if base.get('p50_ms') and result['p50_ms'] > base['p50_ms'] * (1 + threshold):
+            regressions.append((name, 'p50_ms', base['p50_ms'], result['p50_ms']))
+        if base.get('rows_per_s') and result['rows_per_s'] < base['rows_per_s'] * (1 - threshold):
+            regressions.append((name, 'rows_per_s', base['rows_per_s'], result['rows_per_s']))
+    return regressions
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+SAMPLE_CUSTOMER = {
+    "customer_id": "BENCH-1", "gender": "Male", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+    "tenure": 12, "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL",
+    "OnlineSecurity": "No", "OnlineBackup": "Yes", "DeviceProtection": "No", "TechSupport": "No",
+    "StreamingTV": "No", "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 55.0, "TotalCharges": 660.0,
+}
+
+
+async def burst(app, path, n_requests, arrival_rate):
+    """Send n_requests at a fixed arrival rate (open loop); returns (status, latency) per request"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def one(i):
+            await asyncio.sleep(i / arrival_rate)
+            t = time.perf_counter()
+            r = await client.post(path, json=SAMPLE_CUSTOMER)
+            return r.status_code, time.perf_counter() - t
+
+        return await asyncio.gather(*(one(i) for i in range(n_requests)))
+
+
+def summarize(label, results):
+    accepted = np.array([lat for status, lat in results if status == 200]) * 1e3
+    shed = sum(1 for status, _ in results if status == 503)
+    if len(accepted):
+        print(f"{label:<16} accepted {len(accepted):>5}  shed {shed:>5}  "
+              f"p50 {np.percentile(accepted, 50):8.1f}ms  p99 {np.percentile(accepted, 99):8.1f}ms  "
+              f"max {accepted.max():8.1f}ms")
+    else:
+        print(f"{label:<16} accepted     0  shed {shed:>5}")
+
+
+def main(path, n_requests, arrival_rate):
+    os.environ.setdefault("MICROBATCH_ENABLED", "false")
+    import app as app_module
+
+    # No lifespan under ASGITransport: load the model directly
+    app_module.registry.reload()
+    limiters = dict(app_module.admission_limiters)
+    print(f"{n_requests} x POST {path} at {arrival_rate:.0f} req/s "
+          f"(classes: {', '.join(f'{k} {v.max_concurrent}+{v.max_queue}' for k, v in limiters.items())})")
+
+    app_module.admission_limiters.clear()
+    summarize("no admission", asyncio.run(burst(app_module.app, path, n_requests, arrival_rate)))
+    app_module.admission_limiters.update(limiters)
+    summarize("admission", asyncio.run(burst(app_module.app, path, n_requests, arrival_rate)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of accepted requests under overload, with and without admission control")
+    parser.add_argument('--path', default='/predict?use_cache=false')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=2000, help="Arrival rate in requests/second")
+    args = parser.parse_args()
+
+    main(args.path, args.requests, args.rate)
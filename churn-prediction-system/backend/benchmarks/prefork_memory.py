@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVE = os.path.join(BASE_DIR, 'serve.py')
+
+SAMPLE_CUSTOMER = {
+    "customer_id": "BENCH-1", "gender": "Male", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+    "tenure": 12, "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL",
+    "OnlineSecurity": "No", "OnlineBackup": "Yes", "DeviceProtection": "No", "TechSupport": "No",
+    "StreamingTV": "No", "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 55.0, "TotalCharges": 660.0,
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def memory_kb(pid):
+    """Rss / Pss / Private memory of a process from /proc (Linux only)"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(':') in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'private': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def post_predict(port):
+    req = urllib.request.Request(f'http://127.0.0.1:{port}/predict?use_cache=false',
+                                 data=json.dumps(SAMPLE_CUSTOMER).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as r:
+        return r.status
+
+
+def wait_ready(port, workers, timeout=300):
+    """Wait until /readyz succeeds, then send traffic so every worker has served requests"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=5) as r:
+                if r.status == 200:
+                    break
+        except OSError:
+            pass
+        time.sleep(0.5)
+    else:
+        raise TimeoutError("Server did not become ready")
+    # Connections are spread across workers by the kernel; enough requests reach all of them,
+    # and a worker that isn't ready yet answers 503, which is retried.
+    sent = 0
+    while sent < 50 * workers and time.monotonic() < deadline:
+        try:
+            post_predict(port)
+            sent += 1
+        except OSError:
+            time.sleep(0.2)
+
+
+def measure(workers, preload):
+    port = free_port()
+    cmd = [sys.executable, SERVE, '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+           '--log-level', 'warning']
+    if not preload:
+        cmd.append('--no-preload')
+    env = {**os.environ, 'MODEL_WATCH_ENABLED': 'false', 'STATS_ROLLUP_INTERVAL_SECONDS': '0'}
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, workers)
+        time.sleep(1)
+        master = memory_kb(proc.pid)
+        worker_mem = [memory_kb(pid) for pid in children(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        'workers': workers,
+        'preload': preload,
+        'total_pss_mb': mb(master['pss'] + sum(w['pss'] for w in worker_mem)),
+        'master_pss_mb': mb(master['pss']),
+        'worker_rss_mb': mb(sum(w['rss'] for w in worker_mem) / len(worker_mem)),
+        'worker_pss_mb': mb(sum(w['pss'] for w in worker_mem) / len(worker_mem)),
+        'worker_private_mb': mb(sum(w['private'] for w in worker_mem) / len(worker_mem)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory of serve.py with and without model preloading")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--output', default=None, help="Write results as JSON")
+    args = parser.parse_args()
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("This benchmark reads /proc/<pid>/smaps_rollup and needs Linux")
+
+    results = []
+    print(f"{'mode':<10} {'workers':>7} {'total PSS':>10} {'worker RSS':>11} {'worker PSS':>11} {'private':>9}")
+    for workers in args.workers:
+        for preload in (False, True):
+            r = measure(workers, preload)
+            results.append(r)
+            print(f"{'preload' if preload else 'per-worker':<10} {workers:>7} {r['total_pss_mb']:>8.1f}MB "
+                  f"{r['worker_rss_mb']:>9.1f}MB {r['worker_pss_mb']:>9.1f}MB {r['worker_private_mb']:>7.1f}MB",
+                  flush=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+from harness import compare, environment, measure, peak_rss_mb
+
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Iteration counts per benchmark; --quick divides them by 10 (at least 3)
+ITERATIONS = {
+    'predict_single': 300,
+    'predict_single_cached': 1000,
+    'predict_batch_100': 50,
+    'predict_batch_1000': 10,
+    'explain_none': 50,
+    'explain_topk_exact': 10,
+    'explain_topk_approx': 30,
+    'explain_full_exact': 10,
+    'inference_1': 2000,
+    'inference_16': 1000,
+    'inference_1000': 100,
+    'data_cleaner': 30,
+    'generate_report': 30,
+    'report_cached': 1000,
+    'report_bulk_pdf': 5,
+    'report_bulk_zip': 5,
+    'train': 1,
+}
+
+
+def customers(df, n):
+    rows = df.drop('Churn', axis=1).rename(columns={'customerID': 'customer_id'}).head(n)
+    rows['TotalCharges'] = pd.to_numeric(rows['TotalCharges'], errors='coerce').fillna(0.0)
+    return rows.to_dict('records')
+
+
+def bench_api(df, iterations, results):
+    """/predict and /predict/batch through the in-process ASGI app (no network, no MySQL)"""
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    rows = customers(df, 1000)
+    with TestClient(app_module.app) as client:
+        if not app_module.model_ready.wait(300):
+            raise RuntimeError("Model did not load")
+
+        cursor = iter(range(10 ** 9))
+
+        def predict_single():
+            row = rows[next(cursor) % len(rows)]
+            assert client.post('/predict?use_cache=false', json=row).status_code == 200
+
+        def predict_cached():
+            assert client.post('/predict', json=rows[0]).status_code == 200
+
+        results['predict_single'] = measure(predict_single, iterations['predict_single'])
+        results['predict_single_cached'] = measure(predict_cached, iterations['predict_single_cached'])
+        for size in (100, 1000):
+            payload = {'customers': rows[:size]}
+
+            def predict_batch():
+                assert client.post('/predict/batch?use_cache=false', json=payload).status_code == 200
+
+            name = f'predict_batch_{size}'
+            results[name] = measure(predict_batch, iterations[name], rows_per_call=size)
+
+
+def bench_explain(df, iterations, results):
+    """Model + explanation cost per mode on a 1000-row matrix, outside HTTP"""
+    from model_registry import load_bundle
+    from explanations import ExplainOptions, explain_matrix
+
+    bundle = load_bundle(os.path.join(BASE_DIR, 'models', 'churn_model.pkl'))
+    X = bundle.transform_rows(customers(df, 1000))
+    for name, options in (('explain_none', ExplainOptions('none')),
+                          ('explain_topk_exact', ExplainOptions('topk', 'exact')),
+                          ('explain_topk_approx', ExplainOptions('topk', 'approx')),
+                          ('explain_full_exact', ExplainOptions('full', 'exact'))):
+        def run():
+            bundle.classifier.predict_proba(X)
+            explain_matrix(bundle, X, options)
+
+        results[name] = measure(run, iterations[name], rows_per_call=X.shape[0])
+
+
+def bench_inference(df, iterations, results):
+    """Classifier only: XGBoost vs the compiled flat tree engine at several batch sizes"""
+    from model_registry import load_bundle
+
+    bundle = load_bundle(os.path.join(BASE_DIR, 'models', 'churn_model.pkl'), warm_up=False,
+                         inference_backend='flat')
+    X_all = bundle.transform_rows(customers(df, 1000))
+    for size in (1, 16, 1000):
+        X = X_all[:size]
+        name = f'inference_{size}'
+        results[f'{name}_xgboost'] = measure(lambda: bundle.classifier.predict_proba(X), iterations[name],
+                                             rows_per_call=size)
+        results[f'{name}_flat'] = measure(lambda: bundle.flat_engine.predict_proba(X), iterations[name],
+                                          rows_per_call=size)
+
+
+def bench_cleaner(df, iterations, results):
+    from preprocess import DataCleaner
+
+    cleaner = DataCleaner()
+    X = df.drop('Churn', axis=1)
+    results['data_cleaner'] = measure(lambda: cleaner.transform(X), iterations['data_cleaner'],
+                                      rows_per_call=len(X))
+
+
+def bench_report(df, iterations, results):
+    """Single reports, rendered and cached, and bulk export; for bulk, rows/s is pages/s"""
+    import asyncio
+    from prediction_cache import PredictionCache
+    from report_generator import generate_report, render_report_pages
+    from reports import ReportRenderer
+
+    explanations = [{'feature': 'Contract', 'impact': 0.91}, {'feature': 'tenure', 'impact': 0.44},
+                    {'feature': 'OnlineSecurity', 'impact': 0.21}, {'feature': 'TotalCharges', 'impact': -0.12},
+                    {'feature': 'PaymentMethod', 'impact': 0.08}]
+    reports = [{**row, 'churn_probability': 0.82, 'risk_level': 'High', 'explanations': explanations}
+               for row in customers(df, 100)]
+    data = reports[0]
+    results['generate_report'] = measure(lambda: generate_report(data), iterations['generate_report'])
+
+    loop = asyncio.new_event_loop()
+    workers = int(os.getenv('REPORT_WORKERS', '2'))
+    renderer = ReportRenderer(workers=workers, cache=PredictionCache())
+    renderer.start()
+    try:
+        results['report_cached'] = measure(lambda: loop.run_until_complete(renderer.render(data)),
+                                           iterations['report_cached'])
+
+        async def drain(stream):
+            async for _ in stream:
+                pass
+
+        pages = sum(len(render_report_pages(r)) for r in reports)
+        results['report_bulk_pdf'] = measure(lambda: loop.run_until_complete(drain(renderer.stream_pdf(reports))),
+                                             iterations['report_bulk_pdf'], warmup=1, rows_per_call=pages)
+        names = [f"{i}.pdf" for i in range(len(reports))]
+        results['report_bulk_zip'] = measure(lambda: loop.run_until_complete(drain(renderer.stream_zip(reports, names))),
+                                             iterations['report_bulk_zip'], warmup=1, rows_per_call=pages)
+    finally:
+        renderer.stop()
+        loop.close()
+
+
+def bench_train(df, iterations, results):
+    """Full train() run (fit, evaluation, export, importance) into a scratch directory"""
+    from train import train
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'churn_model.pkl')
+        artifact_dir = os.path.join(tmp, 'churn_model_artifact')
+        results['train'] = measure(lambda: train(DATA_PATH, model_path, artifact_dir),
+                                   iterations['train'], warmup=0, rows_per_call=len(df))
+
+
+SUITES = {
+    'api': bench_api,
+    'explain': bench_explain,
+    'inference': bench_inference,
+    'cleaner': bench_cleaner,
+    'report': bench_report,
+    'train': bench_train,
+}
+
+
+def run(suites=tuple(SUITES), quick=False):
+    df = pd.read_csv(DATA_PATH)
+    iterations = {k: max(3, v // 10) if quick and k != 'train' else v for k, v in ITERATIONS.items()}
+    results = {}
+    for name in suites:
+        print(f"Running {name}...", flush=True)
+        SUITES[name](df, iterations, results)
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'quick': quick,
+        'environment': environment(),
+        'peak_rss_mb': peak_rss_mb(),
+        'benchmarks': results,
+    }
+
+
+def print_table(report):
+    print(f"\n{'benchmark':<24} {'rows/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'RSS MB':>8}")
+    for name, r in report['benchmarks'].items():
+        print(f"{name:<24} {r['rows_per_s']:>12,.0f} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+              f"{r['p99_ms']:>10.3f} {r['peak_rss_mb'] or 0:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline serving and training benchmarks")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES),
+                        help="Run only these suites (repeatable); default runs all")
+    parser.add_argument('--quick', action='store_true', help="A tenth of the iterations, for smoke runs")
+    parser.add_argument('--output', default=None, help="Results JSON (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="Baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed slowdown before failing (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    # Keep the API offline and its timings free of background work
+    os.environ.setdefault('MICROBATCH_ENABLED', 'false')
+    os.environ.setdefault('MODEL_WATCH_ENABLED', 'false')
+    os.environ.setdefault('STATS_ROLLUP_INTERVAL_SECONDS', '0')
+
+    # Synthetic predictions still pay for the explanation store, but in a scratch directory
+    # rather than the data/explanations that /report/{prediction_id} serves
+    with tempfile.TemporaryDirectory(prefix='churn-bench-explanations-') as store_dir:
+        os.environ.setdefault('EXPLANATION_STORE_DIR', store_dir)
+        report = run(args.suite or tuple(SUITES), args.quick)
+    print_table(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.utcnow().strftime('%Y%m%dT%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name} {metric}: {before} -> {after}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,257 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, MetaData, String, Table, func, select, text
+
+from explanations import ExplainOptions, explain_values, rank_explanations
+from stats import risk_level
+
+# pandas is imported inside the functions that need it: app.py imports this module at startup.
+
+# Customer master data and its materialized scores. `customers` matches database/schema.sql;
+# `customer_scores` keeps one row per customer, indexed for top-N reads overall and per segment.
+metadata = MetaData()
+
+customers = Table(
+    "customers", metadata,
+    Column("customer_id", String(50), primary_key=True),
+    Column("gender", String(10)),
+    Column("senior_citizen", Integer),
+    Column("partner", String(5)),
+    Column("dependents", String(5)),
+    Column("tenure", Integer),
+    Column("phone_service", String(5)),
+    Column("multiple_lines", String(20)),
+    Column("internet_service", String(20)),
+    Column("online_security", String(20)),
+    Column("online_backup", String(20)),
+    Column("device_protection", String(20)),
+    Column("tech_support", String(20)),
+    Column("streaming_tv", String(20)),
+    Column("streaming_movies", String(20)),
+    Column("contract", String(20)),
+    Column("paperless_billing", String(5)),
+    Column("payment_method", String(30)),
+    Column("monthly_charges", Float),
+    Column("total_charges", Float),
+    Column("churn", String(5)),
+)
+
+# Telco CSV column -> customers column
+CSV_COLUMNS = {
+    "customerID": "customer_id", "gender": "gender", "SeniorCitizen": "senior_citizen", "Partner": "partner",
+    "Dependents": "dependents", "tenure": "tenure", "PhoneService": "phone_service",
+    "MultipleLines": "multiple_lines", "InternetService": "internet_service", "OnlineSecurity": "online_security",
+    "OnlineBackup": "online_backup", "DeviceProtection": "device_protection", "TechSupport": "tech_support",
+    "StreamingTV": "streaming_tv", "StreamingMovies": "streaming_movies", "Contract": "contract",
+    "PaperlessBilling": "paperless_billing", "PaymentMethod": "payment_method",
+    "MonthlyCharges": "monthly_charges", "TotalCharges": "total_charges", "Churn": "churn",
+}
+CSV_NAMES = {column: name for name, column in CSV_COLUMNS.items()}
+
+# Segments that top-N queries can filter on; copied into customer_scores so each has its own index
+SEGMENTS = ("contract", "internet_service", "payment_method")
+
+customer_scores = Table(
+    "customer_scores", metadata,
+    Column("customer_id", String(50), primary_key=True),
+    Column("churn_probability", Float, nullable=False),
+    Column("risk_level", String(20), nullable=False),
+    Column("top_drivers", JSON),
+    Column("model_version", String(64), nullable=False),
+    Column("scored_at", DateTime, nullable=False),
+    *(Column(segment, String(30)) for segment in SEGMENTS),
+    Index("ix_customer_scores_probability", "churn_probability"),
+    *(Index(f"ix_customer_scores_{segment}_probability", segment, "churn_probability") for segment in SEGMENTS),
+)
+
+# Rows per INSERT statement; a chunk is written as several of these in one transaction
+INSERT_BATCH_ROWS = 500
+
+
+def upsert_statement(dialect: str, table):
+    """INSERT that replaces an existing row with the same primary key, for MySQL or SQLite"""
+    key = [c.name for c in table.primary_key.columns]
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update({c.name: stmt.inserted[c.name] for c in table.columns if c.name not in key})
+    from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(index_elements=key,
+                                      set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name not in key})
+
+
+def upsert(conn, table, rows: list):
+    """Upsert rows INSERT_BATCH_ROWS at a time.
+
+    One statement executed with many parameter sets: it is compiled once and
+    cached, and the driver sends each batch as a multi-row INSERT (a 500-row
+    VALUES clause built per call spends most of its time in SQL compilation).
+    """
+    stmt = upsert_statement(conn.dialect.name, table)
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        conn.execute(stmt, rows[start:start + INSERT_BATCH_ROWS])
+
+
+def ingest_csv(engine, source, chunk_size: int = 5000) -> int:
+    """Load a Telco-format CSV (path or file object) into `customers`, one transaction per chunk"""
+    import pandas as pd
+    from dataset import upload_dtypes
+
+    # Pinned dtypes, so a column parses the same way in every chunk (IDs keep leading zeros,
+    # a blank cell is NULL in its row only); integer columns stay nullable integers
+    dtype = {**upload_dtypes(), "SeniorCitizen": "Int64", "tenure": "Int64"}
+    rows = 0
+    for chunk in pd.read_csv(source, chunksize=chunk_size, dtype=dtype):
+        missing = [c for c in CSV_COLUMNS if c not in chunk.columns and c != "Churn"]
+        if missing:
+            raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+        chunk = chunk[[c for c in CSV_COLUMNS if c in chunk.columns]].rename(columns=CSV_COLUMNS)
+        # Blank TotalCharges for new customers become NULL
+        chunk["total_charges"] = pd.to_numeric(chunk["total_charges"], errors="coerce")
+        chunk["customer_id"] = chunk["customer_id"].astype(str)
+        records = chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+        with engine.begin() as conn:
+            upsert(conn, customers, records)
+        rows += len(records)
+    return rows
+
+
+def _customer_chunks(engine, chunk_size: int):
+    """Customers in primary-key order as Telco-format DataFrames, paged by keyset"""
+    import pandas as pd
+
+    last = None
+    while True:
+        query = select(customers).order_by(customers.c.customer_id).limit(chunk_size)
+        if last is not None:
+            query = query.where(customers.c.customer_id > last)
+        with engine.connect() as conn:
+            frame = pd.DataFrame(conn.execute(query).mappings().all())
+        if frame.empty:
+            return
+        last = frame["customer_id"].iloc[-1]
+        yield frame.rename(columns=CSV_NAMES)
+
+
+def score_table(engine, bundle, chunk_size: int = 5000, top_k: int = 3, explain_method: str = "exact") -> dict:
+    """Score every customer with `bundle` and upsert the results into `customer_scores`"""
+    options = ExplainOptions("topk", explain_method, top_k).validate()
+    started = time.perf_counter()
+    scored_at = datetime.utcnow()
+    rows = 0
+    for frame in _customer_chunks(engine, chunk_size):
+        X = bundle.transform_frame(frame)
+        probs = bundle.predict_proba(X)[:, 1]
+        drivers = rank_explanations(bundle, explain_values(bundle, X, options), options)
+        segments = {segment: frame[CSV_NAMES[segment]].tolist() for segment in SEGMENTS}
+        records = [
+            {
+                "customer_id": cid,
+                "churn_probability": float(prob),
+                "risk_level": risk_level(prob),
+                "top_drivers": [{"feature": d["feature"], "impact": round(d["impact"], 4)} for d in top],
+                "model_version": bundle.version,
+                "scored_at": scored_at,
+                **{segment: values[i] for segment, values in segments.items()},
+            }
+            for i, (cid, prob, top) in enumerate(zip(frame["customerID"], probs, drivers))
+        ]
+        with engine.begin() as conn:
+            upsert(conn, customer_scores, records)
+        rows += len(records)
+    return {"scored": rows, "model_version": bundle.version, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def scores_are_current(engine, model_version: str, max_age_seconds: float) -> bool:
+    """Whether every customer has a score from this model that is younger than max_age_seconds"""
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    with engine.connect() as conn:
+        total = conn.scalar(select(func.count()).select_from(customers))
+        current = conn.scalar(select(func.count()).select_from(customer_scores).where(
+            customer_scores.c.model_version == model_version, customer_scores.c.scored_at >= cutoff))
+    return current >= total
+
+
+def run_exclusive(engine, name: str, fn):
+    """Run fn() unless another process holds the named lock (MySQL GET_LOCK); returns None if skipped"""
+    if engine.dialect.name != "mysql":
+        return fn()
+    with engine.connect() as conn:
+        if not conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": name}):
+            return None
+        try:
+            return fn()
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+def score_row(row) -> dict:
+    """API shape of a customer_scores row"""
+    return {
+        "customer_id": row["customer_id"],
+        "churn_probability": round(float(row["churn_probability"]), 4),
+        "risk_level": row["risk_level"],
+        "top_drivers": row["top_drivers"] or [],
+        "model_version": row["model_version"],
+        "scored_at": row["scored_at"].isoformat() if row["scored_at"] else None,
+        **{segment: row[segment] for segment in SEGMENTS},
+    }
+
+
+def get_customer_risk(conn, customer_id: str):
+    row = conn.execute(select(customer_scores).where(customer_scores.c.customer_id == customer_id)).mappings().first()
+    return score_row(row) if row is not None else None
+
+
+def top_risk(conn, limit: int, segment: str = None, value: str = None) -> list:
+    """Highest churn probabilities first, optionally within one segment value (index range scan + LIMIT)"""
+    # Both keys descending: the ascending indexes (which end in the primary key) are then read
+    # backwards; a mixed direction would sort the whole table or segment instead
+    query = select(customer_scores).order_by(customer_scores.c.churn_probability.desc(),
+                                             customer_scores.c.customer_id.desc()).limit(limit)
+    if segment is not None:
+        query = query.where(customer_scores.c[segment] == value)
+    return [score_row(row) for row in conn.execute(query).mappings()]
+
+
+def segment_values(conn, segment: str) -> list:
+    column = customer_scores.c[segment]
+    return [v for v in conn.execute(select(column).distinct().order_by(column)).scalars() if v is not None]
+
+
+def _engine_from_env():
+    from sqlalchemy import create_engine
+    from dotenv import load_dotenv
+    load_dotenv()
+    url = (f"mysql+mysqlconnector://{os.getenv('DB_USER', 'root')}:{os.getenv('DB_PASSWORD', '')}"
+           f"@{os.getenv('DB_HOST', 'localhost')}/{os.getenv('DB_NAME', 'AIML')}")
+    return create_engine(url, pool_pre_ping=True)
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Load customers and materialize their churn scores")
+    parser.add_argument('command', choices=['ingest', 'score'])
+    parser.add_argument('--input', default=os.path.join(base_dir, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv'),
+                        help="Telco-format CSV to ingest")
+    parser.add_argument('--model', default=os.path.join(base_dir, 'models', 'churn_model.pkl'))
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--top-k', type=int, default=3, help="Drivers stored per customer")
+    parser.add_argument('--db-url', default=None, help="SQLAlchemy URL (defaults to the DB_* environment)")
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    db = create_engine(args.db_url) if args.db_url else _engine_from_env()
+    metadata.create_all(db)
+    started = time.perf_counter()
+    if args.command == 'ingest':
+        n = ingest_csv(db, args.input, args.chunk_size)
+        print(f"Loaded {n} customers from {args.input} in {time.perf_counter() - started:.2f}s")
+    else:
+        from model_registry import load_bundle
+        result = score_table(db, load_bundle(args.model), args.chunk_size, args.top_k)
+        print(f"Scored {result['scored']} customers with model {result['model_version']} in {result['seconds']:.2f}s")
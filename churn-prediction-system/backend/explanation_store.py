@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+CATEGORICAL_FIELDS = (
+    "gender", "Partner", "Dependents", "PhoneService", "MultipleLines", "InternetService",
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV",
+    "StreamingMovies", "Contract", "PaperlessBilling", "PaymentMethod",
+)
+NUMERIC_FIELDS = ("SeniorCitizen", "tenure", "MonthlyCharges", "TotalCharges")
+INTEGER_FIELDS = ("SeniorCitizen", "tenure")
+
+# Code for a categorical value once a field's vocabulary is full
+OTHER = 255
+OTHER_LABEL = "Other"
+
+
+class ExplanationStore:
+    """Append-only store of scored predictions: inputs, probability and full SHAP vector.
+
+    Each prediction is one fixed-size record in `predictions.bin` and its prediction ID
+    is the record index. Categorical values and model versions are stored as codes
+    whose vocabulary is kept in `schema.json`. SHAP values are grouped per input field
+    and stored as float16, NaN when the prediction was made without explanations.
+    Every append is one O_APPEND write, so several server processes can share a store.
+    """
+
+    def __init__(self, directory: str, categorical_fields=CATEGORICAL_FIELDS, numeric_fields=NUMERIC_FIELDS,
+                 integer_fields=INTEGER_FIELDS):
+        self.directory = directory
+        self.categorical_fields = tuple(categorical_fields)
+        self.numeric_fields = tuple(numeric_fields)
+        self.integer_fields = frozenset(integer_fields)
+        self.fields = self.categorical_fields + self.numeric_fields
+        self.field_index = {name: i for i, name in enumerate(self.fields)}
+        self.dtype = np.dtype([
+            ("created", "<f8"),
+            ("model", "<u2"),
+            ("customer_id", "S50"),
+            ("probability", "<f4"),
+            ("categorical", "u1", (len(self.categorical_fields),)),
+            ("numeric", "<f4", (len(self.numeric_fields),)),
+            ("shap", "<f2", (len(self.fields),)),
+        ])
+        self.path = os.path.join(directory, "predictions.bin")
+        self.schema_path = os.path.join(directory, "schema.json")
+        self._lock = threading.Lock()
+        self._fd = None
+        self._fd_pid = None
+        self._map = None
+        self._vocab = {}
+        self._codes = {}
+        self.appended = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with self._schema_lock():
+            schema = self._read_schema()
+            if schema is None:
+                self._write_schema({"fields": list(self.fields), "record_size": self.dtype.itemsize, "vocab": {}})
+            elif schema["fields"] != list(self.fields) or schema["record_size"] != self.dtype.itemsize:
+                raise ValueError(f"Explanation store at {directory} was created with a different record layout")
+            else:
+                self._set_vocab(schema["vocab"])
+            # A crash mid-append can leave a partial record; drop it so IDs stay aligned
+            if os.path.exists(self.path):
+                size = os.path.getsize(self.path)
+                if size % self.dtype.itemsize:
+                    os.truncate(self.path, size - size % self.dtype.itemsize)
+
+    # --- vocabulary ---
+
+    @contextmanager
+    def _schema_lock(self):
+        """Exclusive across processes while the vocabulary is read-modify-written"""
+        with open(self.schema_path + ".lock", "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _read_schema(self):
+        if not os.path.exists(self.schema_path):
+            return None
+        with open(self.schema_path) as f:
+            return json.load(f)
+
+    def _write_schema(self, schema):
+        tmp = f"{self.schema_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(schema, f)
+        os.replace(tmp, self.schema_path)
+
+    def _set_vocab(self, vocab):
+        self._vocab = {name: list(values) for name, values in vocab.items()}
+        self._codes = {name: {v: i for i, v in enumerate(values)} for name, values in self._vocab.items()}
+
+    def _code(self, name: str, value: str, limit: int = OTHER) -> int:
+        code = self._codes.get(name, {}).get(value)
+        if code is not None:
+            return code
+        # New value: another process may have added it (or others) meanwhile, so merge under the file lock
+        with self._lock, self._schema_lock():
+            schema = self._read_schema()
+            self._set_vocab(schema["vocab"])
+            values = self._vocab.setdefault(name, [])
+            if value not in self._codes.setdefault(name, {}):
+                if len(values) >= limit:
+                    return OTHER
+                values.append(value)
+                self._codes[name][value] = len(values) - 1
+                schema["vocab"] = self._vocab
+                self._write_schema(schema)
+            return self._codes[name][value]
+
+    def _label(self, name: str, code: int):
+        values = self._vocab.get(name, [])
+        if code >= len(values) and code != OTHER:
+            # Written by another process after we last read the schema
+            self._set_vocab(self._read_schema()["vocab"])
+            values = self._vocab.get(name, [])
+        return values[code] if code < len(values) else OTHER_LABEL
+
+    # --- writing ---
+
+    def _descriptor(self) -> int:
+        # Per process: a descriptor inherited across fork shares its file offset with the parent
+        if self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def append(self, model_version: str, rows: list, probabilities, shap=None, shap_fields=None) -> list:
+        """Store scored rows; returns their prediction IDs.
+
+        `shap` is (n_rows, len(shap_fields)) contributions per input field, or None;
+        rows without explanations may also be passed as NaN rows.
+        """
+        records = np.zeros(len(rows), self.dtype)
+        records["created"] = time.time()
+        records["model"] = self._code("model_version", model_version, limit=np.iinfo(np.uint16).max)
+        records["customer_id"] = [str(row.get("customer_id") or "Unknown").encode("utf-8")[:50] for row in rows]
+        records["probability"] = probabilities
+        records["categorical"] = [[self._code(name, str(row.get(name))) for name in self.categorical_fields]
+                                  for row in rows]
+        records["numeric"] = [[np.nan if row.get(name) is None else float(row[name]) for name in self.numeric_fields]
+                              for row in rows]
+        records["shap"] = np.nan
+        if shap is not None:
+            columns = [(i, self.field_index[name]) for i, name in enumerate(shap_fields) if name in self.field_index]
+            source, target = zip(*columns)
+            records["shap"][:, list(target)] = np.asarray(shap, dtype=np.float32)[:, list(source)]
+
+        data = records.tobytes()
+        with self._lock:
+            fd = self._descriptor()
+            written = os.write(fd, data)
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+            self.appended += len(rows)
+        if written != len(data):
+            raise OSError(f"Short write to {self.path} ({written} of {len(data)} bytes)")
+        first = end // self.dtype.itemsize - len(rows)
+        return list(range(first, first + len(rows)))
+
+    # --- reading ---
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // self.dtype.itemsize if os.path.exists(self.path) else 0
+
+    def records(self, ids) -> np.ndarray:
+        """Raw records for prediction IDs; KeyError for IDs that were never written"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return np.zeros(0, self.dtype)
+        needed = int(ids.max()) + 1
+        if self._map is None or len(self._map) < needed:
+            # Remap only when the file has grown past what we mapped last time
+            count = len(self)
+            if count:
+                self._map = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+        if ids.min() < 0 or self._map is None or needed > len(self._map):
+            bad = ids[(ids < 0) | (ids >= (0 if self._map is None else len(self._map)))]
+            raise KeyError(int(bad[0]))
+        return np.asarray(self._map[ids])
+
+    def load(self, ids) -> list:
+        """Decoded predictions: inputs, probability, model version and SHAP per field (NaN = not explained)"""
+        out = []
+        for prediction_id, record in zip(ids, self.records(ids)):
+            features = {name: self._label(name, int(code))
+                        for name, code in zip(self.categorical_fields, record["categorical"])}
+            for name, value in zip(self.numeric_fields, record["numeric"].tolist()):
+                features[name] = None if np.isnan(value) else (int(value) if name in self.integer_fields else value)
+            out.append({
+                "prediction_id": int(prediction_id),
+                "customer_id": record["customer_id"].decode("utf-8", "replace"),
+                "model_version": self._label("model_version", int(record["model"])),
+                "predicted_at": datetime.utcfromtimestamp(float(record["created"])).isoformat(timespec="seconds"),
+                "churn_probability": float(record["probability"]),
+                "features": {name: features[name] for name in self.fields},
+                "shap": record["shap"].astype(np.float32),
+            })
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "predictions": len(self),
+            "record_bytes": self.dtype.itemsize,
+            "appended": self.appended,
+        }
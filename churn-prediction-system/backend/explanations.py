@@ -0,0 +1,111 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from metrics import metrics
+
+# How much explanation a caller wants
+EXPLAIN_NONE = "none"
+EXPLAIN_TOPK = "topk"
+EXPLAIN_FULL = "full"
+EXPLAIN_MODES = (EXPLAIN_NONE, EXPLAIN_TOPK, EXPLAIN_FULL)
+
+# How contributions are computed: exact TreeSHAP or the Saabas-style tree-path approximation
+METHOD_EXACT = "exact"
+METHOD_APPROX = "approx"
+EXPLAIN_METHODS = (METHOD_EXACT, METHOD_APPROX)
+
+
+class ExplainOptions(NamedTuple):
+    mode: str = EXPLAIN_TOPK
+    method: str = METHOD_EXACT
+    top_k: int = 5
+
+    def validate(self):
+        if self.mode not in EXPLAIN_MODES:
+            raise ValueError(f"explain must be one of {', '.join(EXPLAIN_MODES)}")
+        if self.method not in EXPLAIN_METHODS:
+            raise ValueError(f"explain_method must be one of {', '.join(EXPLAIN_METHODS)}")
+        if self.top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        return self
+
+    def cache_tag(self) -> str:
+        """Distinguishes cached results computed with different explanation settings"""
+        if self.mode == EXPLAIN_NONE:
+            return EXPLAIN_NONE
+        if self.mode == EXPLAIN_FULL:
+            return f"{EXPLAIN_FULL}:{self.method}"
+        return f"{EXPLAIN_TOPK}:{self.method}:{self.top_k}"
+
+
+DEFAULT_EXPLAIN = ExplainOptions()
+
+
+def contributions(bundle, X, method: str = METHOD_EXACT) -> np.ndarray:
+    """Per-feature contributions in log-odds, shape (n_rows, n_features)"""
+    if method == METHOD_APPROX:
+        # Saabas: attribute each split's change in expected value to the split feature
+        # along the decision path. One pass per tree, no TreeSHAP subset enumeration.
+        from xgboost import DMatrix
+
+        booster = bundle.classifier.get_booster()
+        contribs = booster.predict(DMatrix(X), pred_contribs=True, approx_contribs=True)
+        return contribs[:, :-1]  # last column is the bias term
+    return np.asarray(bundle.explainer.shap_values(X))
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest |values| per row, largest first.
+
+    Uses argpartition (O(n)) to select the k candidates and only sorts those.
+    """
+    n_features = values.shape[1]
+    k = max(0, min(k, n_features))
+    if k == 0:
+        return np.empty((values.shape[0], 0), dtype=np.intp)
+    magnitude = -np.abs(values)
+    if k < n_features:
+        idx = np.argpartition(magnitude, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(n_features), values.shape).copy()
+    order = np.argsort(np.take_along_axis(magnitude, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def group_by_source(bundle, values: np.ndarray) -> np.ndarray:
+    """Sum encoded-column contributions per raw input field, shape (n_rows, n_source_features).
+
+    SHAP values are additive, so a field's contribution is the sum over its one-hot
+    columns; a single matmul with the bundle's 0/1 grouping matrix does it for all rows.
+    """
+    return values @ bundle.group_matrix
+
+
+def explain_values(bundle, X, options: ExplainOptions = DEFAULT_EXPLAIN):
+    """Contributions per raw input field, shape (n_rows, n_source_features); None when mode is "none" """
+    if options.mode == EXPLAIN_NONE:
+        return None
+    with metrics.stage("shap"):
+        return group_by_source(bundle, contributions(bundle, X, options.method))
+
+
+def rank_explanations(bundle, values, options: ExplainOptions = DEFAULT_EXPLAIN) -> list:
+    """Per-row lists of {"feature", "impact"} dicts ordered by absolute impact, from explain_values()"""
+    with metrics.stage("rank"):
+        k = values.shape[1] if options.mode == EXPLAIN_FULL else options.top_k
+        idx = top_k_indices(values, k)
+        features = bundle.source_names[idx].tolist()
+        impacts = np.take_along_axis(values, idx, axis=1).tolist()
+        return [
+            [{"feature": f, "impact": v} for f, v in zip(row_features, row_impacts)]
+            for row_features, row_impacts in zip(features, impacts)
+        ]
+
+
+def explain_matrix(bundle, X, options: ExplainOptions = DEFAULT_EXPLAIN) -> list:
+    """Per-row lists of {"feature", "impact"} dicts over raw input fields, ordered by absolute impact"""
+    values = explain_values(bundle, X, options)
+    if values is None:
+        return [[] for _ in range(X.shape[0])]
+    return rank_explanations(bundle, values, options)
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+
+
+class PredictionLogWriter:
+    """Single background writer that flushes prediction log rows in bulk.
+
+    Request threads only `enqueue` rows into a bounded in-memory queue; one
+    daemon thread drains it and hands batches to `flush_fn` whenever
+    `batch_size` rows are waiting or `flush_interval_ms` has passed. When the
+    queue is full new rows are dropped (and counted) instead of blocking.
+
+    A batch that fails with one of `split_errors` (e.g. a constraint violation) is
+    retried one row at a time, so only the offending rows are lost. Other errors
+    (e.g. the database being down) fail the whole batch at once.
+    """
+
+    def __init__(self, flush_fn, max_queue: int = 10000, batch_size: int = 500, flush_interval_ms: float = 1000,
+                 split_errors=(Exception,)):
+        self.flush_fn = flush_fn
+        self.split_errors = split_errors
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop accepting rows and drain whatever is still queued"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, rows: list) -> int:
+        """Queue rows for writing; returns how many were accepted"""
+        accepted = 0
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+                accepted += 1
+            except queue.Full:
+                break
+        with self._lock:
+            self.enqueued += accepted
+            self.dropped += len(rows) - accepted
+        return accepted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "flushes": self.flushes,
+            }
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            self.flush_fn(batch)
+        except self.split_errors as e:
+            if len(batch) > 1:
+                # One pass row by row: at most len(batch) more statements however many rows are bad
+                for row in batch:
+                    self._flush([row])
+                return
+            print(f"Dropped a prediction log row: {e}")
+            with self._lock:
+                self.failed += 1
+            return
+        except Exception as e:
+            print(f"Failed to flush {len(batch)} prediction logs: {e}")
+            with self._lock:
+                self.failed += len(batch)
+            return
+        with self._lock:
+            self.written += len(batch)
+            self.flushes += 1
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+        self._drain()
@@ -0,0 +1,283 @@
+import bisect
+import contextvars
+import threading
+import time
+
+# Latency buckets: 100us .. ~70s, each 25% wider than the last
+LATENCY_BUCKETS = tuple(1e-4 * 1.25 ** i for i in range(61))
+# Row-count buckets for batch sizes: 1, 2, 4 .. 16384
+SIZE_BUCKETS = tuple(float(2 ** i) for i in range(15))
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Stages recorded during the current request, for the Server-Timing header
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+_trace_started = contextvars.ContextVar("metrics_trace_started", default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within the matching bucket"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+class Metrics:
+    """In-process latency histograms, counters and gauges rendered in Prometheus text format.
+
+    `stage(name)` times a block of the hot path; the duration goes to a per-stage
+    histogram and, when Server-Timing is on, to the current request's trace.
+    With both switched off `stage` hands back a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = True, server_timing: bool = False):
+        self.enabled = enabled
+        self.server_timing = server_timing
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric name, labels tuple) -> Histogram
+        self._counters = {}    # (metric name, labels tuple) -> number
+        self._gauges = {}      # metric name -> (help, type, callback)
+        self._help = {}
+
+    def configure(self, enabled: bool, server_timing: bool):
+        self.enabled = enabled
+        self.server_timing = server_timing
+
+    @property
+    def active(self) -> bool:
+        return self.enabled or self.server_timing
+
+    def stage(self, name: str):
+        return _Stage(self, name) if self.enabled or self.server_timing else _NOOP_STAGE
+
+    def observe_stage(self, name: str, seconds: float):
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((name, seconds))
+        if self.enabled:
+            self._observe("churn_stage_seconds", (("stage", name),), seconds, LATENCY_BUCKETS,
+                          "Time spent in each stage of request handling")
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        if not self.enabled:
+            return
+        self._observe("churn_request_seconds", (("route", route),), seconds, LATENCY_BUCKETS,
+                      "End-to-end request latency per route")
+        self.count("churn_requests_total", (("route", route), ("method", method), ("status", str(status))),
+                   help="Requests served per route and status code")
+
+    def observe_size(self, name: str, value: float, help: str = ""):
+        if self.enabled:
+            self._observe(name, (), value, SIZE_BUCKETS, help)
+
+    def count(self, name: str, labels: tuple = (), n: float = 1, help: str = ""):
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+            self._help.setdefault(name, help)
+
+    def register_gauge(self, name: str, help: str, callback, kind: str = "gauge"):
+        """Value read at scrape time: callback() -> number, or {labels tuple: number}; None skips it.
+
+        Use kind="counter" for monotonically increasing values kept elsewhere (e.g. cache hits).
+        """
+        self._gauges[name] = (help, kind, callback)
+
+    def _observe(self, name, labels, value, bounds, help):
+        key = (name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(bounds)
+                self._help.setdefault(name, help)
+            hist.observe(value)
+
+    def histogram(self, name: str, labels: tuple = ()):
+        return self._histograms.get((name, labels))
+
+    # --- Request tracing ---
+    def start_trace(self):
+        return _trace.set([]), _trace_started.set(time.perf_counter())
+
+    def finish_trace(self, tokens) -> list:
+        trace = _trace.get()
+        _trace.reset(tokens[0])
+        _trace_started.reset(tokens[1])
+        return trace or []
+
+    def observe_admission(self):
+        """Record the wait before admission control let the request through; later stages start from here"""
+        started = _trace_started.get()
+        if started is None:
+            return
+        now = time.perf_counter()
+        self.observe_stage("admission", now - started)
+        _trace_started.set(now)
+
+    def observe_since_request_start(self, name: str):
+        """Record the time from the request being admitted (or reaching the app) until now, e.g. body parsing"""
+        started = _trace_started.get()
+        if started is not None:
+            self.observe_stage(name, time.perf_counter() - started)
+
+    @staticmethod
+    def server_timing_header(trace: list, total: float) -> str:
+        """Server-Timing value with stages of the same name summed, durations in ms"""
+        totals = {}
+        for name, seconds in trace:
+            totals[name] = totals.get(name, 0.0) + seconds
+        entries = [f"{name};dur={seconds * 1e3:.3f}" for name, seconds in totals.items()]
+        entries.append(f"total;dur={total * 1e3:.3f}")
+        return ", ".join(entries)
+
+    # --- Exposition ---
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count, h.bounds,
+                              [h.quantile(q) for q in QUANTILES])
+                          for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        seen = set()
+        for (name, labels), (counts, total, count, bounds, quantiles) in sorted(histograms.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:.6g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.9g}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        # Precomputed percentiles, for dashboards that don't run histogram_quantile
+        seen = set()
+        for (name, labels), (_, _, _, _, quantiles) in sorted(histograms.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name}_quantile p50/p95/p99 estimated from the {name} buckets")
+                lines.append(f"# TYPE {name}_quantile gauge")
+            for q, value in zip(QUANTILES, quantiles):
+                lines.append(f"{name}_quantile{_labels(labels + (('quantile', str(q)),))} {value:.9g}")
+
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for name, (help, kind, callback) in sorted(self._gauges.items()):
+            try:
+                value = callback()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            values = value if isinstance(value, dict) else {(): value}
+            for labels, v in values.items():
+                lines.append(f"{name}{_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency per route plus an optional Server-Timing header"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.metrics.active:
+            await self.app(scope, receive, send)
+            return
+
+        tokens = self.metrics.start_trace()
+        started = _trace_started.get()
+        trace = _trace.get()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.metrics.server_timing:
+                    header = self.metrics.server_timing_header(trace, time.perf_counter() - started)
+                    message = {**message, "headers": list(message.get("headers", []))
+                               + [(b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.finish_trace(tokens)
+            route = scope.get("route")
+            self.metrics.observe_request(getattr(route, "path", "unmatched"), scope["method"],
+                                         status["code"], time.perf_counter() - started)
+
+
+# Process-wide instance; the API configures it from the environment at import time
+metrics = Metrics()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Column types of a Telco-format CSV. Categoricals are stored as dictionary codes, so a
+# 7-character "Two year" costs one byte per row instead of a Python string object.
+CATEGORICAL_COLUMNS = [
+    'gender', 'Partner', 'Dependents', 'PhoneService', 'MultipleLines', 'InternetService',
+    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV',
+    'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod', 'Churn',
+]
+NUMERIC_DTYPES = {
+    'SeniorCitizen': 'int8',
+    # Months; int16 leaves room for customers older than the 72 months in the sample
+    'tenure': 'int16',
+    # float64, not float32: the scaler would then run the numeric block in float32, and values
+    # that sit exactly on a tree split point (most of them, with hist cuts) can land on the other side
+    'MonthlyCharges': 'float64',
+    'TotalCharges': 'float64',
+}
+ID_COLUMN = 'customerID'
+
+# Bump when the parsing below changes so existing caches are rebuilt
+SCHEMA_VERSION = '2'
+CACHE_DIR_NAME = '.cache'
+CACHE_CHUNK_ROWS = 100000
+
+
+def read_csv(source, columns=None, chunksize=None) -> pd.DataFrame:
+    """Parse a Telco-format CSV with explicit dtypes (TotalCharges cleaned as in DataCleaner)"""
+    dtype = {c: 'category' for c in CATEGORICAL_COLUMNS}
+    dtype.update({c: t for c, t in NUMERIC_DTYPES.items() if c != 'TotalCharges'})
+    dtype[ID_COLUMN] = str
+    # Blank TotalCharges (new customers) must not make the column fail to parse
+    dtype['TotalCharges'] = str
+    if columns is not None:
+        dtype = {c: t for c, t in dtype.items() if c in columns}
+    reader = pd.read_csv(source, dtype=dtype, usecols=columns, chunksize=chunksize)
+    if chunksize is None:
+        return _clean(reader)
+    return (_clean(chunk) for chunk in reader)
+
+
+def upload_dtypes() -> dict:
+    """Dtypes for scoring untrusted CSVs in chunks: no column's type may depend on which rows a chunk holds.
+
+    Text fields (and SeniorCitizen, which the model treats as a category) stay strings, so a
+    blank cell is NaN in that row only instead of turning 0/1 into 0.0/1.0 for the whole chunk.
+    TotalCharges is read as text and cleaned by the preprocessing pipeline.
+    """
+    dtype = {c: str for c in CATEGORICAL_COLUMNS + [ID_COLUMN, 'SeniorCitizen', 'TotalCharges']}
+    dtype.update({'tenure': 'float64', 'MonthlyCharges': 'float64'})
+    return dtype
+
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    if 'TotalCharges' in df.columns:
+        df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce').fillna(0).astype(NUMERIC_DTYPES['TotalCharges'])
+    return df
+
+
+def cache_path(source: str, cache_dir: str = None) -> str:
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(source)), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, os.path.basename(source) + '.arrow')
+
+
+def _signature(source: str) -> str:
+    st = os.stat(source)
+    return f"{SCHEMA_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _cached_signature(path: str):
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(path) as f:
+            metadata = pa.ipc.open_file(f).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return metadata.get(b'source_signature', b'').decode()
+
+
+def build_cache(source: str, cache_dir: str = None) -> str:
+    """Parse the CSV once and write it as an uncompressed Arrow IPC (Feather v2) file.
+
+    The CSV is read and written CACHE_CHUNK_ROWS rows at a time, so memory does not grow
+    with the input. Categories first seen in a later chunk go out as dictionary deltas.
+    """
+    import pyarrow as pa
+
+    path = cache_path(source, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    signature = _signature(source)
+    # Written aside and renamed, so concurrent readers never see a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    writer = schema = None
+    categories = {c: [] for c in CATEGORICAL_COLUMNS}
+    try:
+        for chunk in read_csv(source, chunksize=CACHE_CHUNK_ROWS):
+            for column, known in categories.items():
+                if column in chunk.columns:
+                    # Keep earlier codes stable and append new values, so each dictionary extends the last
+                    known.extend(sorted(set(chunk[column].cat.categories) - set(known)))
+                    chunk[column] = chunk[column].cat.set_categories(known)
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # int32 codes: a later chunk may bring more categories than int8 holds
+                schema = pa.schema([pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type))
+                                    if pa.types.is_dictionary(f.type) else f for f in schema],
+                                   metadata={**(schema.metadata or {}), b'source_signature': signature.encode()})
+                # Uncompressed so reads can memory-map the file instead of decompressing all of it
+                writer = pa.ipc.new_file(tmp, schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        writer.close()
+        os.replace(tmp, path)
+    except OSError:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def cached_table(source: str, cache_dir: str = None, columns=None):
+    """Arrow table of the dataset, memory-mapped from the cache (rebuilt when the CSV changed)"""
+    import pyarrow.feather as feather
+
+    path = cache_path(source, cache_dir)
+    if _cached_signature(path) != _signature(source):
+        build_cache(source, cache_dir)
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def load_dataset(source: str, columns=None, cache_dir: str = None, use_cache: bool = True) -> pd.DataFrame:
+    """The whole dataset as a typed DataFrame, from the columnar cache when possible.
+
+    Without pyarrow, with use_cache=False or when the cache cannot be written (read-only
+    filesystem, full disk, ...), the CSV is parsed with the same dtypes.
+    """
+    if use_cache:
+        try:
+            return cached_table(source, cache_dir, columns).to_pandas()
+        except (ImportError, OSError):
+            pass
+    return read_csv(source, columns=columns)
+
+
+def iter_dataset(source: str, chunk_size: int, columns=None, cache_dir: str = None, use_cache: bool = True):
+    """Typed DataFrame chunks of the dataset; only one chunk is materialized at a time"""
+    if use_cache:
+        try:
+            table = cached_table(source, cache_dir, columns)
+        except (ImportError, OSError):
+            table = None
+        if table is not None:
+            for start in range(0, table.num_rows, chunk_size):
+                yield table.slice(start, chunk_size).to_pandas()
+            return
+    yield from read_csv(source, columns=columns, chunksize=chunk_size)
+
+
+if __name__ == "__main__":
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Build the columnar cache of a Telco-format CSV and compare load times")
+    parser.add_argument('--input', default=os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv'))
+    parser.add_argument('--cache-dir', default=None)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    path = build_cache(args.input, args.cache_dir)
+    print(f"Built {path} ({os.path.getsize(path) / 1e6:.1f} MB) in {time.perf_counter() - t:.2f}s")
+
+    t = time.perf_counter()
+    raw = pd.read_csv(args.input)
+    raw_s = time.perf_counter() - t
+    t = time.perf_counter()
+    typed = load_dataset(args.input, cache_dir=args.cache_dir)
+    cached_s = time.perf_counter() - t
+    print(f"pd.read_csv:   {raw_s * 1e3:8.1f}ms  {raw.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+    print(f"load_dataset:  {cached_s * 1e3:8.1f}ms  {typed.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+    assert len(raw) == len(typed) and np.array_equal(raw['customerID'].astype(str), typed['customerID'])
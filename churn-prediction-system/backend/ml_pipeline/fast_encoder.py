@@ -0,0 +1,160 @@
+import math
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+
+def _to_float(value):
+    """float() that maps unparseable values to NaN, like pd.to_numeric(errors='coerce')"""
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def source_feature_map(ct):
+    """Map every ColumnTransformer output column to the raw input field it was derived from.
+
+    Returns (source_names, source_index) where source_index[j] is the position in
+    source_names of output column j; one-hot columns share their field's index.
+    """
+    source_names, source_index = [], []
+    for name, transformer, columns in ct.transformers_:
+        if isinstance(transformer, str):  # 'drop' / 'passthrough' remainder
+            continue
+        steps = transformer.steps if isinstance(transformer, Pipeline) else [(name, transformer)]
+        encoder = next((s for _, s in steps if isinstance(s, OneHotEncoder)), None)
+        for j, column in enumerate(columns):
+            width = len(encoder.categories_[j]) if encoder is not None else 1
+            source_index.extend([len(source_names)] * width)
+            source_names.append(column)
+    if len(source_index) != len(ct.get_feature_names_out()):
+        raise ValueError("Could not map ColumnTransformer output columns back to input fields")
+    return source_names, np.asarray(source_index, dtype=np.intp)
+
+
+class FastEncoder:
+    """Pandas-free equivalent of the fitted DataCleaner + ColumnTransformer.
+
+    All parameters (imputer fill values, scaler statistics, one-hot categories)
+    are read once from the fitted preprocessor, so encoding a row is a handful
+    of dict lookups and float operations written straight into a float32 vector.
+    """
+
+    # DataCleaner fills unparseable TotalCharges with 0 before the imputer sees it
+    ZERO_FILL_FEATURES = ('TotalCharges',)
+
+    def __init__(self, num_features, num_fill, num_mean, num_scale,
+                 cat_features, cat_categories, cat_fill, feature_names=None):
+        self.num_features = list(num_features)
+        self.num_fill = np.asarray(num_fill, dtype=np.float64)
+        self.num_mean = np.asarray(num_mean, dtype=np.float64)
+        self.num_scale = np.asarray(num_scale, dtype=np.float64)
+        self.cat_features = list(cat_features)
+        self.cat_categories = [[str(c) for c in cats] for cats in cat_categories]
+        self.cat_fill = [str(v) for v in cat_fill]
+
+        # Column offset of every (feature, category) pair in the output vector
+        self.n_num = len(self.num_features)
+        self.cat_index = []
+        offset = self.n_num
+        for cats in self.cat_categories:
+            self.cat_index.append({c: offset + i for i, c in enumerate(cats)})
+            offset += len(cats)
+        self.n_features = offset
+
+        self.feature_names = np.asarray(
+            feature_names if feature_names is not None else self._layout_names(), dtype=object
+        )
+
+    def _layout_names(self):
+        return self.num_features + [
+            f"{name}_{c}" for name, cats in zip(self.cat_features, self.cat_categories) for c in cats
+        ]
+
+    def source_features(self):
+        """(source_names, source_index) for the encoder's layout, see source_feature_map"""
+        source_names = self.num_features + self.cat_features
+        source_index = list(range(self.n_num))
+        for j, cats in enumerate(self.cat_categories):
+            source_index.extend([self.n_num + j] * len(cats))
+        return source_names, np.asarray(source_index, dtype=np.intp)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """Build from the fitted Pipeline([('cleaner', DataCleaner), ('preprocessor', ColumnTransformer)])"""
+        ct = preprocessor.steps[-1][1] if isinstance(preprocessor, Pipeline) else preprocessor
+
+        num_features, num_fill, num_mean, num_scale = [], [], [], []
+        cat_features, cat_categories, cat_fill = [], [], []
+        for name, transformer, columns in ct.transformers_:
+            if isinstance(transformer, str):  # 'drop' / 'passthrough' remainder
+                continue
+            steps = dict(transformer.steps) if isinstance(transformer, Pipeline) else {name: transformer}
+            imputer = next((s for s in steps.values() if isinstance(s, SimpleImputer)), None)
+            scaler = next((s for s in steps.values() if isinstance(s, StandardScaler)), None)
+            encoder = next((s for s in steps.values() if isinstance(s, OneHotEncoder)), None)
+
+            if encoder is not None:
+                if encoder.drop is not None:
+                    raise ValueError("FastEncoder does not support OneHotEncoder(drop=...)")
+                cat_features.extend(columns)
+                cat_categories.extend(list(c) for c in encoder.categories_)
+                fill = imputer.statistics_ if imputer is not None else [None] * len(columns)
+                cat_fill.extend(fill)
+            elif scaler is not None:
+                num_features.extend(columns)
+                fill = imputer.statistics_ if imputer is not None else [math.nan] * len(columns)
+                num_fill.extend(fill)
+                num_mean.extend(scaler.mean_ if scaler.with_mean else np.zeros(len(columns)))
+                num_scale.extend(scaler.scale_ if scaler.with_std else np.ones(len(columns)))
+            else:
+                raise ValueError(f"Unsupported transformer '{name}' for FastEncoder")
+
+        encoder = cls(num_features, num_fill, num_mean, num_scale,
+                      cat_features, cat_categories, cat_fill,
+                      feature_names=ct.get_feature_names_out())
+        # The encoder always writes the numerical block first; refuse any other layout
+        if list(encoder.feature_names) != encoder._layout_names():
+            raise ValueError("FastEncoder layout does not match the ColumnTransformer output")
+        return encoder
+
+    def encode(self, row: dict, out=None) -> np.ndarray:
+        """Encode one customer dict into a (1, n_features) float32 matrix"""
+        if out is None:
+            out = np.zeros((1, self.n_features), dtype=np.float32)
+        else:
+            out.fill(0)
+        self._encode_into(row, out[0])
+        return out
+
+    def encode_many(self, rows, out=None) -> np.ndarray:
+        """Encode a list of customer dicts into an (n, n_features) float32 matrix"""
+        if out is None:
+            out = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        else:
+            out.fill(0)
+        for i, row in enumerate(rows):
+            self._encode_into(row, out[i])
+        return out
+
+    def _encode_into(self, row, vec):
+        for j, name in enumerate(self.num_features):
+            x = _to_float(row.get(name))
+            if math.isnan(x):
+                x = 0.0 if name in self.ZERO_FILL_FEATURES else self.num_fill[j]
+            vec[j] = (x - self.num_mean[j]) / self.num_scale[j]
+
+        for j, name in enumerate(self.cat_features):
+            value = row.get(name)
+            value = self.cat_fill[j] if _is_missing(value) else str(value)
+            col = self.cat_index[j].get(value)
+            if col is not None:
+                vec[col] = 1.0
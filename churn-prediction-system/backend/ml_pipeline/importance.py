@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from artifact import _sha256, is_artifact, read_manifest
+from fast_encoder import source_feature_map
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+ARTIFACT_DIR = os.path.join(BASE_DIR, 'models', 'churn_model_artifact')
+
+IMPORTANCE_NAME = 'feature_importance.json'
+COHORT_COLUMN = 'Contract'
+BATCH_SIZE = 2048
+
+# Share of total mean |SHAP| at or above which a feature gets each label
+LEVELS = [(0.15, 'Extreme'), (0.07, 'High'), (0.03, 'Medium'), (0.01, 'Low'), (0.0, 'Trivial')]
+
+
+def importance_path(model_path):
+    """Sidecar file holding the importance of the model at `model_path`"""
+    if is_artifact(model_path):
+        root = model_path if os.path.isdir(model_path) else os.path.dirname(model_path)
+        return os.path.join(root, IMPORTANCE_NAME)
+    return os.path.splitext(model_path)[0] + '.importance.json'
+
+
+def model_version(model_path):
+    """Same version string the model registry assigns to `model_path`"""
+    if is_artifact(model_path):
+        return read_manifest(model_path)['model_version']
+    return _sha256(model_path)[:12]
+
+
+def level(share):
+    return next(label for threshold, label in LEVELS if share >= threshold)
+
+
+def _feature_types(ct):
+    types = {}
+    for name, transformer, columns in ct.transformers_:
+        if isinstance(transformer, str):
+            continue
+        steps = transformer.steps if isinstance(transformer, Pipeline) else [(name, transformer)]
+        categorical = any(isinstance(s, OneHotEncoder) for _, s in steps)
+        for column in columns:
+            types[column] = 'categorical' if categorical else 'numerical'
+    return types
+
+
+def _ranked(names, types, mean_abs, gain_share):
+    total = mean_abs.sum()
+    shares = mean_abs / total if total > 0 else np.zeros_like(mean_abs)
+    order = np.argsort(-mean_abs, kind='stable')
+    return [
+        {
+            'name': names[i],
+            'type': types[names[i]],
+            'rank': rank + 1,
+            'mean_abs_shap': round(float(mean_abs[i]), 6),
+            'shap_share': round(float(shares[i]), 6),
+            'gain_share': round(float(gain_share[i]), 6),
+            'importance': level(shares[i]),
+        }
+        for rank, i in enumerate(order)
+    ]
+
+
+def compute_importance(model, X, cohort_column=COHORT_COLUMN, batch_size=BATCH_SIZE):
+    """Global and per-cohort feature importance of a fitted Pipeline over raw rows `X`.
+
+    Mean |SHAP| is computed per raw input field (one-hot columns summed first) in
+    batches, so memory stays bounded by `batch_size` rows. XGBoost total gain is
+    summed per field and reported as a share of the model's total gain.
+    """
+    import shap
+
+    preprocessor = model.named_steps['preprocessor']
+    classifier = model.named_steps['classifier']
+    ct = preprocessor.steps[-1][1]
+    names, source_index = source_feature_map(ct)
+    types = _feature_types(ct)
+    group = np.zeros((len(source_index), len(names)))
+    group[np.arange(len(source_index)), source_index] = 1.0
+
+    cohorts = X[cohort_column].astype(str).to_numpy() if cohort_column in X.columns else None
+    cohort_names, cohort_codes = (np.unique(cohorts, return_inverse=True) if cohorts is not None
+                                  else (np.array([]), None))
+    cohort_sums = np.zeros((len(cohort_names), len(names)))
+
+    explainer = shap.TreeExplainer(classifier)
+    total = np.zeros(len(names))
+    for start in range(0, len(X), batch_size):
+        batch = preprocessor.transform(X.iloc[start:start + batch_size])
+        values = np.abs(np.asarray(explainer.shap_values(batch)) @ group)
+        total += values.sum(axis=0)
+        if cohort_codes is not None:
+            np.add.at(cohort_sums, cohort_codes[start:start + batch_size], values)
+
+    gain = np.zeros(len(names))
+    for key, value in classifier.get_booster().get_score(importance_type='total_gain').items():
+        gain[source_index[int(key[1:])]] += value  # keys are 'f<column index>'
+    gain_share = gain / gain.sum() if gain.sum() > 0 else gain
+
+    cohort_counts = np.bincount(cohort_codes, minlength=len(cohort_names)) if cohort_codes is not None else []
+    return {
+        'computed_at': datetime.utcnow().isoformat(),
+        'n_rows': int(len(X)),
+        'features': _ranked(names, types, total / max(len(X), 1), gain_share),
+        'cohort_column': cohort_column if cohorts is not None else None,
+        'cohorts': {
+            str(cohort): {
+                'n_rows': int(count),
+                'features': _ranked(names, types, cohort_sums[c] / max(count, 1), gain_share),
+            }
+            for c, (cohort, count) in enumerate(zip(cohort_names, cohort_counts))
+        },
+    }
+
+
+def save_importance(importance, model_path):
+    """Write the importance next to the model, stamped with that model's version"""
+    path = importance_path(model_path)
+    payload = {'model_version': model_version(model_path), **importance}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_importance(model_path, version=None):
+    """Persisted importance for `model_path`; None if missing or computed for another version"""
+    path = importance_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        importance = json.load(f)
+    if version is not None and importance.get('model_version') != version:
+        print(f"Warning: Ignoring stale feature importance in {path} "
+              f"(model {importance.get('model_version')}, serving {version})")
+        return None
+    return importance
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute persisted feature importance for a trained model")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--artifact', default=ARTIFACT_DIR, help="Also write the importance into this artifact")
+    args = parser.parse_args()
+
+    import joblib
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from preprocess import DataCleaner  # noqa: F401 - referenced by the pickle
+    from dataset import load_dataset
+    from train import split_data
+
+    X_train, _, _, _ = split_data(load_dataset(DATA_PATH))
+    importance = compute_importance(joblib.load(args.model), X_train)
+    for path in (args.model, args.artifact):
+        if path and os.path.exists(path):
+            print(f"Wrote {save_importance(importance, path)}")
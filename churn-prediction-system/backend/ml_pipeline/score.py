@@ -0,0 +1,193 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from dataset import iter_dataset
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+
+# Model loading, explanations and risk bands are shared with the API
+sys.path.append(BASE_DIR)
+from explanations import ExplainOptions, explain_values, top_k_indices  # noqa: E402
+from model_registry import load_bundle  # noqa: E402
+from stats import risk_levels  # noqa: E402
+
+STAGES = ['read', 'preprocess', 'predict', 'shap', 'write']
+
+# Per-worker model bundle, loaded once by the pool initializer
+_bundle = None
+
+
+def _init_worker(model_path):
+    global _bundle
+    # Whole chunks go through the vectorized sklearn pipeline, not the per-row encoder
+    _bundle = load_bundle(model_path, use_fast_encoder=False, warm_up=False)
+
+
+def score_chunk(chunk, top_k=0):
+    """Score one DataFrame chunk; returns (results DataFrame, per-stage seconds)"""
+    timings = {}
+
+    t = time.perf_counter()
+    X = _bundle.transform_frame(chunk)
+    timings['preprocess'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    probs = _bundle.classifier.predict_proba(X)[:, 1]
+    timings['predict'] = time.perf_counter() - t
+
+    if 'customerID' in chunk.columns:
+        ids = chunk['customerID'].astype(str).to_numpy()
+    else:
+        ids = np.asarray(['Unknown'] * len(chunk), dtype=object)
+    out = pd.DataFrame({
+        'customer_id': ids,
+        'churn_probability': probs.astype(np.float32),
+        'risk_level': risk_levels(probs),
+    })
+
+    if top_k > 0:
+        t = time.perf_counter()
+        # SHAP per raw input field, as served by /predict
+        values = explain_values(_bundle, X, ExplainOptions('topk', 'exact', top_k))
+        top = top_k_indices(values, top_k)
+        top_vals = np.take_along_axis(values, top, axis=1)
+        for i in range(top.shape[1]):
+            out[f'driver_{i + 1}'] = _bundle.source_names[top[:, i]]
+            out[f'impact_{i + 1}'] = top_vals[:, i].astype(np.float32)
+        timings['shap'] = time.perf_counter() - t
+
+    return out, timings
+
+
+def _score_chunk_task(args):
+    chunk, top_k = args
+    return score_chunk(chunk, top_k)
+
+
+class ResultWriter:
+    """Appends scored chunks to a Parquet / Feather / CSV file or a MySQL table.
+
+    File outputs are streamed: each chunk is written as it arrives, so memory does
+    not grow with the input. Feather is written as an Arrow IPC file (Feather v2).
+    """
+
+    def __init__(self, output, db_table=None, replace=False):
+        self.output = output
+        self.db_table = db_table
+        # An existing table is only dropped when asked for; otherwise writing to it fails
+        self.replace = replace
+        self._arrow = None
+        self._engine = None
+        self._first = True
+
+    def write(self, df):
+        if self.db_table:
+            if self._engine is None:
+                from sqlalchemy import create_engine
+                from dotenv import load_dotenv
+                load_dotenv()
+                url = (f"mysql+mysqlconnector://{os.getenv('DB_USER', 'root')}:{os.getenv('DB_PASSWORD', '')}"
+                       f"@{os.getenv('DB_HOST', 'localhost')}/{os.getenv('DB_NAME', 'AIML')}")
+                self._engine = create_engine(url, pool_pre_ping=True)
+            if_exists = ('replace' if self.replace else 'fail') if self._first else 'append'
+            df.to_sql(self.db_table, self._engine, if_exists=if_exists,
+                      index=False, method='multi', chunksize=1000)
+        elif self.output.endswith(('.parquet', '.feather')):
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._arrow is None:
+                if self.output.endswith('.parquet'):
+                    import pyarrow.parquet as pq
+                    self._arrow = pq.ParquetWriter(self.output, table.schema)
+                else:
+                    self._arrow = pa.ipc.new_file(self.output, table.schema)
+            self._arrow.write_table(table)
+        else:
+            df.to_csv(self.output, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._arrow is not None:
+            self._arrow.close()
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+def score(input_path=DATA_PATH, output_path='scores.parquet', model_path=MODEL_PATH,
+          chunk_size=20000, workers=None, top_k=0, db_table=None, use_cache=False, replace=False):
+    workers = workers or os.cpu_count() or 1
+    print(f"Scoring {input_path} with {workers} worker(s), chunk size {chunk_size}...")
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    rows = 0
+    writer = ResultWriter(output_path, db_table, replace)
+    started = time.perf_counter()
+
+    # Typed chunks, parsed from the CSV one at a time. A single pass gains nothing from building the
+    # columnar cache first; use_cache reads (and if needed writes) it next to the input instead
+    reader = iter_dataset(input_path, chunk_size, use_cache=use_cache)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        pending = []
+        done = False
+        while not done or pending:
+            # Keep a bounded number of chunks in flight so memory stays flat
+            while not done and len(pending) < workers * 2:
+                t = time.perf_counter()
+                chunk = next(reader, None)
+                timings['read'] += time.perf_counter() - t
+                if chunk is None:
+                    done = True
+                    break
+                pending.append(pool.submit(_score_chunk_task, (chunk, top_k)))
+            if not pending:
+                break
+
+            result, chunk_timings = pending.pop(0).result()
+            for stage, seconds in chunk_timings.items():
+                timings[stage] += seconds
+
+            t = time.perf_counter()
+            writer.write(result)
+            timings['write'] += time.perf_counter() - t
+            rows += len(result)
+
+    t = time.perf_counter()
+    writer.close()
+    timings['write'] += time.perf_counter() - t
+    elapsed = time.perf_counter() - started
+
+    print(f"\nScored {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec overall)")
+    print("Per-stage throughput (worker stages are summed across processes):")
+    for stage in STAGES:
+        seconds = timings[stage]
+        if seconds > 0:
+            print(f"  {stage:<10} {seconds:8.2f}s  {rows / seconds:>12,.0f} rows/sec")
+    target = f"MySQL table '{db_table}'" if db_table else output_path
+    print(f"Results written to {target}")
+    return {'rows': rows, 'elapsed': elapsed, 'timings': timings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline parallel bulk scoring")
+    parser.add_argument('--input', default=DATA_PATH, help="Telco-format CSV to score")
+    parser.add_argument('--output', default='scores.parquet', help="Output file (.parquet, .feather or .csv)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--chunk-size', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=None, help="Defaults to the number of CPU cores")
+    parser.add_argument('--top-k', type=int, default=0, help="Number of SHAP drivers per row (0 disables SHAP)")
+    parser.add_argument('--db-table', default=None, help="Write to this MySQL table instead of a file")
+    parser.add_argument('--replace', action='store_true', help="Drop and recreate --db-table if it already exists")
+    parser.add_argument('--cache', action='store_true',
+                        help="Read via the columnar cache, building it in .cache/ next to the input if needed")
+    args = parser.parse_args()
+
+    score(args.input, args.output, args.model, args.chunk_size, args.workers, args.top_k, args.db_table,
+          use_cache=args.cache, replace=args.replace)
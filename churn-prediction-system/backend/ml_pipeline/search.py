@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+
+from preprocess import get_preprocessor
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+RESULTS_PATH = os.path.join(BASE_DIR, 'models', 'search_results.json')
+
+# Candidates are the full grid; trees per candidate are set by early stopping, up to MAX_TREES
+PARAM_GRID = {
+    'max_depth': [3, 4, 5, 6],
+    'learning_rate': [0.05, 0.1],
+    'min_child_weight': [1, 5],
+    'subsample': [0.8, 1.0],
+}
+MAX_TREES = 1000
+EARLY_STOPPING_ROUNDS = 30
+# Share of each training fold held out to decide when to stop adding trees
+EARLY_STOPPING_FRACTION = 0.15
+LATENCY_BATCH = 1000
+LATENCY_REPEATS = 50
+
+# Per-worker state, set once by the pool initializer
+_folds = None
+
+
+def preprocess_folds(X, y, n_splits=5, random_state=42):
+    """Fit the preprocessor once per CV fold and keep the transformed matrices.
+
+    Every candidate reuses these, so preprocessing runs n_splits times in total
+    instead of once per fit. Each fold's preprocessor only sees its training rows,
+    and a stratified slice of those is held out for early stopping, so the
+    validation fold that is scored is never used to pick the number of trees.
+    Folds are (X_fit, y_fit, X_stop, y_stop, X_val, y_val).
+    """
+    folds = []
+    y = np.asarray(y)
+    for train_idx, val_idx in StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(X, y):
+        preprocessor = get_preprocessor()
+        X_train = preprocessor.fit_transform(X.iloc[train_idx]).astype(np.float32)
+        X_val = preprocessor.transform(X.iloc[val_idx]).astype(np.float32)
+        X_fit, X_stop, y_fit, y_stop = train_test_split(
+            X_train, y[train_idx], test_size=EARLY_STOPPING_FRACTION, stratify=y[train_idx], random_state=random_state)
+        folds.append((X_fit, y_fit, X_stop, y_stop, X_val, y[val_idx]))
+    return folds
+
+
+def _init_worker(folds):
+    global _folds
+    _folds = folds
+
+
+def _latency(model, X):
+    """Median seconds to score one row and one LATENCY_BATCH-row batch"""
+    single, batch = [], []
+    row, rows = X[:1], X[:LATENCY_BATCH]
+    for _ in range(LATENCY_REPEATS):
+        t = time.perf_counter()
+        model.predict_proba(row)
+        single.append(time.perf_counter() - t)
+    for _ in range(max(1, LATENCY_REPEATS // 10)):
+        t = time.perf_counter()
+        model.predict_proba(rows)
+        batch.append(time.perf_counter() - t)
+    return float(np.median(single)), float(np.median(batch)) / len(rows)
+
+
+def evaluate_candidate(params: dict, folds=None) -> dict:
+    """Cross-validate one parameter set; early stopping uses each fold's holdout, AUC its unseen validation rows"""
+    from xgboost import XGBClassifier
+
+    folds = folds if folds is not None else _folds
+    started = time.perf_counter()
+    aucs, trees, fit_seconds = [], [], 0.0
+    model = X_val = None
+    for X_fit, y_fit, X_stop, y_stop, X_val, y_val in folds:
+        model = XGBClassifier(
+            n_estimators=MAX_TREES,
+            tree_method='hist',
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            eval_metric='logloss',
+            scale_pos_weight=(y_fit == 0).sum() / (y_fit == 1).sum(),
+            # Parallelism is across candidates, one core each
+            n_jobs=1,
+            random_state=42,
+            **params,
+        )
+        t = time.perf_counter()
+        model.fit(X_fit, y_fit, eval_set=[(X_stop, y_stop)], verbose=False)
+        fit_seconds += time.perf_counter() - t
+        aucs.append(roc_auc_score(y_val, model.predict_proba(X_val)[:, 1]))
+        trees.append(model.best_iteration + 1)
+
+    # Serving cost of the last fold's model, which has this candidate's depth and tree count
+    single, per_row = _latency(model, X_val)
+    return {
+        'params': params,
+        'roc_auc': round(float(np.mean(aucs)), 4),
+        'roc_auc_std': round(float(np.std(aucs)), 4),
+        'n_estimators': int(round(np.mean(trees))),
+        'fit_seconds': round(fit_seconds, 3),
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'latency_ms': round(single * 1e3, 3),
+        'batch_us_per_row': round(per_row * 1e6, 3),
+    }
+
+
+def search(X, y, param_grid=PARAM_GRID, n_splits=5, workers=None):
+    """Stratified-CV grid search across processes; results sorted by ROC-AUC, best first"""
+    workers = workers or os.cpu_count() or 1
+    candidates = list(ParameterGrid(param_grid))
+    started = time.perf_counter()
+    folds = preprocess_folds(X, y, n_splits)
+    print(f"Preprocessed {n_splits} folds in {time.perf_counter() - started:.2f}s; "
+          f"searching {len(candidates)} candidates with {workers} worker(s)...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds,)) as pool:
+        results = list(pool.map(evaluate_candidate, candidates))
+    results.sort(key=lambda r: (-r['roc_auc'], r['latency_ms']))
+    print(f"Search finished in {time.perf_counter() - started:.2f}s")
+    return results
+
+
+def select(results, max_latency_ms=None):
+    """Most accurate candidate, optionally among those that score a row within max_latency_ms"""
+    eligible = [r for r in results if max_latency_ms is None or r['latency_ms'] <= max_latency_ms]
+    if not eligible:
+        print(f"No candidate scores a row within {max_latency_ms}ms; using the fastest")
+        return min(results, key=lambda r: r['latency_ms'])
+    return eligible[0]
+
+
+def print_results(results, limit=10):
+    print(f"\n{'roc_auc':>8} {'±':>6} {'trees':>6} {'fit s':>7} {'1-row ms':>9} {'µs/row':>8}  params")
+    for r in results[:limit]:
+        params = ', '.join(f"{k}={v}" for k, v in r['params'].items())
+        print(f"{r['roc_auc']:8.4f} {r['roc_auc_std']:6.4f} {r['n_estimators']:6d} {r['fit_seconds']:7.2f} "
+              f"{r['latency_ms']:9.3f} {r['batch_us_per_row']:8.2f}  {params}")
+
+
+def save_results(results, path=RESULTS_PATH):
+    with open(path, 'w') as f:
+        json.dump({'grid': PARAM_GRID, 'max_trees': MAX_TREES, 'early_stopping_rounds': EARLY_STOPPING_ROUNDS,
+                   'early_stopping_fraction': EARLY_STOPPING_FRACTION,
+                   'candidates': results}, f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    from dataset import load_dataset
+    from train import split_data
+
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search (no model is saved)")
+    parser.add_argument('--input', default=DATA_PATH)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="Defaults to the number of CPU cores")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    # Search on the training split only; the test split stays held out for train.py
+    X_train, _, y_train, _ = split_data(load_dataset(args.input))
+    results = search(X_train, y_train, n_splits=args.folds, workers=args.workers)
+    print_results(results)
+    print(f"Results written to {save_results(results, args.output)}")
@@ -1,33 +1,40 @@
-import pandas as pd
-import numpy as np
 import joblib
+import argparse
 import os
 from sklearn.model_selection import train_test_split
 from xgboost import XGBClassifier
 from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.pipeline import Pipeline
 from preprocess import get_preprocessor
+from dataset import load_dataset
+from artifact import export_artifact
+from importance import compute_importance, save_importance
 
 # Define paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv') 
 MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+ARTIFACT_DIR = os.path.join(BASE_DIR, 'models', 'churn_model_artifact')
 
-def train():
+def split_data(df):
+    """Stratified 80/20 train/test split of the raw dataset"""
+    X = df.drop('Churn', axis=1)
+    y = (df['Churn'] == 'Yes').astype(int)
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+def train(data_path=DATA_PATH, model_path=MODEL_PATH, artifact_dir=ARTIFACT_DIR, params=None):
+    """Fit, evaluate and save the model; `params` (e.g. from search.py) replace the default classifier settings"""
     print("Loading data...")
-    if not os.path.exists(DATA_PATH):
-        print(f"Error: Dataset not found at {DATA_PATH}")
+    if not os.path.exists(data_path):
+        print(f"Error: Dataset not found at {data_path}")
         print("Please download 'WA_Fn-UseC_-Telco-Customer-Churn.csv' from Kaggle and place it in backend/data/")
         return
 
-    df = pd.read_csv(DATA_PATH)
+    # Typed columnar copy of the CSV, parsed once and reused until the file changes
+    df = load_dataset(data_path)
     
-    # Separation
-    X = df.drop('Churn', axis=1)
-    y = df['Churn'].map({'Yes': 1, 'No': 0})
-
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    # Separation + Split
+    X_train, X_test, y_train, y_test = split_data(df)
 
     # Get Preprocessing Pipeline
     preprocessor = get_preprocessor()
@@ -39,16 +46,19 @@ def train():
     pos = (y_train == 1).sum()
     scale_weight = neg / pos
 
+    classifier_params = dict(n_estimators=100, learning_rate=0.1, max_depth=5)
+    if params:
+        classifier_params = dict(params, tree_method='hist')
+        print("Classifier parameters: " + ", ".join(f"{k}={v}" for k, v in classifier_params.items()))
+
     model = Pipeline([
         ('preprocessor', preprocessor),
         ('classifier', XGBClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
             scale_pos_weight=scale_weight,
             use_label_encoder=False,
             eval_metric='logloss',
-            random_state=42
+            random_state=42,
+            **classifier_params
         ))
     ])
 
@@ -63,9 +73,45 @@ def train():
     print(classification_report(y_test, y_pred))
     print(f"ROC-AUC Score: {roc_auc_score(y_test, y_proba):.4f}")
 
-    print(f"Saving model to {MODEL_PATH}...")
-    joblib.dump(model, MODEL_PATH)
+    print(f"Saving model to {model_path}...")
+    joblib.dump(model, model_path)
+
+    # Pickle-free copy: native XGBoost booster + preprocessing parameters
+    manifest = export_artifact(model, artifact_dir)
+    print(f"Exported pickle-free artifact {manifest['model_version']} to {artifact_dir}")
+
+    # Global + per-Contract importance, served by /features without any per-request work
+    print("Computing feature importance...")
+    importance = compute_importance(model, X_train)
+    for path in (model_path, artifact_dir):
+        save_importance(importance, path)
+    print("Top features: " + ", ".join(f['name'] for f in importance['features'][:5]))
     print("Done!")
+    return model
+
+def search_and_train(data_path=DATA_PATH, model_path=MODEL_PATH, artifact_dir=ARTIFACT_DIR,
+                     workers=None, max_latency_ms=None):
+    """Cross-validated search on the training split, then train() with the selected candidate"""
+    from search import print_results, save_results, search, select
+
+    X_train, _, y_train, _ = split_data(load_dataset(data_path))
+    results = search(X_train, y_train, workers=workers)
+    print_results(results)
+    print(f"Search results written to {save_results(results)}")
+    best = select(results, max_latency_ms)
+    print(f"Selected: ROC-AUC {best['roc_auc']:.4f} (CV), {best['latency_ms']:.3f}ms per row")
+    return train(data_path, model_path, artifact_dir, params=dict(best['params'], n_estimators=best['n_estimators']))
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train the churn model")
+    parser.add_argument('--search', action='store_true',
+                        help="Pick hyperparameters by parallel cross-validated search first")
+    parser.add_argument('--workers', type=int, default=None, help="Search processes (defaults to CPU cores)")
+    parser.add_argument('--max-latency-ms', type=float, default=None,
+                        help="With --search, only consider candidates scoring a row within this time")
+    args = parser.parse_args()
+
+    if args.search:
+        search_and_train(workers=args.workers, max_latency_ms=args.max_latency_ms)
+    else:
+        train()
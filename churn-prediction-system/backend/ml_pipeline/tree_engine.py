@@ -0,0 +1,112 @@
+import json
+import math
+
+import numpy as np
+
+SUPPORTED_OBJECTIVES = ('binary:logistic',)
+
+
+class FlatTreeEnsemble:
+    """Array-backed copy of a binary:logistic XGBoost booster, evaluated with NumPy.
+
+    Every tree's nodes are packed into shared flat arrays (split feature,
+    threshold, left / right child, default direction, leaf value) with global
+    node ids. A batch is traversed level by level for all trees at once: each
+    step is a handful of vectorized gathers over an (n_rows, n_trees) array of
+    node ids, so there is no per-call DMatrix construction or Python per-node
+    work. Leaves point to themselves, so rows that reach a leaf early stay put.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, depth, base_margin,
+                 n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = base_margin
+        self.n_features = n_features
+
+    @classmethod
+    def from_booster(cls, booster, n_trees=None):
+        """Compile an xgboost.Booster (or XGBClassifier); `n_trees` limits the trees used"""
+        if hasattr(booster, 'get_booster'):
+            classifier = booster
+            booster = classifier.get_booster()
+            best_iteration = getattr(classifier, 'best_iteration', None)
+            if n_trees is None and best_iteration is not None:
+                n_trees = best_iteration + 1
+        model = json.loads(booster.save_raw(raw_format='json'))
+        learner = model['learner']
+        objective = learner['objective']['name']
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective '{objective}'")
+        gbm = learner['gradient_booster']
+        if gbm['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster '{gbm['name']}'")
+        trees = gbm['model']['trees'][:n_trees]
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        depth = 0
+        offset = 0
+        for tree in trees:
+            if tree.get('categories_nodes'):
+                raise ValueError("Categorical splits are not supported")
+            lc = np.asarray(tree['left_children'], dtype=np.int64)
+            rc = np.asarray(tree['right_children'], dtype=np.int64)
+            is_leaf = lc == -1
+            node_ids = np.arange(len(lc)) + offset
+            # Leaves loop back to themselves; their split_conditions hold the leaf value
+            left.append(np.where(is_leaf, node_ids, lc + offset))
+            right.append(np.where(is_leaf, node_ids, rc + offset))
+            feature.append(np.where(is_leaf, 0, tree['split_indices']))
+            threshold.append(np.where(is_leaf, np.inf, tree['split_conditions']))
+            value.append(np.where(is_leaf, tree['split_conditions'], 0.0))
+            default_left.append(np.asarray(tree['default_left'], dtype=bool))
+            roots.append(offset)
+            depth = max(depth, _tree_depth(lc, rc))
+            offset += len(lc)
+
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        return cls(
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left).astype(np.intp),
+            right=np.concatenate(right).astype(np.intp),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            depth=depth,
+            base_margin=math.log(base_score / (1 - base_score)),
+            n_features=int(learner['learner_model_param']['num_feature']),
+        )
+
+    def predict_margin(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected an (n, {self.n_features}) matrix, got {X.shape}")
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[nodes]]
+            # XGBoost goes left on x < threshold, and missing values follow default_left
+            go_left = np.where(np.isnan(x), self.default_left[nodes], x < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=1) + self.base_margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        """(n, 2) class probabilities, like XGBClassifier.predict_proba"""
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p, p])
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not frontier:
+            return depth
+        depth += 1
@@ -0,0 +1,297 @@
+import os
+import sys
+import threading
+import hashlib
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Needed on sys.path so the pickled Pipeline (DataCleaner) can be loaded
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+# joblib / shap / pandas / sklearn are imported on first load, not at import time,
+# so importing the API module stays fast.
+
+# Representative customers used to warm a freshly loaded model before it takes traffic
+WARMUP_ROWS = [
+    {"gender": "Male", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No", "tenure": 12,
+     "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL", "OnlineSecurity": "No",
+     "OnlineBackup": "Yes", "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "No",
+     "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+     "PaymentMethod": "Electronic check", "MonthlyCharges": 55.0, "TotalCharges": 660.0},
+    {"gender": "Female", "SeniorCitizen": 1, "Partner": "Yes", "Dependents": "Yes", "tenure": 60,
+     "PhoneService": "Yes", "MultipleLines": "Yes", "InternetService": "Fiber optic", "OnlineSecurity": "Yes",
+     "OnlineBackup": "No", "DeviceProtection": "Yes", "TechSupport": "Yes", "StreamingTV": "Yes",
+     "StreamingMovies": "Yes", "Contract": "Two year", "PaperlessBilling": "No",
+     "PaymentMethod": "Credit card (automatic)", "MonthlyCharges": 105.5, "TotalCharges": 6330.0},
+]
+
+
+# Classifier evaluation: XGBoost itself, the flat NumPy tree engine, or the engine for small batches only
+INFERENCE_BACKENDS = ("xgboost", "flat", "auto")
+# The compiled engine must reproduce XGBoost's probabilities to this tolerance or it is not used
+FLAT_ENGINE_TOLERANCE = 1e-6
+
+
+def file_fingerprint(path: str) -> str:
+    """Short content hash used as the model version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class ModelBundle:
+    """Everything needed to serve one model version: pipeline, explainer, encoder and feature names.
+
+    A bundle is immutable once built; requests grab the current bundle once and
+    use it throughout, so a swap never changes the model under an in-flight request.
+    """
+
+    def __init__(self, path: str, version: str, classifier, feature_names,
+                 preprocessor=None, encoder=None, source: str = "pickle", source_features=None):
+        import numpy as np
+        import shap
+
+        self.path = path
+        self.version = version
+        self.source = source
+        self.loaded_at = datetime.utcnow()
+        self.classifier = classifier
+        self.feature_names = feature_names
+        # Fitted DataCleaner + ColumnTransformer; None for pickle-free artifacts
+        self.preprocessor = preprocessor
+        self.encoder = encoder
+        # Optional compiled tree engine used for batches of up to flat_max_rows rows
+        self.inference_backend = "xgboost"
+        self.flat_engine = None
+        self.flat_max_rows = 0
+        # Training-time global / per-cohort importance persisted next to the model, if any
+        self.importance = None
+        self.explainer = shap.TreeExplainer(self.classifier)
+
+        # Encoded column -> raw input field, so one-hot contributions can be summed per field
+        if source_features is None:
+            source_features = encoder.source_features()
+        self.source_names, self.source_index = source_features
+        self.source_names = np.asarray(self.source_names, dtype=object)
+        self.group_matrix = np.zeros((len(self.feature_names), len(self.source_names)))
+        self.group_matrix[np.arange(len(self.feature_names)), self.source_index] = 1.0
+
+    @classmethod
+    def from_pipeline(cls, model, path: str, version: str, use_fast_encoder: bool = True):
+        from fast_encoder import FastEncoder, source_feature_map
+
+        # Pipeline structure: [DataCleaner + ColumnTransformer] -> [XGBClassifier]
+        preprocessor = model.named_steps['preprocessor']
+        ct = preprocessor.steps[-1][1]
+        encoder = None
+        if use_fast_encoder:
+            try:
+                encoder = FastEncoder.from_preprocessor(preprocessor)
+            except Exception as e:
+                print(f"Warning: Fast encoder unavailable for model {version}, using pandas pipeline. Error: {e}")
+        return cls(path, version, model.named_steps['classifier'], ct.get_feature_names_out(),
+                   preprocessor=preprocessor, encoder=encoder, source_features=source_feature_map(ct))
+
+    @classmethod
+    def from_artifact(cls, path: str):
+        from artifact import load_artifact
+
+        classifier, encoder, manifest = load_artifact(path)
+        return cls(path, manifest['model_version'], classifier, encoder.feature_names,
+                   encoder=encoder, source="artifact")
+
+    def transform_rows(self, rows: list):
+        """Encode customer dicts into the model's feature matrix"""
+        if self.encoder is not None:
+            return self.encoder.encode_many(rows)
+        import pandas as pd
+        return self.preprocessor.transform(pd.DataFrame(rows))
+
+    def transform_frame(self, df):
+        """Encode a raw Telco-format DataFrame (e.g. an uploaded CSV chunk)"""
+        if self.preprocessor is not None:
+            return self.preprocessor.transform(df)
+        return self.encoder.encode_many(df.to_dict('records'))
+
+    def use_inference_backend(self, backend: str = "xgboost", flat_max_rows: int = 32):
+        """Compile the booster into the flat NumPy engine for "flat" (all batches) or "auto" (small ones)"""
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}'")
+        if backend == "xgboost":
+            return
+        import numpy as np
+        from tree_engine import FlatTreeEnsemble
+
+        try:
+            engine = FlatTreeEnsemble.from_booster(self.classifier)
+            X = self.transform_rows(WARMUP_ROWS * 4)
+            error = np.abs(engine.predict_proba(X) - self.classifier.predict_proba(X)).max()
+            if error > FLAT_ENGINE_TOLERANCE:
+                raise ValueError(f"probabilities differ from XGBoost by {error:.2e}")
+        except Exception as e:
+            print(f"Warning: Flat tree engine unavailable for model {self.version}, using XGBoost. Error: {e}")
+            return
+        self.inference_backend = backend
+        self.flat_engine = engine
+        self.flat_max_rows = flat_max_rows if backend == "auto" else None
+
+    def predict_proba(self, X):
+        """Class probabilities from the configured inference backend"""
+        if self.flat_engine is not None and (self.flat_max_rows is None or X.shape[0] <= self.flat_max_rows):
+            return self.flat_engine.predict_proba(X)
+        return self.classifier.predict_proba(X)
+
+    def warm_up(self):
+        """Run a few dummy predictions so the first real request doesn't pay one-off costs"""
+        for rows in (WARMUP_ROWS[:1], WARMUP_ROWS * 4):
+            X = self.transform_rows(rows)
+            self.predict_proba(X)
+            self.classifier.predict_proba(X)
+            self.explainer.shap_values(X)
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at.isoformat(),
+            "n_features": len(self.feature_names),
+            "n_source_features": len(self.source_names),
+            "fast_encoder": self.encoder is not None,
+            "inference_backend": self.inference_backend,
+            "source": self.source,
+            "feature_importance": self.importance is not None,
+        }
+
+
+def model_fingerprint(path: str) -> str:
+    """Version of the model at `path`: the manifest's content version for artifacts, else a file hash"""
+    from artifact import is_artifact, read_manifest
+
+    if is_artifact(path):
+        return read_manifest(path)['model_version']
+    return file_fingerprint(path)
+
+def watch_path(path: str) -> str:
+    """File whose changes signal a new model (the manifest is written last on export)"""
+    from artifact import is_artifact, manifest_path
+
+    return manifest_path(path) if is_artifact(path) else path
+
+def load_bundle(path: str, use_fast_encoder: bool = True, warm_up: bool = True,
+                inference_backend: str = "xgboost", flat_max_rows: int = 32) -> ModelBundle:
+    """Load either a pickle-free artifact directory or a joblib-pickled Pipeline"""
+    from artifact import is_artifact
+    from importance import load_importance
+
+    if is_artifact(path):
+        bundle = ModelBundle.from_artifact(path)
+    else:
+        import joblib
+        from preprocess import DataCleaner  # noqa: F401 - referenced by the pickle
+
+        model = joblib.load(path)
+        bundle = ModelBundle.from_pipeline(model, path, file_fingerprint(path), use_fast_encoder)
+    bundle.importance = load_importance(path, bundle.version)
+    bundle.use_inference_backend(inference_backend, flat_max_rows)
+    if warm_up:
+        bundle.warm_up()
+    return bundle
+
+
+class ModelRegistry:
+    """Holds the serving model and swaps in new versions atomically.
+
+    New artifacts are loaded and warmed off the request path; only the final
+    reference swap happens under the lock. Reloads are triggered explicitly
+    (`reload`) or by a polling watcher on the model file.
+    """
+
+    def __init__(self, path: str, use_fast_encoder: bool = True, inference_backend: str = "xgboost",
+                 flat_max_rows: int = 32):
+        self.path = path
+        self.use_fast_encoder = use_fast_encoder
+        self.inference_backend = inference_backend
+        self.flat_max_rows = flat_max_rows
+        self._current = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watch = threading.Event()
+        self._listeners = []
+        self._loaded_stat = None
+        self.swaps = 0
+
+    @property
+    def current(self):
+        return self._current
+
+    def on_swap(self, callback):
+        """Register callback(new_bundle, old_bundle) invoked after every swap"""
+        self._listeners.append(callback)
+
+    def reload(self, path: str = None, warm_up: bool = True) -> ModelBundle:
+        """Load, warm and swap in the artifact at `path` (defaults to the configured path)"""
+        path = path or self.path
+        with self._reload_lock:
+            current = self._current
+            stat = self._stat(path)
+            version = model_fingerprint(path)
+            if current is not None and current.version == version and current.path == path:
+                self._loaded_stat = stat
+                return current
+
+            bundle = load_bundle(path, self.use_fast_encoder, warm_up, inference_backend=self.inference_backend,
+                                 flat_max_rows=self.flat_max_rows)
+            with self._lock:
+                old, self._current = self._current, bundle
+                self.path = path
+                self._loaded_stat = stat
+                self.swaps += 1
+            print(f"Model {bundle.version} loaded from {path} and swapped in"
+                  + (f" (replacing {old.version})" if old is not None else ""))
+            for callback in self._listeners:
+                try:
+                    callback(bundle, old)
+                except Exception as e:
+                    print(f"Model swap listener failed: {e}")
+            return bundle
+
+    def start_watcher(self, interval_seconds: float = 5.0):
+        if self._watcher is not None:
+            return
+        self._stop_watch.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval_seconds,),
+                                         name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        if self._watcher is None:
+            return
+        self._stop_watch.set()
+        self._watcher.join(5)
+        self._watcher = None
+
+    def _stat(self, path=None):
+        try:
+            st = os.stat(watch_path(path or self.path))
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _watch(self, interval):
+        failed_stat = None
+        while not self._stop_watch.wait(interval):
+            seen = self._stat()
+            if seen is None or seen == self._loaded_stat or seen == failed_stat:
+                continue
+            # Wait one more interval for the file to stop changing (copy in progress)
+            if self._stop_watch.wait(interval) or self._stat() != seen:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                # Don't retry the same broken file on every poll
+                failed_stat = seen
+                print(f"Model reload failed, keeping current version: {e}")
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonical_key(data: dict, model_version: str, exclude=("customer_id",)) -> str:
+    """Stable hash of the customer's feature fields plus the model that scored them"""
+    features = {}
+    for k, v in data.items():
+        if k in exclude:
+            continue
+        # 12 and 12.0 must hash the same
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            v = float(v)
+        features[k] = v
+    payload = json.dumps(features, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{model_version}|{payload}".encode("utf-8")).hexdigest()
+
+
+def _json_default(value):
+    # numpy scalars and arrays (e.g. cached SHAP vectors), for size estimates
+    return value.tolist() if hasattr(value, "tolist") else float(value)
+
+
+class PredictionCache:
+    """Thread-safe in-process LRU cache with TTL, bounded by entry count and approximate bytes"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value):
+        size = len(key) + (len(value) if isinstance(value, bytes) else len(json.dumps(value, default=_json_default)))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -1,9 +1,13 @@
 from fpdf import FPDF
-import os
 import math
+import zlib
 from datetime import datetime
+from typing import NamedTuple
 
 class PDFReport(FPDF):
+    # Footer text in place of "Page n/{nb}", for pages rendered outside their final document
+    page_label = None
+
     def header(self):
         self.set_font('Arial', 'B', 15)
         self.cell(80)
@@ -15,7 +19,8 @@ class PDFReport(FPDF):
     def footer(self):
         self.set_y(-15)
         self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}' + ' | Generated by ChurnShield AI', 0, 0, 'C')
+        label = self.page_label or 'Page ' + str(self.page_no()) + '/{nb}'
+        self.cell(0, 10, label + ' | Generated by ChurnShield AI', 0, 0, 'C')
 
     def sector(self, xc, yc, r, a1, a2, style='FD', cw=True, o=90):
         if cw:
@@ -35,30 +40,35 @@ class PDFReport(FPDF):
         
         if da == 0:
             return
-        
-        # Move to center
-        self._out(f'{xc * self.k:.2f} {(self.h - yc) * self.k:.2f} m')
-        # Line to first point
-        self._out(f'{(xc + r * math.cos(a1)) * self.k:.2f} {(self.h - (yc - r * math.sin(a1))) * self.k:.2f} l')
-        
-        step_deg = 5 * (math.pi / 180) # 5 degrees steps
-        curr_a = a1
-        while curr_a < a2:
-            curr_a += step_deg
-            if curr_a > a2: curr_a = a2
-            self._out(f'{(xc + r * math.cos(curr_a)) * self.k:.2f} {(self.h - (yc - r * math.sin(curr_a))) * self.k:.2f} l')
-            
-        self._out(f'{xc * self.k:.2f} {(self.h - yc) * self.k:.2f} l')
+
+        k, h = self.k, self.h
+
+        def point(a, dist=r, tangent=0.0):
+            # Point on the circle at angle a, moved `tangent` along the direction of travel
+            x = xc + dist * math.cos(a) - tangent * math.sin(a)
+            y = yc - dist * math.sin(a) - tangent * math.cos(a)
+            return f'{x * k:.2f} {(h - y) * k:.2f}'
+
+        # Move to center, line to the first point
+        ops = [f'{xc * k:.2f} {(h - yc) * k:.2f} m', f'{point(a1)} l']
+        # One cubic Bezier per quarter circle (at most 4 per sector) instead of a polyline
+        segments = math.ceil(da / (math.pi / 2) - 1e-9)
+        step = da / segments
+        handle = r * 4 / 3 * math.tan(step / 4)
+        for i in range(segments):
+            s, e = a1 + i * step, a1 + (i + 1) * step
+            ops.append(f'{point(s, tangent=handle)} {point(e, tangent=-handle)} {point(e)} c')
+        ops.append(f'{xc * k:.2f} {(h - yc) * k:.2f} l')
         
         if style =='F': op = 'f'
         elif style =='FD' or style=='DF': op = 'b'
         else: op = 's'
+        ops.append(op)
         
-        self._out(op)
+        self._out('\n'.join(ops))
 
-def generate_report(data):
-    pdf = PDFReport()
-    pdf.alias_nb_pages()
+def render_report_page(pdf, data, generated_at=None):
+    """Lay out one customer's report on a new page of `pdf`"""
     pdf.add_page()
     pdf.set_font('Arial', '', 12)
     
@@ -73,7 +83,7 @@ def generate_report(data):
     prob_percent = round(prob * 100, 2)
     
     pdf.cell(0, 8, f"Customer Identifier: {customer_id}", 0, 1)
-    pdf.cell(0, 8, f"Assessment Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1)
+    pdf.cell(0, 8, f"Assessment Date: {(generated_at or datetime.now()).strftime('%Y-%m-%d')}", 0, 1)
     
     pdf.ln(5)
     pdf.set_fill_color(240, 240, 240)
@@ -178,8 +188,101 @@ def generate_report(data):
         pdf.multi_cell(0, 8, "MONITOR: Customer is at risk.\n- Send satisfaction survey.\n- Highlight value-add features relevant to usage.\n- Monitor usage drop-offs.")
     else:
         pdf.multi_cell(0, 8, "RETAIN: Healthy status.\n- Consider upsell opportunities.\n- Invite to loyalty program.\n- Request referral.")
-        
+
+def generate_report(data, generated_at=None):
+    pdf = PDFReport()
+    pdf.alias_nb_pages()
+    render_report_page(pdf, data, generated_at)
     try:
         return pdf.output(dest='S').encode('latin-1')
     except:
         return pdf.output(dest='S')
+
+
+class RenderedPage(NamedTuple):
+    """A finished page: compressed content stream, core fonts it references, size in points"""
+    content: bytes
+    fonts: tuple  # ((resource number, base font name), ...)
+    width: float
+    height: float
+
+
+def render_report_pages(data, page_label=None, generated_at=None):
+    """Render one report as standalone pages for PDFStreamWriter (picklable, for worker processes)"""
+    pdf = PDFReport()
+    pdf.page_label = page_label
+    render_report_page(pdf, data, generated_at)
+    # Close the last page without building a document around it
+    pdf.in_footer = 1
+    pdf.footer()
+    pdf.in_footer = 0
+    pdf._endpage()
+    fonts = tuple(sorted((font['i'], font['name']) for font in pdf.fonts.values()))
+    return [RenderedPage(zlib.compress(pdf.pages[n].encode('latin-1')), fonts, pdf.w_pt, pdf.h_pt)
+            for n in range(1, pdf.page + 1)]
+
+
+class PDFStreamWriter:
+    """Assembles RenderedPages into one PDF, returning the bytes to send after each step.
+
+    Objects are written as soon as they are complete and only their offsets are
+    kept, so memory does not grow with page content. The page tree is object 1
+    and goes out last, once every page is known.
+    """
+
+    def __init__(self, title='ChurnShield Pro - Portfolio Report'):
+        self.title = title
+        self.offsets = [0, 0]  # by object number; 0 is the free-list head, 1 the page tree
+        self.position = 0
+        self.page_ids = []
+        self.font_ids = {}
+
+    def _object(self, body, number=None):
+        if number is None:
+            number = len(self.offsets)
+            self.offsets.append(0)
+        self.offsets[number] = self.position
+        data = f'{number} 0 obj\n'.encode('latin-1') + body + b'\nendobj\n'
+        self.position += len(data)
+        return number, data
+
+    def begin(self):
+        header = b'%PDF-1.3\n'
+        self.position += len(header)
+        return header
+
+    def add_page(self, page):
+        out = []
+        resources = []
+        for index, name in page.fonts:
+            if name not in self.font_ids:
+                encoding = '' if name in ('Symbol', 'ZapfDingbats') else ' /Encoding /WinAnsiEncoding'
+                self.font_ids[name], data = self._object(
+                    f'<</Type /Font /BaseFont /{name} /Subtype /Type1{encoding}>>'.encode('latin-1'))
+                out.append(data)
+            resources.append(f'/F{index} {self.font_ids[name]} 0 R')
+        contents, data = self._object(f'<</Filter /FlateDecode /Length {len(page.content)}>>\nstream\n'.encode('latin-1')
+                                      + page.content + b'\nendstream')
+        out.append(data)
+        page_id, data = self._object(
+            f'<</Type /Page /Parent 1 0 R /MediaBox [0 0 {page.width:.2f} {page.height:.2f}] '
+            f'/Resources <</ProcSet [/PDF /Text /ImageB /ImageC /ImageI] /Font <<{" ".join(resources)}>>>> '
+            f'/Contents {contents} 0 R>>'.encode('latin-1'))
+        out.append(data)
+        self.page_ids.append(page_id)
+        return b''.join(out)
+
+    def end(self):
+        kids = ' '.join(f'{n} 0 R' for n in self.page_ids)
+        out = [self._object(f'<</Type /Pages /Kids [{kids}] /Count {len(self.page_ids)}>>'.encode('latin-1'), 1)[1]]
+        info, data = self._object(f'<</Producer (PyFPDF) /Title ({self.title}) '
+                                  f'/CreationDate (D:{datetime.now().strftime("%Y%m%d%H%M%S")})>>'.encode('latin-1'))
+        out.append(data)
+        catalog, data = self._object(b'<</Type /Catalog /Pages 1 0 R>>')
+        out.append(data)
+        xref = [f'xref\n0 {len(self.offsets)}\n0000000000 65535 f \n']
+        xref.extend(f'{offset:010d} 00000 n \n' for offset in self.offsets[1:])
+        xref.append(f'trailer\n<</Size {len(self.offsets)} /Root {catalog} 0 R /Info {info} 0 R>>\n'
+                    f'startxref\n{self.position}\n%%EOF\n')
+        out.append(''.join(xref).encode('latin-1'))
+        return b''.join(out)
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from metrics import metrics
+from report_generator import PDFStreamWriter, generate_report, render_report_pages
+
+
+def report_key(data: dict) -> str:
+    """Content hash of a report payload: the same data always renders the same PDF"""
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def assessment_time(data: dict, default: datetime = None) -> datetime:
+    """When a report's prediction was made: its stored timestamp if it has one, else `default` (now)"""
+    if data.get("predicted_at"):
+        return datetime.fromisoformat(str(data["predicted_at"]))
+    return default or datetime.now()
+
+
+class _ZipSink:
+    """Write-only target for a streamed ZipFile; collects what has been written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ReportRenderer:
+    """Renders PDF reports in worker processes, off the event loop and the scoring threads.
+
+    Single reports are cached by a hash of their payload. Bulk exports keep at most
+    `max_inflight` reports rendering or waiting to be sent, so a portfolio of any
+    size streams out with flat memory. `workers=0` renders in the default threadpool.
+    """
+
+    def __init__(self, workers: int = 2, cache=None, max_inflight: int = None):
+        self.workers = workers
+        self.cache = cache
+        self.max_inflight = max_inflight or max(2, 2 * workers)
+        self._executor = None
+        self.rendered = 0
+        self.bulk_reports = 0
+
+    def start(self):
+        if self.workers > 0 and self._executor is None:
+            # spawn, not fork: the API process already runs DB, log writer and batcher threads
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Workers start on demand; start them now so the first reports don't wait for a spawn
+            for _ in range(self.workers):
+                self._executor.submit(int)
+
+    def stop(self):
+        if self._executor is not None:
+            # Join the workers: a server process that exits right after (serve.py uses os._exit) would orphan them
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _submit(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def render(self, data: dict) -> bytes:
+        """One report as a complete PDF, from the cache when the same payload was rendered before"""
+        generated_at = assessment_time(data)
+        # The PDF shows the assessment date, so a report cached yesterday is not served today
+        key = f"{report_key(data)}:{generated_at.date()}" if self.cache is not None else None
+        if key is not None:
+            with metrics.stage("cache"):
+                pdf = self.cache.get(key)
+            if pdf is not None:
+                return pdf
+        with metrics.stage("pdf"):
+            pdf = await self._submit(generate_report, data, generated_at)
+        self.rendered += 1
+        if key is not None:
+            self.cache.put(key, pdf)
+        return pdf
+
+    async def _pipeline(self, jobs):
+        """Yield job results in order while keeping at most max_inflight jobs submitted"""
+        pending = deque()
+        jobs = iter(jobs)
+        try:
+            for job in jobs:
+                pending.append(self._submit(*job))
+                if len(pending) >= self.max_inflight:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # Client disconnected or rendering failed: drop work nobody will read
+            for future in pending:
+                future.cancel()
+
+    async def stream_pdf(self, reports: list):
+        """One multi-page PDF with a report per payload, yielded a page at a time"""
+        writer = PDFStreamWriter()
+        generated_at = datetime.now()
+        total = len(reports)
+        yield writer.begin()
+        jobs = ((render_report_pages, data, f"Customer {i}/{total}", assessment_time(data, generated_at))
+                for i, data in enumerate(reports, 1))
+        async for pages in self._pipeline(jobs):
+            self.rendered += 1
+            self.bulk_reports += 1
+            for page in pages:
+                yield writer.add_page(page)
+        yield writer.end()
+
+    async def stream_zip(self, reports: list, filenames: list):
+        """A ZIP of standalone report PDFs, yielded one file at a time"""
+        sink = _ZipSink()
+        # PDF content is already deflated; storing avoids compressing it twice
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            generated_at = datetime.now()
+            jobs = ((generate_report, data, assessment_time(data, generated_at)) for data in reports)
+            names = iter(filenames)
+            async for pdf in self._pipeline(jobs):
+                self.rendered += 1
+                self.bulk_reports += 1
+                archive.writestr(zipfile.ZipInfo(next(names), generated_at.timetuple()[:6]), pdf)
+                yield sink.drain()
+        yield sink.drain()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_inflight": self.max_inflight,
+            "rendered": self.rendered,
+            "bulk_reports": self.bulk_reports,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
@@ -0,0 +1,114 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+# Pre-fork server: the master loads the model, explainer and heavy libraries once,
+# freezes the GC so the loaded objects are never written to by collections, then
+# forks workers that share those pages copy-on-write. Each worker runs its own
+# uvicorn server on the inherited listening socket.
+
+
+def preload(app_module):
+    """Import the ML stack and load the serving model in the master, before any fork"""
+    started = time.perf_counter()
+    import pandas  # noqa: F401
+    import sklearn  # noqa: F401
+    import shap  # noqa: F401
+    import xgboost  # noqa: F401
+
+    # No warm-up here: predictions would start OpenMP threads, which don't survive fork.
+    # Each worker warms the shared bundle after forking instead.
+    bundle = app_module.registry.reload(warm_up=False)
+    print(f"Master {os.getpid()} loaded model {bundle.version} in {time.perf_counter() - started:.2f}s")
+
+
+def run_worker(app_module, sock, preloaded, log_level):
+    if preloaded:
+        gc.enable()
+        app_module.registry.current.warm_up()
+    # Lifespan still runs per worker: DB engine, log writer and micro-batcher must not cross a fork.
+    # With a preloaded registry the startup model load finds the same version and returns at once.
+    server = uvicorn.Server(uvicorn.Config(app_module.app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def spawn(app_module, sock, preloaded, log_level):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(app_module, sock, preloaded, log_level)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host="0.0.0.0", port=8000, workers=2, preload_model=True, log_level="info"):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as app_module
+
+    if preload_model:
+        gc.disable()
+        preload(app_module)
+        gc.collect()
+        # Move every surviving object to the permanent generation so later collections skip them
+        gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = {spawn(app_module, sock, preload_model, log_level) for _ in range(workers)}
+    print(f"Master {os.getpid()} serving on {host}:{port} with {workers} worker(s)"
+          f" ({'shared preloaded model' if preload_model else 'model loaded per worker'})")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, restarting")
+            children.add(spawn(app_module, sock, preload_model, log_level))
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fork API server sharing one loaded model across workers")
+    parser.add_argument('--host', default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument('--workers', type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument('--no-preload', action='store_true', help="Load the model in every worker instead")
+    parser.add_argument('--log-level', default="info")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, not args.no_preload, args.log_level)
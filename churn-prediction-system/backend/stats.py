@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml_pipeline'))
+
+RISK_LEVELS = ("Low", "Medium", "High")
+RISK_COLORS = {"Low": "#10b981", "Medium": "#fbbf24", "High": "#f43f5e"}
+# Churn probability above which a customer falls into the Medium / High band
+MEDIUM_RISK_THRESHOLD = 0.4
+HIGH_RISK_THRESHOLD = 0.7
+
+
+def risk_level(prob: float) -> str:
+    """Map a churn probability onto the dashboard risk bands"""
+    if prob > HIGH_RISK_THRESHOLD:
+        return "High"
+    elif prob > MEDIUM_RISK_THRESHOLD:
+        return "Medium"
+    return "Low"
+
+
+def risk_levels(probs):
+    """risk_level() for an array of probabilities"""
+    import numpy as np
+
+    return np.where(probs > HIGH_RISK_THRESHOLD, "High", np.where(probs > MEDIUM_RISK_THRESHOLD, "Medium", "Low"))
+
+
+class DatasetStats:
+    """Aggregates over the reference dataset, recomputed only when the file changes (mtime/size)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._stats = None
+        self.recomputes = 0
+
+    def _file_signature(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        """Cached {total_customers, churn_rate}; None if the dataset is missing"""
+        try:
+            signature = self._file_signature()
+        except OSError:
+            return None
+        if signature == self._signature:
+            return self._stats
+        with self._lock:
+            if signature != self._signature:
+                self._stats = self._compute()
+                self._signature = signature
+                self.recomputes += 1
+            return self._stats
+
+    def _compute(self):
+        from dataset import load_dataset
+
+        # Only the label column is needed for these aggregates: one column of the columnar cache
+        churn = load_dataset(self.path, columns=['Churn'])['Churn']
+        total_count = int(churn.shape[0])
+        churn_count = int((churn == 'Yes').sum())
+        return {
+            "total_customers": total_count,
+            "churn_rate": round(churn_count / total_count * 100, 1) if total_count else 0.0,
+        }
+
+
+class LiveRiskStats:
+    """Risk distribution and revenue at risk over each customer's latest logged prediction.
+
+    Re-scoring a customer replaces their contribution instead of adding to it, so
+    the figures describe current risk. Updates are O(1) per prediction and reads
+    are O(1). A periodic SQL rollup over prediction_logs (`replace`) resets them to
+    the database's view, which also folds in predictions made by other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # customer_id -> (risk level, churn probability x MonthlyCharges) of their latest prediction
+        self._latest = {}
+        self.counts = dict.fromkeys(RISK_LEVELS, 0)
+        # Expected monthly revenue loss: sum of churn probability x MonthlyCharges
+        self.revenue_at_risk = 0.0
+        self.last_rollup = None
+
+    def _set(self, customer_id, risk, revenue):
+        previous = self._latest.get(customer_id)
+        if previous is not None:
+            self.counts[previous[0]] -= 1
+            self.revenue_at_risk -= previous[1]
+        self._latest[customer_id] = (risk, revenue)
+        self.counts[risk] = self.counts.get(risk, 0) + 1
+        self.revenue_at_risk += revenue
+
+    def record(self, entries):
+        """entries: iterable of (row dict, probability, risk level)"""
+        with self._lock:
+            for data, prob, risk in entries:
+                charges = data.get("MonthlyCharges")
+                self._set(data.get("customer_id", "Unknown"), risk, prob * float(charges) if charges is not None else 0.0)
+
+    def replace(self, latest, as_of=None):
+        """latest: (customer_id, risk level, churn probability x MonthlyCharges) per customer"""
+        with self._lock:
+            self._latest = {}
+            self.counts = dict.fromkeys(RISK_LEVELS, 0)
+            self.revenue_at_risk = 0.0
+            for customer_id, risk, revenue in latest:
+                self._set(customer_id, risk, float(revenue or 0.0))
+            self.last_rollup = as_of
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            revenue = self.revenue_at_risk
+        total = sum(counts.values())
+        return {
+            "customers_scored": total,
+            "risk_distribution": [
+                {
+                    "label": f"{level} Risk",
+                    "value": round(counts.get(level, 0) / total * 100, 1) if total else 0,
+                    "count": counts.get(level, 0),
+                    "color": RISK_COLORS[level],
+                }
+                for level in RISK_LEVELS
+            ],
+            "monthly_revenue_at_risk": round(revenue, 2),
+            "active_interventions": counts.get("High", 0),
+        }
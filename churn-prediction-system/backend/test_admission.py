@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from admission import AdmissionLimiter
+
+
+def test_limiter_queues_then_rejects():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, max_wait_seconds=5)
+        assert await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        assert not await limiter.acquire()  # queue full: rejected at once
+        limiter.release(0.2)
+        assert await queued  # the slot was handed to the waiter
+        assert limiter.active == 1 and limiter.queue_depth == 0
+        limiter.release(0.2)
+        assert limiter.active == 0
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.stats()["admitted"] == 2 and limiter.stats()["rejected"] == 1
+    assert limiter.retry_after() >= 1
+
+
+def test_limiter_times_out_queued_requests():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=4, max_wait_seconds=0.05)
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+        assert limiter.queue_depth == 0 and limiter.timed_out == 1
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=4, max_wait_seconds=5)
+        assert await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert limiter.queue_depth == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,420 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import app as app_module
+from explanation_store import ExplanationStore
+
+SAMPLE_CUSTOMER = {
+    "customer_id": "TEST-0001",
+    "gender": "Male",
+    "SeniorCitizen": 0,
+    "Partner": "No",
+    "Dependents": "No",
+    "tenure": 12,
+    "PhoneService": "Yes",
+    "MultipleLines": "No",
+    "InternetService": "DSL",
+    "OnlineSecurity": "No",
+    "OnlineBackup": "Yes",
+    "DeviceProtection": "No",
+    "TechSupport": "No",
+    "StreamingTV": "No",
+    "StreamingMovies": "No",
+    "Contract": "Month-to-month",
+    "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check",
+    "MonthlyCharges": 55.0,
+    "TotalCharges": 660.0,
+}
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # Keep test predictions out of the configured explanation store
+    app_module.explanation_store = ExplanationStore(str(tmp_path_factory.mktemp("explanations")))
+    with TestClient(app_module.app) as c:
+        # Model loads in the background; wait for readiness like an orchestrator would
+        assert app_module.model_ready.wait(120)
+        yield c
+
+
+def test_health_and_readiness(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    r = client.get("/readyz")
+    assert r.status_code == 200
+    assert r.json()["ready"] is True
+    assert r.json()["model_version"] == client.get("/model").json()["version"]
+
+
+def test_importing_app_does_not_load_pandas():
+    import subprocess
+
+    # Fresh interpreter: this test process has pandas loaded already
+    code = "import sys, app; assert 'pandas' not in sys.modules, 'pandas imported at startup'"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+def test_predict_returns_probability_and_explanations(client):
+    r = client.post("/predict", json=SAMPLE_CUSTOMER)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["customer_id"] == "TEST-0001"
+    assert 0.0 <= body["churn_probability"] <= 1.0
+    assert body["risk_level"] in ("Low", "Medium", "High")
+    assert len(body["explanations"]) == 5
+
+
+def test_batch_matches_single_predictions(client):
+    second = dict(SAMPLE_CUSTOMER, customer_id="TEST-0002", tenure=60, Contract="Two year")
+    singles = [client.post("/predict", json=c).json() for c in (SAMPLE_CUSTOMER, second)]
+
+    r = client.post("/predict/batch?use_cache=false", json={"customers": [SAMPLE_CUSTOMER, second]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == 2
+    for single, batched in zip(singles, body["results"]):
+        assert batched["customer_id"] == single["customer_id"]
+        assert batched["churn_probability"] == pytest.approx(single["churn_probability"], abs=1e-4)
+        assert batched["risk_level"] == single["risk_level"]
+        assert [e["feature"] for e in batched["explanations"]] == [e["feature"] for e in single["explanations"]]
+
+
+def test_repeat_prediction_is_served_from_cache(client):
+    customer = dict(SAMPLE_CUSTOMER, tenure=33)
+    before = client.get("/cache/stats").json()
+
+    first = client.post("/predict", json=customer).json()
+    second = client.post("/predict", json=dict(customer, customer_id="OTHER")).json()
+    after = client.get("/cache/stats").json()
+
+    assert second["customer_id"] == "OTHER"
+    assert second["churn_probability"] == first["churn_probability"]
+    assert after["hits"] == before["hits"] + 1
+
+    client.post("/predict?use_cache=false", json=customer)
+    assert client.get("/cache/stats").json()["hits"] == after["hits"]
+
+
+def test_csv_upload_streams_one_result_per_row(client):
+    import io
+    import json
+    import pandas as pd
+
+    df = pd.read_csv(os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')).head(25)
+    payload = df.to_csv(index=False).encode()
+
+    r = client.post("/predict/csv", files={"file": ("customers.csv", payload, "text/csv")})
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [l["customer_id"] for l in lines] == df['customerID'].tolist()
+    assert "explanations" not in lines[0]
+
+    r = client.post("/predict/csv?explain=true&format=csv", files={"file": ("customers.csv", payload, "text/csv")})
+    out = pd.read_csv(io.StringIO(r.text))
+    assert len(out) == 25
+    assert list(out.columns) == ["customer_id", "churn_probability", "risk_level", "top_drivers"]
+    assert out["churn_probability"].tolist() == [l["churn_probability"] for l in lines]
+
+
+def test_csv_upload_blank_cell_only_affects_its_row(client):
+    import json
+    import pandas as pd
+
+    df = pd.read_csv(os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')).head(30)
+    clean = client.post("/predict/csv", files={"file": ("a.csv", df.to_csv(index=False).encode(), "text/csv")})
+    blank = df.astype({"SeniorCitizen": object})
+    blank.loc[3, "SeniorCitizen"] = None
+    dirty = client.post("/predict/csv", files={"file": ("b.csv", blank.to_csv(index=False).encode(), "text/csv")})
+
+    assert dirty.status_code == 200
+    before = [json.loads(line)["churn_probability"] for line in clean.text.splitlines()]
+    after = [json.loads(line)["churn_probability"] for line in dirty.text.splitlines()]
+    assert len(after) == 30
+    assert before[:3] + before[4:] == after[:3] + after[4:]
+
+
+def test_predict_explain_modes(client):
+    plain = client.post("/predict?explain=none", json=SAMPLE_CUSTOMER).json()
+    assert plain["explanations"] == []
+
+    topk = client.post("/predict?explain=topk&top_k=3&explain_method=approx", json=SAMPLE_CUSTOMER).json()
+    assert len(topk["explanations"]) == 3
+    assert topk["churn_probability"] == plain["churn_probability"]
+
+    full = client.post("/predict?explain=full", json=SAMPLE_CUSTOMER).json()
+    impacts = [abs(e["impact"]) for e in full["explanations"]]
+    assert len(impacts) == client.get("/model").json()["n_source_features"] == 19
+    assert impacts == sorted(impacts, reverse=True)
+
+    assert client.post("/predict?explain=everything", json=SAMPLE_CUSTOMER).status_code == 400
+    assert client.post("/predict/batch?explain_method=fast", json={"customers": [SAMPLE_CUSTOMER]}).status_code == 400
+
+
+def test_features_serve_persisted_importance(client):
+    body = client.get("/features").json()
+    assert body["model_version"] == client.get("/model").json()["version"]
+    features = body["categorical"] + body["numerical"]
+    assert len(features) == 19
+    assert sorted(f["rank"] for f in features) == list(range(1, 20))
+    assert abs(sum(f["shap_share"] for f in features) - 1) < 1e-3
+    assert all(f["desc"] for f in features)
+
+    cohort = client.get("/features?cohort=Two year").json()
+    assert cohort["cohort"] == "Two year" and set(body["cohorts"]) >= {"Month-to-month", "Two year"}
+    assert client.get("/features?cohort=Weekly").status_code == 404
+
+
+def test_metrics_and_server_timing(client):
+    app_module.metrics.server_timing = True
+    try:
+        r = client.post("/predict?use_cache=false", json=SAMPLE_CUSTOMER)
+    finally:
+        app_module.metrics.server_timing = False
+    timing = r.headers["server-timing"]
+    for stage in ("parse", "preprocess", "predict", "shap", "rank", "total"):
+        assert f"{stage};dur=" in timing
+    assert "server-timing" not in client.post("/predict", json=SAMPLE_CUSTOMER).headers
+
+    client.post("/report", json={"data": {"customer_id": "TEST-0001", "churn_probability": 0.5}})
+    text = client.get("/metrics").text
+    assert 'churn_stage_seconds_count{stage="predict"}' in text
+    assert 'churn_stage_seconds_count{stage="pdf"}' in text
+    assert 'churn_request_seconds_quantile{route="/predict",quantile="0.95"}' in text
+    assert 'churn_requests_total{route="/predict",method="POST",status="200"}' in text
+    assert 'churn_cache_hits_total' in text
+
+
+def test_full_admission_queue_sheds_with_retry_after(client):
+    limiter = app_module.admission_limiters["report"]
+    saved = limiter.active, limiter.max_queue
+    limiter.active, limiter.max_queue = limiter.max_concurrent, 0
+    try:
+        r = client.post("/report", json={"data": {"customer_id": "TEST-0001"}})
+        assert r.status_code == 503
+        assert int(r.headers["retry-after"]) >= 1
+        # Other endpoint classes are unaffected
+        assert client.post("/predict?explain=none", json=SAMPLE_CUSTOMER).status_code == 200
+    finally:
+        limiter.active, limiter.max_queue = saved
+    assert client.get("/admission/stats").json()["report"]["rejected"] >= 1
+    assert 'churn_admission_queue_depth{class="report"} 0' in client.get("/metrics").text
+
+
+def test_report_is_rendered_once_per_payload(client):
+    data = {**SAMPLE_CUSTOMER, "customer_id": "TEST-REPORT", "churn_probability": 0.81, "risk_level": "High"}
+    before = client.get("/report/stats").json()["rendered"]
+    first = client.post("/report", json={"data": data})
+    second = client.post("/report", json={"data": data})
+    assert first.status_code == 200 and first.headers["content-type"] == "application/pdf"
+    assert first.content.startswith(b"%PDF") and first.content == second.content
+    stats = client.get("/report/stats").json()
+    assert stats["rendered"] == before + 1
+    assert stats["cache"]["hits"] >= 1
+
+
+def test_bulk_report_streams_at_risk_customers(client):
+    import io
+    import zipfile
+
+    customers = [{**SAMPLE_CUSTOMER, "customer_id": f"BULK-{i}", "tenure": 1 + 6 * i,
+                  "Contract": "Month-to-month" if i % 2 else "Two year"} for i in range(12)]
+    probs = [r["churn_probability"] for r in
+             client.post("/predict/batch?explain=none", json={"customers": customers}).json()["results"]]
+    expected = sum(p >= 0.3 for p in probs)
+
+    r = client.post("/report/bulk?min_probability=0.3", json={"customers": customers})
+    assert r.status_code == 200 and r.headers["content-type"] == "application/pdf"
+    assert int(r.headers["x-report-count"]) == expected
+    assert r.content.startswith(b"%PDF") and r.content.rstrip().endswith(b"%%EOF")
+    assert r.content.count(b"/Type /Page ") >= expected
+
+    r = client.post("/report/bulk?min_probability=0&limit=3&format=zip", json={"customers": customers})
+    assert r.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r.content)) as archive:
+        names = archive.namelist()
+        assert len(names) == 3 and names[0].startswith("0001_ChurnReport_BULK-")
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    # Riskiest customer first
+    riskiest = max(range(len(customers)), key=lambda i: probs[i])
+    assert names[0] == f"0001_ChurnReport_BULK-{riskiest}.pdf"
+
+    assert client.post("/report/bulk?min_probability=1.01", json={"customers": customers}).status_code == 404
+    assert client.post("/report/bulk?format=doc", json={"customers": customers}).status_code == 400
+
+
+def test_reports_render_from_stored_predictions(client):
+    import io
+    import zipfile
+
+    body = client.post("/predict?use_cache=false", json=SAMPLE_CUSTOMER).json()
+    prediction_id = body["prediction_id"]
+    entry = app_module.explanation_store.load([prediction_id])[0]
+    assert entry["features"]["Contract"] == "Month-to-month" and entry["features"]["tenure"] == 12
+    assert abs(entry["churn_probability"] - body["churn_probability"]) < 1e-4
+    # The full vector is stored, not just the top 5 that were returned
+    assert (~np.isnan(entry["shap"])).sum() > 5
+    top = [app_module.explanation_store.fields[i] for i in np.argsort(-np.abs(entry["shap"]))[:5]]
+    assert top == [e["feature"] for e in body["explanations"]]
+
+    r = client.get(f"/report/{prediction_id}")
+    assert r.status_code == 200 and r.content.startswith(b"%PDF")
+    assert client.get("/report/999999999").status_code == 404
+
+    unexplained = client.post("/predict?explain=none", json=SAMPLE_CUSTOMER).json()["prediction_id"]
+    assert np.isnan(app_module.explanation_store.load([unexplained])[0]["shap"]).all()
+    assert client.get(f"/report/{unexplained}").status_code == 200
+
+    batch = client.post("/predict/batch", json={"customers": [SAMPLE_CUSTOMER] * 3}).json()["results"]
+    ids = [res["prediction_id"] for res in batch]
+    assert ids == list(range(ids[0], ids[0] + 3))
+    r = client.post("/report/predictions?format=zip", json={"prediction_ids": ids})
+    with zipfile.ZipFile(io.BytesIO(r.content)) as archive:
+        assert len(archive.namelist()) == 3
+
+
+def test_responses_report_serving_model_version(client):
+    version = client.get("/model").json()["version"]
+    assert client.post("/predict", json=SAMPLE_CUSTOMER).json()["model_version"] == version
+
+    r = client.post("/admin/model/reload", json={})
+    assert r.status_code == 403  # no ADMIN_TOKEN configured: admin endpoints stay closed
+
+
+def test_admin_reload_needs_token_and_a_path_inside_models(client, monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "s3cret")
+    version = client.get("/model").json()["version"]
+    assert client.post("/admin/model/reload", json={}, headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    r = client.post("/admin/model/reload", json={}, headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200
+    assert r.json()["model_version"] == version
+    assert r.json()["swapped"] is False
+
+    for path in (os.path.abspath(__file__), "../backend/test_api.py", "models/../app.py"):
+        r = client.post("/admin/model/reload", json={"path": path}, headers={"X-Admin-Token": "s3cret"})
+        assert r.status_code == 400
+    assert client.get("/model").json()["version"] == version
+
+
+def test_model_swap_clears_the_prediction_cache(client):
+    assert app_module.drop_cached_predictions in app_module.registry._listeners
+    cache, bundle = app_module.prediction_cache, app_module.registry.current
+    cache.put("key", {"churn_probability": 0.5})
+
+    app_module.drop_cached_predictions(bundle, None)  # first load: nothing to drop
+    assert cache.get("key") is not None
+    app_module.drop_cached_predictions(bundle, bundle)
+    assert cache.get("key") is None and cache.stats()["entries"] == 0
+
+
+def test_logs_search_pages_with_cursor_and_filters(client):
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    app_module.Base.metadata.create_all(engine)
+    start = datetime(2024, 3, 1)
+    with engine.begin() as conn:
+        conn.execute(app_module.PredictionLog.__table__.insert(), [
+            {"customer_id": f"C{i % 3}", "prediction_prob": i / 30, "prediction_class": 0,
+             "risk_level": "High" if i % 2 else "Low", "prediction_date": start + timedelta(minutes=i // 2)}
+            for i in range(30)
+        ])
+    Session = sessionmaker(bind=engine)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app_module.app.dependency_overrides[app_module.get_db] = override_db
+    try:
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, "risk_level": "High"}
+            if cursor:
+                params["cursor"] = cursor
+            body = client.get("/logs/search", params=params).json()
+            seen.extend(body["items"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        ids = [log["id"] for log in seen]
+        assert len(ids) == 15 and len(set(ids)) == 15
+        assert all(log["risk_level"] == "High" for log in seen)
+        assert ids == sorted(ids, reverse=True)
+
+        body = client.get("/logs/search", params={"customer_id": "C1", "date_from": "2024-03-01T00:05:00"}).json()
+        assert body["items"] and all(log["customer_id"] == "C1" for log in body["items"])
+
+        assert len(client.get("/logs").json()) == 10
+        assert client.get("/logs/search", params={"cursor": "garbage"}).status_code == 400
+    finally:
+        app_module.app.dependency_overrides.clear()
+
+
+def test_customer_risk_endpoints_read_materialized_scores(client, monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "s3cret")
+    import io
+    import pandas as pd
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    app_module.customer_risk.metadata.create_all(engine)
+    monkeypatch.setattr(app_module, "engine", engine)
+    Session = sessionmaker(bind=engine)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app_module.app.dependency_overrides[app_module.get_db] = override_db
+    try:
+        frame = pd.read_csv(os.path.join(BASE_DIR, "data", "WA_Fn-UseC_-Telco-Customer-Churn.csv")).head(200)
+        csv_bytes = frame.to_csv(index=False).encode()
+        r = client.post("/admin/customers/ingest", files={"file": ("customers.csv", io.BytesIO(csv_bytes), "text/csv")},
+                        headers={"X-Admin-Token": "s3cret"})
+        assert r.json() == {"ingested": 200}
+        assert client.get("/customers/7590-VHVEG/risk").status_code == 404
+        assert client.post("/admin/customers/score").status_code == 403
+
+        r = client.post("/admin/customers/score", headers={"X-Admin-Token": "s3cret"})
+        assert r.status_code == 200 and r.json()["scored"] == 200
+        # Already current for this model: the scheduled job skips it
+        assert app_module.score_customer_table() is None
+
+        risk = client.get("/customers/7590-VHVEG/risk").json()
+        assert risk["model_version"] == r.json()["model_version"]
+        first = frame.drop(columns=["customerID", "Churn"]).iloc[0].to_dict()
+        first["TotalCharges"] = float(first["TotalCharges"])
+        live = client.post("/predict?use_cache=false", json=dict(first, customer_id="7590-VHVEG")).json()
+        assert risk["churn_probability"] == pytest.approx(live["churn_probability"], abs=1e-3)
+
+        top = client.get("/customers/top-risk", params={"limit": 5}).json()["items"]
+        assert len(top) == 5 and top[0]["churn_probability"] >= top[-1]["churn_probability"]
+        by_contract = client.get("/customers/top-risk", params={"limit": 3, "segment": "contract"}).json()["groups"]
+        assert all(r["contract"] == value for value, rows in by_contract.items() for r in rows)
+        one = client.get("/customers/top-risk", params={"segment": "contract", "value": "Two year"}).json()
+        assert one["items"] and all(r["contract"] == "Two year" for r in one["items"])
+
+        assert client.get("/customers/top-risk", params={"segment": "gender"}).status_code == 400
+        assert client.get("/customers/top-risk", params={"value": "Two year"}).status_code == 400
+    finally:
+        app_module.app.dependency_overrides.clear()
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+from preprocess import DataCleaner
+from artifact import export_artifact, load_artifact
+from model_registry import load_bundle
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+def test_artifact_round_trip_matches_pickled_pipeline(tmp_path):
+    model = joblib.load(MODEL_PATH)
+    manifest = export_artifact(model, str(tmp_path))
+    classifier, encoder, loaded = load_artifact(str(tmp_path))
+
+    assert loaded['model_version'] == manifest['model_version']
+    assert isinstance(encoder.num_mean, np.ndarray)
+
+    df = pd.read_csv(DATA_PATH).drop('Churn', axis=1)
+    expected = model.predict_proba(df)[:, 1]
+    actual = classifier.predict_proba(encoder.encode_many(df.to_dict('records')))[:, 1]
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+
+
+def test_registry_serves_artifact_without_unpickling(tmp_path):
+    export_artifact(joblib.load(MODEL_PATH), str(tmp_path))
+    bundle = load_bundle(str(tmp_path))
+
+    assert bundle.source == "artifact" and bundle.preprocessor is None
+    X = bundle.transform_frame(pd.read_csv(DATA_PATH).head(20))
+    assert bundle.classifier.predict_proba(X).shape == (20, 2)
+    assert np.asarray(bundle.explainer.shap_values(X)).shape == (20, len(bundle.feature_names))
+
+
+def test_artifact_with_a_modified_file_is_rejected(tmp_path):
+    export_artifact(joblib.load(MODEL_PATH), str(tmp_path))
+    booster = tmp_path / 'booster.ubj'
+    booster.write_bytes(booster.read_bytes()[:-16])
+
+    with pytest.raises(ValueError, match="booster.ubj"):
+        load_artifact(str(tmp_path))
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+def test_concurrent_rows_are_coalesced_and_returned_in_order():
+    seen_sizes = []
+
+    def score(rows):
+        seen_sizes.append(len(rows))
+        return [row["x"] * 2 for row in rows]
+
+    batcher = MicroBatcher(score, window_ms=20, max_batch_size=8)
+    batcher.start()
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda i: batcher.submit({"x": i}).result(timeout=5), range(32)))
+    finally:
+        batcher.stop()
+
+    assert results == [i * 2 for i in range(32)]
+    assert sum(seen_sizes) == 32
+    assert max(seen_sizes) <= 8
+    assert len(seen_sizes) < 32
+
+
+def test_scoring_errors_propagate_to_every_caller():
+    def score(rows):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(score, window_ms=1, max_batch_size=4)
+    batcher.start()
+    try:
+        with pytest.raises(ValueError):
+            batcher.submit({"x": 1}).result(timeout=5)
+    finally:
+        batcher.stop()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'benchmarks'))
+
+from harness import compare, measure
+
+
+def test_measure_reports_percentiles_and_throughput():
+    result = measure(lambda: sum(range(1000)), iterations=50, rows_per_call=10)
+    assert result['iterations'] == 50
+    assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+    assert abs(result['rows_per_s'] - result['calls_per_s'] * 10) < 1
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {'benchmarks': {'a': {'p50_ms': 10.0, 'rows_per_s': 100.0},
+                               'b': {'p50_ms': 10.0, 'rows_per_s': 100.0}}}
+    current = {'benchmarks': {'a': {'p50_ms': 10.5, 'rows_per_s': 95.0},
+                              'b': {'p50_ms': 12.0, 'rows_per_s': 80.0},
+                              'new': {'p50_ms': 1.0, 'rows_per_s': 1.0}}}
+    assert compare(current, baseline, threshold=0.10) == [
+        ('b', 'p50_ms', 10.0, 12.0), ('b', 'rows_per_s', 100.0, 80.0)]
@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import customer_risk
+from model_registry import load_bundle
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    customer_risk.metadata.create_all(engine)
+    return engine
+
+
+def sample_csv(n: int) -> io.StringIO:
+    return io.StringIO(pd.read_csv(DATA_PATH).head(n).to_csv(index=False))
+
+
+def test_ingest_upserts_by_customer_id(engine):
+    assert customer_risk.ingest_csv(engine, sample_csv(300), chunk_size=120) == 300
+    # Loading the same file again replaces rows instead of failing or duplicating them
+    assert customer_risk.ingest_csv(engine, sample_csv(300), chunk_size=1000) == 300
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(customer_risk.customers)) == 300
+        row = conn.execute(select(customer_risk.customers).limit(1)).mappings().first()
+    assert isinstance(row["tenure"], int) and row["contract"]
+
+    with pytest.raises(ValueError):
+        customer_risk.ingest_csv(engine, io.StringIO("customerID,tenure\nA,1\n"))
+
+
+def test_ingest_parses_every_chunk_alike(engine):
+    frame = pd.read_csv(DATA_PATH, dtype=str).head(4)
+    # All-digit IDs in one chunk, a blank SeniorCitizen and TotalCharges in another
+    frame.loc[:1, "customerID"] = ["0042", "0043"]
+    frame.loc[2, ["SeniorCitizen", "TotalCharges"]] = None
+    customer_risk.ingest_csv(engine, io.StringIO(frame.to_csv(index=False)), chunk_size=2)
+
+    with engine.connect() as conn:
+        rows = {r["customer_id"]: r for r in conn.execute(select(customer_risk.customers)).mappings()}
+    assert sorted(rows) == sorted(frame["customerID"])
+    blank = rows[frame["customerID"][2]]
+    assert blank["senior_citizen"] is None and blank["total_charges"] is None
+    assert all(isinstance(rows[c]["senior_citizen"], int) for c in frame["customerID"] if c != frame["customerID"][2])
+
+
+def test_score_table_matches_bundle_and_serves_top_n(engine):
+    bundle = load_bundle(MODEL_PATH, warm_up=False)
+    customer_risk.ingest_csv(engine, sample_csv(400))
+    assert not customer_risk.scores_are_current(engine, bundle.version, 3600)
+
+    result = customer_risk.score_table(engine, bundle, chunk_size=150, top_k=2, explain_method="approx")
+    assert result["scored"] == 400 and result["model_version"] == bundle.version
+    assert customer_risk.scores_are_current(engine, bundle.version, 3600)
+    assert not customer_risk.scores_are_current(engine, "other-version", 3600)
+
+    frame = pd.read_csv(DATA_PATH).head(400)
+    expected = dict(zip(frame["customerID"], bundle.predict_proba(bundle.transform_frame(frame))[:, 1]))
+    with engine.connect() as conn:
+        one = customer_risk.get_customer_risk(conn, frame["customerID"][0])
+        assert one["churn_probability"] == pytest.approx(expected[one["customer_id"]], abs=1e-4)
+        assert len(one["top_drivers"]) == 2
+        assert customer_risk.get_customer_risk(conn, "missing") is None
+
+        top = customer_risk.top_risk(conn, 10)
+        assert [r["customer_id"] for r in top] == sorted(expected, key=lambda c: (expected[c], c), reverse=True)[:10]
+
+        values = customer_risk.segment_values(conn, "contract")
+        assert set(values) == set(frame["Contract"])
+        for value in values:
+            rows = customer_risk.top_risk(conn, 5, "contract", value)
+            assert rows and all(r["contract"] == value for r in rows)
+            probs = [r["churn_probability"] for r in rows]
+            assert probs == sorted(probs, reverse=True)
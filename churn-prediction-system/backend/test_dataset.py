@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+import dataset
+from dataset import cache_path, iter_dataset, load_dataset
+from model_registry import load_bundle
+from preprocess import get_preprocessor
+
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+
+
+def test_typed_dataset_matches_raw_csv(tmp_path, monkeypatch):
+    # The cache is written in chunks; several of them exercise the dictionary deltas
+    monkeypatch.setattr(dataset, 'CACHE_CHUNK_ROWS', 1000)
+    raw = pd.read_csv(DATA_PATH)
+    typed = load_dataset(DATA_PATH, cache_dir=str(tmp_path))
+
+    assert os.path.exists(cache_path(DATA_PATH, str(tmp_path)))
+    assert typed['Contract'].dtype == 'category' and typed['SeniorCitizen'].dtype == 'int8'
+    assert typed['TotalCharges'].dtype == 'float64' and not typed['TotalCharges'].isna().any()
+    assert typed.memory_usage(deep=True).sum() * 4 < raw.memory_usage(deep=True).sum()
+
+    # The preprocessing pipeline sees the same values either way
+    X_raw = get_preprocessor().fit_transform(raw.drop('Churn', axis=1))
+    X_typed = get_preprocessor().fit_transform(typed.drop('Churn', axis=1))
+    assert (X_raw == X_typed).all()
+
+    # A model trained on the raw CSV scores the typed data identically
+    bundle = load_bundle(MODEL_PATH, use_fast_encoder=False, warm_up=False)
+    assert (bundle.classifier.predict_proba(bundle.transform_frame(raw)) ==
+            bundle.classifier.predict_proba(bundle.transform_frame(typed))).all()
+
+
+def test_cache_is_rebuilt_when_the_source_changes(tmp_path, monkeypatch):
+    source = tmp_path / 'customers.csv'
+    pd.read_csv(DATA_PATH).head(100).to_csv(source, index=False)
+    assert len(load_dataset(str(source), columns=['Churn'])) == 100
+    built = os.stat(cache_path(str(source))).st_mtime_ns
+
+    assert len(load_dataset(str(source))) == 100
+    assert os.stat(cache_path(str(source))).st_mtime_ns == built
+
+    # Categories first seen in a later chunk keep their values
+    monkeypatch.setattr(dataset, 'CACHE_CHUNK_ROWS', 30)
+    frame = pd.read_csv(DATA_PATH).sort_values('Contract').head(2000)
+    frame.to_csv(source, index=False)
+    assert load_dataset(str(source))['Contract'].astype(str).tolist() == frame['Contract'].tolist()
+
+    pd.read_csv(DATA_PATH).head(40).to_csv(source, index=False)
+    assert len(load_dataset(str(source))) == 40
+    chunks = list(iter_dataset(str(source), 15))
+    assert [len(c) for c in chunks] == [15, 15, 10]
+    assert all(c['Contract'].dtype == 'category' for c in chunks)
+    assert list(iter_dataset(str(source), 15, use_cache=False))[2]['customerID'].tolist() == chunks[2]['customerID'].tolist()
+
+
+def test_unwritable_cache_falls_back_to_the_csv(tmp_path, monkeypatch):
+    import errno
+    import pyarrow.ipc
+
+    def read_only(*args, **kwargs):
+        raise OSError(errno.EROFS, "Read-only file system")
+
+    monkeypatch.setattr(pyarrow.ipc, "new_file", read_only)
+    df = load_dataset(DATA_PATH, columns=['Churn'], cache_dir=str(tmp_path))
+    assert len(df) == 7043 and df['Churn'].dtype == 'category'
+    assert [len(c) for c in iter_dataset(DATA_PATH, 5000, cache_dir=str(tmp_path))] == [5000, 2043]
+    assert os.listdir(tmp_path) == []
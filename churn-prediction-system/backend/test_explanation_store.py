@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from explanation_store import ExplanationStore
+
+ROW = {
+    "customer_id": "TEST-0001", "gender": "Male", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+    "tenure": 12, "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL",
+    "OnlineSecurity": "No", "OnlineBackup": "Yes", "DeviceProtection": "No", "TechSupport": "No",
+    "StreamingTV": "No", "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 55.0, "TotalCharges": 660.0,
+}
+
+
+def test_round_trip_with_float16_shap(tmp_path):
+    store = ExplanationStore(str(tmp_path))
+    fields = list(reversed(store.fields))  # model order need not match the store's
+    shap = np.linspace(-1, 1, 2 * len(fields)).reshape(2, -1)
+    ids = store.append("v1", [ROW, {**ROW, "customer_id": "TEST-0002", "Contract": "Two year"}], [0.25, 0.75],
+                       shap, fields)
+    assert ids == [0, 1]
+
+    first, second = store.load(ids)
+    assert first["features"] == {k: v for k, v in ROW.items() if k != "customer_id"}
+    assert second["customer_id"] == "TEST-0002" and second["features"]["Contract"] == "Two year"
+    assert second["model_version"] == "v1" and second["churn_probability"] == pytest.approx(0.75)
+    stored = dict(zip(store.fields, second["shap"]))
+    assert all(stored[name] == pytest.approx(value, abs=1e-3) for name, value in zip(fields, shap[1]))
+    with pytest.raises(KeyError):
+        store.load([2])
+
+
+def test_instances_share_ids_and_vocabulary(tmp_path):
+    # Two stores on one directory stand in for two server processes
+    a, b = ExplanationStore(str(tmp_path)), ExplanationStore(str(tmp_path))
+    assert a.append("v1", [ROW], [0.1]) == [0]
+    assert b.append("v2", [{**ROW, "gender": "Female"}, ROW], [0.2, 0.3]) == [1, 2]
+    assert a.append("v1", [{**ROW, "PaymentMethod": "Mailed check"}], [0.4]) == [3]
+
+    entries = a.load([0, 1, 2, 3])
+    assert [e["model_version"] for e in entries] == ["v1", "v2", "v2", "v1"]
+    assert entries[1]["features"]["gender"] == "Female"
+    assert b.load([3])[0]["features"]["PaymentMethod"] == "Mailed check"
+    assert np.isnan(entries[0]["shap"]).all()
+
+
+def test_partial_record_is_dropped_on_open(tmp_path):
+    store = ExplanationStore(str(tmp_path))
+    store.append("v1", [ROW, ROW], [0.1, 0.2])
+    with open(store.path, "ab") as f:
+        f.write(b"\0" * 10)  # crash mid-append
+    reopened = ExplanationStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.append("v1", [ROW], [0.3]) == [2]
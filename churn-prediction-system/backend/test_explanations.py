@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from explanations import ExplainOptions, contributions, explain_matrix, group_by_source, top_k_indices
+from model_registry import load_bundle
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+def test_top_k_indices_matches_full_sort():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(200, 46))
+    for k in (1, 5, 46, 100):
+        expected = np.argsort(-np.abs(values), axis=1, kind='stable')[:, :min(k, 46)]
+        np.testing.assert_array_equal(top_k_indices(values, k), expected)
+
+
+def test_explain_matrix_modes_and_methods():
+    bundle = load_bundle(MODEL_PATH, warm_up=False)
+    rows = pd.read_csv(DATA_PATH).drop('Churn', axis=1).head(50).to_dict('records')
+    X = bundle.transform_rows(rows)
+
+    assert explain_matrix(bundle, X, ExplainOptions('none')) == [[]] * 50
+
+    exact = contributions(bundle, X, 'exact')
+    approx = contributions(bundle, X, 'approx')
+    assert exact.shape == approx.shape == X.shape
+    # Both attribute the same margin: contributions + bias sum to the raw prediction
+    np.testing.assert_allclose(exact.sum(axis=1), approx.sum(axis=1), atol=1e-4)
+
+    grouped = group_by_source(bundle, exact)
+    top = explain_matrix(bundle, X, ExplainOptions('topk', 'exact', 5))
+    expected = np.argsort(-np.abs(grouped), axis=1, kind='stable')[:, :5]
+    assert [[e['feature'] for e in row] for row in top] == [list(bundle.source_names[r]) for r in expected]
+
+
+def test_one_hot_contributions_are_summed_per_input_field():
+    bundle = load_bundle(MODEL_PATH, warm_up=False)
+    raw_fields = list(pd.read_csv(DATA_PATH, nrows=1).drop(['customerID', 'Churn'], axis=1).columns)
+    assert sorted(bundle.source_names) == sorted(raw_fields)
+
+    rows = pd.read_csv(DATA_PATH).drop('Churn', axis=1).head(20).to_dict('records')
+    X = bundle.transform_rows(rows)
+    values = contributions(bundle, X, 'exact')
+    grouped = group_by_source(bundle, values)
+    names = list(bundle.feature_names)
+    contract = [i for i, n in enumerate(names) if n.startswith('Contract_')]
+    np.testing.assert_allclose(grouped[:, list(bundle.source_names).index('Contract')],
+                               values[:, contract].sum(axis=1), atol=1e-5)
+    np.testing.assert_allclose(grouped.sum(axis=1), values.sum(axis=1), atol=1e-5)
+
+    full = explain_matrix(bundle, X, ExplainOptions('full'))
+    assert all(len(row) == len(raw_fields) for row in full)
+
+
+def test_artifact_and_pipeline_share_the_field_mapping():
+    pipeline = load_bundle(MODEL_PATH, warm_up=False)
+    artifact = load_bundle(os.path.join(BASE_DIR, 'models', 'churn_model_artifact'), warm_up=False)
+    assert list(pipeline.source_names) == list(artifact.source_names)
+    np.testing.assert_array_equal(pipeline.source_index, artifact.source_index)
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+from preprocess import DataCleaner
+from fast_encoder import FastEncoder
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+def test_parity_with_column_transformer_on_full_dataset():
+    model = joblib.load(MODEL_PATH)
+    preprocessor = model.named_steps['preprocessor']
+    encoder = FastEncoder.from_preprocessor(preprocessor)
+
+    df = pd.read_csv(DATA_PATH).drop('Churn', axis=1)
+    expected = preprocessor.transform(df).astype(np.float32)
+    actual = encoder.encode_many(df.to_dict('records'))
+
+    assert actual.shape == expected.shape
+    assert list(encoder.feature_names) == list(preprocessor.steps[-1][1].get_feature_names_out())
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+
+
+def test_single_row_handles_unknown_category_and_blank_total_charges():
+    model = joblib.load(MODEL_PATH)
+    preprocessor = model.named_steps['preprocessor']
+    encoder = FastEncoder.from_preprocessor(preprocessor)
+
+    row = pd.read_csv(DATA_PATH).drop('Churn', axis=1).iloc[0].to_dict()
+    row['Contract'] = 'Lifetime'
+    row['TotalCharges'] = ' '
+
+    expected = preprocessor.transform(pd.DataFrame([row])).astype(np.float32)
+    np.testing.assert_allclose(encoder.encode(row), expected, rtol=0, atol=1e-6)
@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+from preprocess import DataCleaner
+from importance import compute_importance, importance_path, load_importance, save_importance
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+def test_importance_is_batch_size_invariant_and_covers_cohorts():
+    model = joblib.load(MODEL_PATH)
+    X = pd.read_csv(DATA_PATH).drop('Churn', axis=1).head(500)
+
+    batched = compute_importance(model, X, batch_size=64)
+    whole = compute_importance(model, X, batch_size=10000)
+    assert [f['name'] for f in batched['features']] == [f['name'] for f in whole['features']]
+    np.testing.assert_allclose([f['mean_abs_shap'] for f in batched['features']],
+                               [f['mean_abs_shap'] for f in whole['features']], atol=1e-5)
+
+    assert len(batched['features']) == 19
+    assert abs(sum(f['gain_share'] for f in batched['features']) - 1) < 1e-3
+    assert sum(c['n_rows'] for c in batched['cohorts'].values()) == 500
+    assert set(batched['cohorts']) == set(X['Contract'])
+
+
+def test_stale_importance_is_ignored(tmp_path):
+    model_path = str(tmp_path / 'model.pkl')
+    with open(model_path, 'wb') as f:
+        f.write(b'model-v1')
+    save_importance({'features': []}, model_path)
+    assert load_importance(model_path, json.load(open(importance_path(model_path)))['model_version']) is not None
+
+    with open(model_path, 'wb') as f:
+        f.write(b'model-v2')
+    from importance import model_version
+    assert load_importance(model_path, model_version(model_path)) is None
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from log_writer import PredictionLogWriter
+
+
+def test_rows_are_flushed_in_batches_and_drained_on_stop():
+    flushed = []
+    writer = PredictionLogWriter(flushed.append, max_queue=1000, batch_size=10, flush_interval_ms=50)
+    writer.start()
+    writer.enqueue([{"i": i} for i in range(25)])
+    writer.stop()
+
+    assert [row["i"] for batch in flushed for row in batch] == list(range(25))
+    assert all(len(batch) <= 10 for batch in flushed)
+    stats = writer.stats()
+    assert stats["written"] == 25 and stats["dropped"] == 0 and stats["queue_depth"] == 0
+
+
+def test_partial_batch_is_flushed_after_interval():
+    flushed = threading.Event()
+    writer = PredictionLogWriter(lambda rows: flushed.set(), batch_size=100, flush_interval_ms=20)
+    writer.start()
+    try:
+        writer.enqueue([{"i": 1}])
+        assert flushed.wait(2)
+    finally:
+        writer.stop()
+
+
+def test_full_queue_drops_rows_instead_of_blocking():
+    writer = PredictionLogWriter(lambda rows: None, max_queue=5)
+    # Not started: nothing drains the queue
+    assert writer.enqueue([{"i": i} for i in range(8)]) == 5
+    assert writer.stats()["dropped"] == 3
+
+
+def test_flush_errors_are_counted_not_raised():
+    def fail(rows):
+        raise RuntimeError("db down")
+
+    writer = PredictionLogWriter(fail, batch_size=2, flush_interval_ms=10)
+    writer.start()
+    writer.enqueue([{"i": 1}, {"i": 2}])
+    time.sleep(0.1)
+    writer.stop()
+    assert writer.stats()["failed"] == 2
+
+
+def test_foreign_key_violation_only_drops_the_offending_row():
+    from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, create_engine, event, func, select
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    metadata = MetaData()
+    customers = Table("customers", metadata, Column("customer_id", String(50), primary_key=True))
+    logs = Table("prediction_logs", metadata, Column("id", Integer, primary_key=True),
+                 Column("customer_id", String(50), ForeignKey("customers.customer_id")))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(customers.insert(), [{"customer_id": f"C{i}"} for i in range(100)])
+
+    statements = []
+
+    def flush(rows):
+        statements.append(len(rows))
+        with engine.begin() as conn:
+            conn.execute(logs.insert().values(rows))
+
+    writer = PredictionLogWriter(flush, batch_size=100, flush_interval_ms=10, split_errors=(IntegrityError,))
+    rows = [{"customer_id": f"C{i}"} for i in range(100)]
+    rows[37] = {"customer_id": "Unknown"}
+    writer.enqueue(rows)
+    writer.start()
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written"] == 99 and stats["failed"] == 1
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(logs)) == 99
+
+    # Mostly rejected rows: one failed batch plus one statement per row, not a bisection per bad row
+    statements.clear()
+    writer.enqueue([{"customer_id": "Unknown" if i % 10 else f"C{i}"} for i in range(100)])
+    writer.start()
+    writer.stop()
+    assert statements == [100] + [1] * 100
+    assert writer.stats()["written"] == 109 and writer.stats()["failed"] == 91
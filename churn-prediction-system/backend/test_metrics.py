@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from metrics import Histogram, LATENCY_BUCKETS, Metrics
+
+
+def test_histogram_quantiles_are_within_one_bucket():
+    hist = Histogram(LATENCY_BUCKETS)
+    values = [i / 1000 for i in range(1, 1001)]  # 1ms .. 1s, uniform
+    for v in values:
+        hist.observe(v)
+    assert hist.count == 1000
+    for q in (0.5, 0.95, 0.99):
+        assert abs(hist.quantile(q) - q) / q < 0.25
+
+
+def test_stages_feed_histograms_and_trace():
+    m = Metrics(enabled=True, server_timing=True)
+    tokens = m.start_trace()
+    with m.stage("predict"):
+        pass
+    with m.stage("predict"):
+        pass
+    trace = m.finish_trace(tokens)
+    assert [name for name, _ in trace] == ["predict", "predict"]
+    assert m.histogram("churn_stage_seconds", (("stage", "predict"),)).count == 2
+
+    header = m.server_timing_header(trace, 0.01)
+    assert header.startswith("predict;dur=") and header.endswith("total;dur=10.000")
+
+    m.register_gauge("churn_queue_depth", "Queue depth", lambda: 3)
+    text = m.render()
+    assert '# TYPE churn_stage_seconds histogram' in text
+    assert 'churn_stage_seconds_count{stage="predict"} 2' in text
+    assert 'churn_stage_seconds_quantile{stage="predict",quantile="0.99"}' in text
+    assert 'churn_queue_depth 3' in text
+
+
+def test_parse_stage_starts_after_admission():
+    m = Metrics(enabled=True, server_timing=True)
+    tokens = m.start_trace()
+    time.sleep(0.05)  # queued by admission control
+    m.observe_admission()
+    m.observe_since_request_start("parse")
+    trace = dict(m.finish_trace(tokens))
+    assert trace["admission"] >= 0.05 and trace["parse"] < 0.01
+
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics(enabled=False, server_timing=False)
+    assert m.stage("a") is m.stage("b")  # shared no-op
+    with m.stage("a"):
+        pass
+    m.count("churn_x_total")
+    assert m.histogram("churn_stage_seconds", (("stage", "a"),)) is None
+    assert m.render().strip() == ""
@@ -0,0 +1,62 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from model_registry import ModelRegistry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+
+
+@pytest.fixture
+def model_copy(tmp_path):
+    path = tmp_path / 'churn_model.pkl'
+    shutil.copy(MODEL_PATH, path)
+    return str(path)
+
+
+def _touch_new_version(path):
+    # Trailing bytes after the pickle STOP opcode change the fingerprint, not the model
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 16)
+
+
+def test_reload_swaps_only_when_artifact_changes(model_copy):
+    registry = ModelRegistry(model_copy)
+    swapped = []
+    registry.on_swap(lambda new, old: swapped.append((new.version, old.version if old else None)))
+
+    first = registry.reload()
+    assert registry.reload() is first
+
+    _touch_new_version(model_copy)
+    second = registry.reload()
+    assert second is not first and second.version != first.version
+    assert registry.current is second
+    assert swapped == [(first.version, None), (second.version, first.version)]
+
+
+def test_old_bundle_keeps_serving_after_swap(model_copy):
+    registry = ModelRegistry(model_copy)
+    old = registry.reload()
+    _touch_new_version(model_copy)
+    registry.reload()
+
+    X = old.transform_rows([{"tenure": 5, "Contract": "Month-to-month"}])
+    assert old.classifier.predict_proba(X).shape == (1, 2)
+
+
+def test_watcher_picks_up_new_artifact(model_copy):
+    registry = ModelRegistry(model_copy)
+    first = registry.reload()
+    registry.start_watcher(interval_seconds=0.05)
+    try:
+        _touch_new_version(model_copy)
+        deadline = time.time() + 30
+        while registry.current is first and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        registry.stop_watcher()
+    assert registry.current.version != first.version
@@ -0,0 +1,42 @@
+import time
+
+from prediction_cache import PredictionCache, canonical_key
+
+
+def test_key_ignores_customer_id_and_numeric_type_but_not_model_version():
+    a = {"customer_id": "A", "tenure": 12, "Contract": "One year"}
+    b = {"customer_id": "B", "tenure": 12.0, "Contract": "One year"}
+    assert canonical_key(a, "v1") == canonical_key(b, "v1")
+    assert canonical_key(a, "v1") != canonical_key(a, "v2")
+    assert canonical_key(a, "v1") != canonical_key(dict(a, tenure=13), "v1")
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", (0.1, []))
+    cache.put("b", (0.2, []))
+    assert cache.get("a") == (0.1, [])
+    cache.put("c", (0.3, []))  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("c") == (0.3, [])
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(ttl_seconds=0.01)
+    cache.put("a", (0.5, []))
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_cap_evicts_oldest():
+    cache = PredictionCache(max_entries=100, max_bytes=200)
+    for i in range(10):
+        cache.put(f"key-{i}", (0.5, [{"feature": "x" * 20, "impact": 0.1}]))
+    assert cache.stats()["bytes"] <= 200
+    assert cache.get("key-9") is not None
+    assert cache.get("key-0") is None
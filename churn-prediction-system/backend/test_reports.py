@@ -0,0 +1,106 @@
+import asyncio
+import math
+import os
+import re
+import sys
+import zlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from prediction_cache import PredictionCache
+from report_generator import PDFReport, PDFStreamWriter, render_report_pages
+from reports import ReportRenderer, report_key
+
+REPORT = {"customer_id": "TEST-0001", "churn_probability": 0.82, "risk_level": "High", "tenure": 3,
+          "explanations": [{"feature": "Contract", "impact": 0.5}, {"feature": "tenure", "impact": -0.1}]}
+
+
+def collect(stream):
+    async def run():
+        return [chunk async for chunk in stream]
+    return asyncio.run(run())
+
+
+def test_sector_arcs_are_beziers_on_the_circle():
+    pdf = PDFReport()
+    pdf.add_page()
+    start = len(pdf.pages[1])
+    pdf.sector(100, 100, 20, 0, 360, 'F')
+    ops = pdf.pages[1][start:].splitlines()
+    curves = [list(map(float, op.split()[:6])) for op in ops if op.endswith(' c')]
+    assert len(curves) == 4  # a full circle is four quarter arcs, not 72 line segments
+    cx, cy = 100 * pdf.k, (pdf.h - 100) * pdf.k
+    x0, y0 = map(float, ops[1].split()[:2])
+    for x1, y1, x2, y2, x3, y3 in curves:
+        # Curve midpoint stays on the circle
+        mx = (x0 + 3 * x1 + 3 * x2 + x3) / 8
+        my = (y0 + 3 * y1 + 3 * y2 + y3) / 8
+        assert math.isclose(math.hypot(mx - cx, my - cy), 20 * pdf.k, rel_tol=1e-3)
+        x0, y0 = x3, y3
+
+
+def test_stream_writer_produces_consistent_xref():
+    writer = PDFStreamWriter()
+    chunks = [writer.begin()]
+    for i in range(3):
+        for page in render_report_pages({**REPORT, "customer_id": f"C{i}"}, f"Customer {i + 1}/3"):
+            chunks.append(writer.add_page(page))
+    chunks.append(writer.end())
+    pdf = b"".join(chunks)
+
+    xref = pdf.rindex(b"\nxref\n") + 1
+    assert int(re.search(rb"startxref\n(\d+)", pdf).group(1)) == xref
+    entries = pdf[xref:].split(b"\n")[3:]
+    objects = len(writer.offsets) - 1
+    for number in range(1, objects + 1):
+        offset = int(entries[number - 1][:10])
+        assert pdf[offset:].startswith(f"{number} 0 obj".encode())
+    assert b"/Count 3" in pdf
+    # Fonts are shared across pages, not repeated per page
+    assert pdf.count(b"/BaseFont /Helvetica-Bold") == 1
+
+
+def test_renderer_caches_by_content_and_streams_in_order():
+    renderer = ReportRenderer(workers=0, cache=PredictionCache(max_entries=10), max_inflight=2)
+    assert report_key(REPORT) == report_key(dict(reversed(list(REPORT.items()))))
+
+    async def render_twice():
+        return await renderer.render(REPORT), await renderer.render(REPORT)
+    first, second = asyncio.run(render_twice())
+    assert first == second and first.startswith(b"%PDF")
+    assert renderer.rendered == 1 and renderer.cache.hits == 1
+
+    reports = [{**REPORT, "customer_id": f"C{i}"} for i in range(5)]
+    pdf = b"".join(collect(renderer.stream_pdf(reports)))
+    contents = [zlib.decompress(s) for s in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)]
+    ids = [re.search(rb"Customer Identifier: (C\d)", c).group(1) for c in contents]
+    assert ids == [b"C0", b"C1", b"C2", b"C3", b"C4"]
+    assert renderer.bulk_reports == 5
+
+
+def test_cached_reports_carry_the_assessment_date(monkeypatch):
+    import reports
+    from datetime import datetime
+
+    class Clock(datetime):
+        today = datetime(2026, 3, 1, 23, 59)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.today
+
+    def dates(pdf):
+        text = b"".join(zlib.decompress(s) for s in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S))
+        return re.findall(rb"Assessment Date: ([\d-]+)", text)
+
+    monkeypatch.setattr(reports, "datetime", Clock)
+    renderer = ReportRenderer(workers=0, cache=PredictionCache(max_entries=10))
+    first = asyncio.run(renderer.render(REPORT))
+    Clock.today = datetime(2026, 3, 2, 0, 1)
+    second = asyncio.run(renderer.render(REPORT))
+    assert dates(first) == [b"2026-03-01"] and dates(second) == [b"2026-03-02"]
+    assert renderer.rendered == 2
+
+    # Stored predictions are dated by when they were made, whatever the day they are rendered
+    stored = asyncio.run(renderer.render({**REPORT, "predicted_at": "2026-02-14T08:30:00"}))
+    assert dates(stored) == [b"2026-02-14"]
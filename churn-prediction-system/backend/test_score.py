@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+import app as app_module
+from explanation_store import ExplanationStore
+from score import ResultWriter, score
+
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+@pytest.mark.parametrize("extension", ["parquet", "feather", "csv"])
+def test_bulk_scores_match_the_api(tmp_path, extension, monkeypatch):
+    source = tmp_path / "customers.csv"
+    frame = pd.read_csv(DATA_PATH).head(300)
+    frame.to_csv(source, index=False)
+    output = str(tmp_path / f"scores.{extension}")
+
+    result = score(str(source), output, chunk_size=120, workers=1, top_k=2)
+    assert result['rows'] == 300
+
+    scores = {"parquet": pd.read_parquet, "feather": pd.read_feather, "csv": pd.read_csv}[extension](output)
+    assert scores['customer_id'].tolist() == frame['customerID'].tolist()
+
+    customers = frame.drop(columns=['customerID', 'Churn']).to_dict('records')
+    for row, cid in zip(customers, frame['customerID']):
+        row['customer_id'] = cid
+    # Keep test predictions out of the configured explanation store
+    monkeypatch.setattr(app_module, "explanation_store", ExplanationStore(str(tmp_path / "explanations")))
+    with TestClient(app_module.app) as client:
+        assert app_module.model_ready.wait(120)
+        api = client.post("/predict/batch?use_cache=false&top_k=2", json={"customers": customers}).json()["results"]
+
+    for (_, scored), expected in zip(scores.iterrows(), api):
+        assert scored['churn_probability'] == pytest.approx(expected['churn_probability'], abs=1e-4)
+        assert scored['risk_level'] == expected['risk_level']
+        assert [scored['driver_1'], scored['driver_2']] == [e['feature'] for e in expected['explanations']]
+
+
+def test_existing_table_is_only_replaced_when_asked():
+    from sqlalchemy import create_engine
+
+    engine = create_engine("sqlite://")
+    pd.DataFrame({"customer_id": ["kept"]}).to_sql("batch_scores", engine, index=False)
+    scores = pd.DataFrame({"customer_id": ["A", "B"]})
+
+    writer = ResultWriter(None, "batch_scores")
+    writer._engine = engine
+    with pytest.raises(ValueError):
+        writer.write(scores)
+    assert pd.read_sql_table("batch_scores", engine)["customer_id"].tolist() == ["kept"]
+
+    writer = ResultWriter(None, "batch_scores", replace=True)
+    writer._engine = engine
+    writer.write(scores)
+    writer.write(scores)
+    assert pd.read_sql_table("batch_scores", engine)["customer_id"].tolist() == ["A", "B", "A", "B"]
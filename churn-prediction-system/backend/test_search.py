@@ -0,0 +1,29 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+from dataset import load_dataset
+from search import MAX_TREES, search, select
+from train import split_data
+
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+def test_search_ranks_candidates_with_cost():
+    X, _, y, _ = split_data(load_dataset(DATA_PATH).head(2000))
+    grid = {'max_depth': [2, 6], 'learning_rate': [0.1]}
+
+    results = search(X, y, grid, n_splits=3, workers=2)
+
+    assert len(results) == 2
+    assert results[0]['roc_auc'] >= results[1]['roc_auc'] > 0.7
+    for r in results:
+        assert 1 <= r['n_estimators'] < MAX_TREES
+        assert r['fit_seconds'] > 0 and r['latency_ms'] > 0 and r['batch_us_per_row'] > 0
+
+    fastest = min(results, key=lambda r: r['latency_ms'])
+    assert select(results) is results[0]
+    assert select(results, max_latency_ms=fastest['latency_ms']) in results
+    assert select(results, max_latency_ms=0) is fastest
@@ -0,0 +1,30 @@
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'benchmarks'))
+
+from prefork_memory import children, free_port, post_predict, wait_ready
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork') or not os.path.exists('/proc/self/smaps_rollup'),
+                    reason="pre-fork serving needs fork() and /proc")
+def test_prefork_workers_serve_the_preloaded_model():
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+                             '--workers', '2', '--log-level', 'warning'],
+                            cwd=BASE_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            env={**os.environ, 'STATS_ROLLUP_INTERVAL_SECONDS': '0'})
+    try:
+        wait_ready(port, 1, timeout=120)
+        assert len(children(proc.pid)) == 2
+        assert post_predict(port) == 200
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        output, _ = proc.communicate(timeout=30)
+    assert proc.returncode == 0
+    assert "loaded model" in output and "with 2 worker(s)" in output
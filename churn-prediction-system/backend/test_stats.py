@@ -0,0 +1,70 @@
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stats import DatasetStats, LiveRiskStats
+import app as app_module
+
+
+def test_dataset_stats_are_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("customerID,Churn\na,Yes\nb,No\nc,No\nd,No\n")
+    stats = DatasetStats(str(path))
+
+    assert stats.get() == {"total_customers": 4, "churn_rate": 25.0}
+    stats.get()
+    assert stats.recomputes == 1
+
+    path.write_text("customerID,Churn\na,Yes\nb,Yes\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert stats.get() == {"total_customers": 2, "churn_rate": 100.0}
+    assert stats.recomputes == 2
+
+
+def test_live_stats_update_incrementally():
+    live = LiveRiskStats()
+    live.record([({"customer_id": "a", "MonthlyCharges": 100.0}, 0.9, "High"),
+                 ({"customer_id": "b", "MonthlyCharges": 50.0}, 0.2, "Low")])
+    snap = live.snapshot()
+
+    assert snap["customers_scored"] == 2
+    assert [d["value"] for d in snap["risk_distribution"]] == [50.0, 0, 50.0]
+    assert snap["monthly_revenue_at_risk"] == 100.0
+    assert snap["active_interventions"] == 1
+
+    # Scoring a customer again replaces their contribution
+    for _ in range(3):
+        live.record([({"customer_id": "a", "MonthlyCharges": 100.0}, 0.5, "Medium")])
+    snap = live.snapshot()
+    assert snap["customers_scored"] == 2
+    assert [d["count"] for d in snap["risk_distribution"]] == [1, 1, 0]
+    assert snap["monthly_revenue_at_risk"] == 60.0
+
+
+def test_rollup_resyncs_counters_from_prediction_logs(monkeypatch):
+    engine = create_engine("sqlite://")
+    app_module.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(app_module.PredictionLog.__table__.insert(), [
+            {"customer_id": "a", "prediction_prob": 0.3, "risk_level": "Low", "monthly_charges": 100.0},
+            {"customer_id": "b", "prediction_prob": 0.5, "risk_level": "Medium", "monthly_charges": 40.0},
+            {"customer_id": "a", "prediction_prob": 0.8, "risk_level": "High", "monthly_charges": 100.0},
+            {"customer_id": "c", "prediction_prob": 0.5, "risk_level": "Medium", "monthly_charges": None},
+        ])
+    monkeypatch.setattr(app_module, "engine", engine)
+    monkeypatch.setattr(app_module, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(app_module, "live_stats", LiveRiskStats())
+
+    app_module.rollup_prediction_stats()
+    snap = app_module.live_stats.snapshot()
+    # Only each customer's latest prediction counts
+    assert snap["customers_scored"] == 3
+    assert [d["count"] for d in snap["risk_distribution"]] == [0, 2, 1]
+    assert snap["monthly_revenue_at_risk"] == 100.0
+
+    # Live predictions after the rollup replace the rolled-up ones
+    app_module.live_stats.record([({"customer_id": "a", "MonthlyCharges": 100.0}, 0.2, "Low")])
+    snap = app_module.live_stats.snapshot()
+    assert [d["count"] for d in snap["risk_distribution"]] == [1, 2, 0]
+    assert snap["monthly_revenue_at_risk"] == 40.0
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.join(BASE_DIR, 'ml_pipeline'))
+
+from model_registry import load_bundle
+from tree_engine import FlatTreeEnsemble
+
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'churn_model.pkl')
+ARTIFACT_PATH = os.path.join(BASE_DIR, 'models', 'churn_model_artifact')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+def test_flat_engine_matches_xgboost_on_full_dataset():
+    df = pd.read_csv(DATA_PATH).drop('Churn', axis=1)
+    for path in (MODEL_PATH, ARTIFACT_PATH):
+        bundle = load_bundle(path, warm_up=False)
+        X = bundle.transform_frame(df)
+        engine = FlatTreeEnsemble.from_booster(bundle.classifier)
+        expected = bundle.classifier.predict_proba(X)
+        np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=1e-6)
+
+
+def test_flat_engine_follows_default_direction_for_missing_values():
+    bundle = load_bundle(MODEL_PATH, warm_up=False)
+    df = pd.read_csv(DATA_PATH).drop('Churn', axis=1).head(300)
+    X = bundle.transform_frame(df).astype(np.float32)
+    X[::2, :3] = np.nan
+    engine = FlatTreeEnsemble.from_booster(bundle.classifier)
+    np.testing.assert_allclose(engine.predict_proba(X), bundle.classifier.predict_proba(X), rtol=0, atol=1e-6)
+
+
+def test_auto_backend_uses_engine_for_small_batches_only():
+    bundle = load_bundle(MODEL_PATH, warm_up=False, inference_backend='auto', flat_max_rows=8)
+    assert bundle.inference_backend == 'auto' and bundle.flat_engine is not None
+    calls = []
+    predict = bundle.flat_engine.predict_proba
+    bundle.flat_engine.predict_proba = lambda X: calls.append(len(X)) or predict(X)
+
+    rows = pd.read_csv(DATA_PATH).drop('Churn', axis=1).head(20).to_dict('records')
+    bundle.predict_proba(bundle.transform_rows(rows[:1]))
+    bundle.predict_proba(bundle.transform_rows(rows))
+    assert calls == [1]
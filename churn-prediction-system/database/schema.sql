@@ -31,6 +31,37 @@ CREATE TABLE IF NOT EXISTS prediction_logs (
     prediction_prob FLOAT,
     prediction_class INT,
     risk_level VARCHAR(20),
+    monthly_charges FLOAT,
     prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+    -- Back the /logs filters and (prediction_date, id) keyset pagination
+    INDEX ix_prediction_logs_date_id (prediction_date, id),
+    INDEX ix_prediction_logs_customer_date_id (customer_id, prediction_date, id),
+    INDEX ix_prediction_logs_risk_date_id (risk_level, prediction_date, id)
+);
+
+-- Existing installs: add the column used for revenue-at-risk in /stats
+-- ALTER TABLE prediction_logs ADD COLUMN monthly_charges FLOAT AFTER risk_level;
+
+-- Existing installs: indexes for /logs filtering and keyset pagination
+-- CREATE INDEX ix_prediction_logs_date_id ON prediction_logs (prediction_date, id);
+-- CREATE INDEX ix_prediction_logs_customer_date_id ON prediction_logs (customer_id, prediction_date, id);
+-- CREATE INDEX ix_prediction_logs_risk_date_id ON prediction_logs (risk_level, prediction_date, id);
+
+-- Latest score per customer, re-materialized by the API's scoring job (backend/customer_risk.py).
+-- Segment columns are copied from customers so top-N per segment is an index range scan.
+CREATE TABLE IF NOT EXISTS customer_scores (
+    customer_id VARCHAR(50) PRIMARY KEY,
+    churn_probability FLOAT NOT NULL,
+    risk_level VARCHAR(20) NOT NULL,
+    top_drivers JSON,
+    model_version VARCHAR(64) NOT NULL,
+    scored_at DATETIME NOT NULL,
+    contract VARCHAR(30),
+    internet_service VARCHAR(30),
+    payment_method VARCHAR(30),
+    INDEX ix_customer_scores_probability (churn_probability),
+    INDEX ix_customer_scores_contract_probability (contract, churn_probability),
+    INDEX ix_customer_scores_internet_service_probability (internet_service, churn_probability),
+    INDEX ix_customer_scores_payment_method_probability (payment_method, churn_probability)
 );
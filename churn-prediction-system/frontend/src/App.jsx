@@ -310,7 +310,7 @@ const FeatureStoreView = ({ features, isDarkMode }) => {
                 </TableCell>
                 <TableCell align="right">
                   <Chip
-                    label={f.importance}
+                    label={`${f.importance} · ${(f.shap_share * 100).toFixed(1)}%`}
                     size="small"
                     sx={{
                       fontSize: '9px',
@@ -413,7 +413,8 @@ function App() {
           const [statsRes, logsRes, featuresRes] = await Promise.all([
             api.get('/stats'),
             api.get('/logs'),
-            api.get('/features')
+            // Importance is only available once the model has loaded
+            api.get('/features').catch(() => ({ data: null }))
           ]);
           setStats(statsRes.data);
           setLogs(logsRes.data);
@@ -22,9 +22,10 @@ const ResultCard = ({ result }) => {
     const handleDownload = async () => {
         try {
             const loadingToast = toast.loading('Generating Report...');
-            const response = await api.post('/report', { data: result }, {
-                responseType: 'blob'
-            });
+            // Stored predictions render server-side from their ID; otherwise send the result itself
+            const response = result.prediction_id != null
+                ? await api.get(`/report/${result.prediction_id}`, { responseType: 'blob' })
+                : await api.post('/report', { data: result }, { responseType: 'blob' });
 
             const url = window.URL.createObjectURL(new Blob([response.data]));
             const link = document.createElement('a');